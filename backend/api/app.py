@@ -1,7 +1,8 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, g, request
 from flask_cors import CORS
 import os
 import sys
+import time
 
 # Add project root to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
@@ -10,6 +11,11 @@ from backend.api.routes.jobs import jobs_bp
 from backend.api.routes.candidates import candidates_bp
 from backend.api.routes.matching import matching_bp
 from backend.api.routes.dashboard import dashboard_bp
+from backend.api.routes.tasks import tasks_bp
+from backend.api.routes.events import events_bp
+from backend.api.routes.metrics import metrics_bp
+import database_setup
+import metrics
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": [
@@ -29,6 +35,29 @@ app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
 app.register_blueprint(candidates_bp, url_prefix='/api/candidates')
 app.register_blueprint(matching_bp, url_prefix='/api/matching')
 app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+app.register_blueprint(tasks_bp, url_prefix='/api/tasks')
+app.register_blueprint(events_bp, url_prefix='/api/events')
+app.register_blueprint(metrics_bp, url_prefix='/api/metrics')
+
+HTTP_SECONDS = metrics.histogram("http_request_duration_seconds", "API request latency by route",
+                                 ["method", "route", "status"])
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # The route pattern, not the URL, so ids don't explode the label set
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route,
+                             status=response.status_code)
+    return response
+
+# Bring indexes and other versioned schema changes up to date
+database_setup.apply_migrations()
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
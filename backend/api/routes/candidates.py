@@ -1,30 +1,33 @@
 from flask import Blueprint, request, jsonify
 import os
+import shutil
+import tempfile
 from werkzeug.utils import secure_filename
 import sys
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 from process_cvs import process_cvs
-from backend.api.utils.db_helper import get_all_candidates
+from backend.api.utils.db_helper import list_page, count_rows, DEFAULT_PAGE_SIZE
+from backend.api.utils.task_queue import submit_task, wait_task, TaskAlreadyActive
+from backend.api.routes.tasks import wants_sync, task_response
 
 candidates_bp = Blueprint('candidates', __name__)
 
-def clear_candidate_related_data():
-    """Clear all candidate-related data for fresh upload"""
-    import sqlite3
-    from config import DB_PATH
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    print("🗑️  Clearing all candidate-related data...")
-    cursor.execute("DELETE FROM candidates")
-    cursor.execute("DELETE FROM shortlisted_candidates")
-    conn.commit()
-    conn.close()
-    print("All candidate-related data cleared.")
-
 UPLOAD_FOLDER = 'data/uploaded_cvs' 
+
+INGEST_BUSY_ERROR = 'CVs are still being processed; try again when that finishes'
+
+def _ingest_upload(staging_folder, progress=None):
+    """Swap a staged upload into UPLOAD_FOLDER and ingest it.
+
+    Runs as the only cv_ingest task, so the folder never changes under a
+    running ingest.
+    """
+    from process_cvs import process_cvs_from_folder
+    shutil.rmtree(UPLOAD_FOLDER, ignore_errors=True)
+    os.replace(staging_folder, UPLOAD_FOLDER)
+    return process_cvs_from_folder(UPLOAD_FOLDER, progress=progress)
+
 ALLOWED_EXTENSIONS = {'pdf', 'docx'}
 
 def allowed_file(filename):
@@ -32,7 +35,7 @@ def allowed_file(filename):
 
 @candidates_bp.route('/upload', methods=['POST'])
 def upload_cvs():
-    """Upload multiple CV files"""
+    """Upload multiple CV files (processed in the background unless ?wait=true)"""
     try:
         print(f"📤 CV upload request received")
         print(f"Request files keys: {list(request.files.keys())}")
@@ -45,12 +48,10 @@ def upload_cvs():
         
         if not files or (len(files) == 1 and files[0].filename == ''):
             return jsonify({'error': 'No files selected'}), 400
-        
-        # Clear and recreate upload folder
-        if os.path.exists(UPLOAD_FOLDER):
-            import shutil
-            shutil.rmtree(UPLOAD_FOLDER)
-        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+        # Stage files in a folder of their own; the ingest swaps it into UPLOAD_FOLDER
+        os.makedirs(os.path.dirname(UPLOAD_FOLDER), exist_ok=True)
+        staging_folder = tempfile.mkdtemp(prefix='uploading_cvs-', dir=os.path.dirname(UPLOAD_FOLDER))
         
         uploaded = []
         errors = []
@@ -59,7 +60,7 @@ def upload_cvs():
             print(f"Processing file: {file.filename}")
             if file and file.filename and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
+                filepath = os.path.join(staging_folder, filename)
                 file.save(filepath)
                 uploaded.append(filename)
                 print(f"✅ Saved: {filename}")
@@ -71,23 +72,34 @@ def upload_cvs():
         print(f"📊 Upload summary: {len(uploaded)} files uploaded, {len(errors)} errors")
         
         if not uploaded:
+            shutil.rmtree(staging_folder, ignore_errors=True)
             return jsonify({'error': 'No valid CV files were uploaded'}), 400
-        
-        # Clear existing candidate data first
-        clear_candidate_related_data()
-        
-        # Process only the uploaded files using modified function
-        from process_cvs import process_cvs_from_folder
-        process_cvs_from_folder(UPLOAD_FOLDER)
+
+        # One cv_ingest at a time, for ?wait=true requests too
+        try:
+            task_id = submit_task('cv_ingest', _ingest_upload, staging_folder, unique_kind=True)
+        except TaskAlreadyActive as e:
+            shutil.rmtree(staging_folder, ignore_errors=True)
+            return jsonify({'error': INGEST_BUSY_ERROR, 'task_id': e.task_id}), 409
+
+        if not wants_sync():
+            return task_response(
+                task_id, f'{len(uploaded)} CVs uploaded; processing in the background',
+                extra={'files_uploaded': len(uploaded), 'uploaded': uploaded, 'errors': errors}
+            )
+
+        # Previous candidate data is cleared by the ingest itself
+        task = wait_task(task_id)
+        if task['status'] != 'completed':
+            return jsonify({'error': task['error'] or f"CV ingest {task['status']}", 'task_id': task_id}), 500
         
         # Get count of newly processed candidates
-        from backend.api.utils.db_helper import get_all_candidates
-        new_candidates = get_all_candidates()
+        new_candidates = count_rows('candidates')
         
         return jsonify({
-            'message': f'{len(uploaded)} CVs uploaded, {len(new_candidates)} candidates processed (previous data cleared)',
+            'message': f'{len(uploaded)} CVs uploaded, {new_candidates} candidates processed (previous data cleared)',
             'files_uploaded': len(uploaded),
-            'candidates_processed': len(new_candidates),
+            'candidates_processed': new_candidates,
             'uploaded': uploaded,
             'errors': errors
         }), 200
@@ -98,18 +110,28 @@ def upload_cvs():
 
 @candidates_bp.route('/', methods=['GET'])
 def get_candidates():
-    """Get all candidates"""
+    """List candidates, newest first, one page at a time.
+
+    Query params: limit (default 100, max 1000), after_id (the previous
+    page's next_after_id), fields=id,name,match_score to pick columns, and
+    view=summary to leave out cv_text.
+    """
     try:
-        candidates = get_all_candidates()
-        response = jsonify({
-            'data': candidates,
-            'count': len(candidates),
-            'timestamp': __import__('datetime').datetime.now().isoformat()
-        })
+        page = list_page(
+            'candidates',
+            fields=request.args.get('fields'),
+            view=request.args.get('view', 'full'),
+            after_id=request.args.get('after_id', type=int),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        )
+        page['timestamp'] = __import__('datetime').datetime.now().isoformat()
+        response = jsonify(page)
         # Add cache-busting headers
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '0'
         return response, 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,57 +1,93 @@
-from flask import Blueprint, jsonify
-from backend.api.utils.db_helper import get_dashboard_stats
+from flask import Blueprint, request, jsonify, Response
+from backend.api.utils.db_helper import (
+    get_dashboard_stats, get_dashboard_stats_etag, get_job_stats, get_db_connection,
+    list_page, DEFAULT_PAGE_SIZE
+)
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+def _conditional(build):
+    """Answer 304 when the client's ETag matches the stats version, else jsonify(build())"""
+    etag = get_dashboard_stats_etag()
+    if etag and etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    if etag:
+        response.set_etag(etag)
+    # Browsers revalidate on every poll instead of reusing a stale copy
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @dashboard_bp.route('/stats', methods=['GET'])
 def get_stats():
-    """Get dashboard statistics"""
+    """Get dashboard statistics (with an ETag; unchanged polls get 304)"""
     try:
-        stats = get_dashboard_stats()
-        return jsonify(stats), 200
+        return _conditional(get_dashboard_stats)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@dashboard_bp.route('/stats/jobs', methods=['GET'])
+def get_stats_per_job():
+    """Matched, shortlisted and emailed candidate counts per job (with an ETag)"""
+    try:
+        return _conditional(lambda: {'data': get_job_stats()})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @dashboard_bp.route('/data', methods=['GET'])
 def get_all_data():
-    """Get all database data for viewing"""
+    """Get a bounded snapshot of database data for viewing.
+
+    Returns the newest `limit` (default 100, max 1000) candidates, jobs and
+    top shortlisted candidates. Candidates and jobs use the summary view
+    (no cv_text / job_description / jd_summary) unless view=full; page on
+    through /api/candidates and /api/jobs with the returned next_after_id.
+    """
     try:
-        import sqlite3
-        from config import DB_PATH
+        view = request.args.get('view', 'summary')
+        limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        candidates = list_page('candidates', view=view, limit=limit)
+        jobs = list_page('jobs', view=view, limit=limit)
+        limit = candidates['limit']
         
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Get all candidates
-        cursor.execute("SELECT * FROM candidates ORDER BY id DESC")
-        candidates = [dict(row) for row in cursor.fetchall()]
-        
-        # Get all jobs
-        cursor.execute("SELECT * FROM jobs ORDER BY id DESC") 
-        jobs = [dict(row) for row in cursor.fetchall()]
-        
         # Get shortlisted candidates
         cursor.execute("""
             SELECT sc.*, j.job_title 
             FROM shortlisted_candidates sc
             LEFT JOIN jobs j ON sc.job_id = j.id
             ORDER BY sc.match_score DESC
-        """)
+            LIMIT ?
+        """, (limit,))
         shortlisted = [dict(row) for row in cursor.fetchall()]
         
+        # Totals come from the whole tables, not just the returned page
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM candidates) AS total_candidates,
+                (SELECT COUNT(*) FROM jobs) AS total_jobs,
+                (SELECT COUNT(*) FROM shortlisted_candidates) AS total_shortlisted,
+                (SELECT COUNT(*) FROM candidates
+                 WHERE match_score IS NOT NULL AND match_score != 0) AS matched_candidates
+        """)
+        summary = dict(cursor.fetchone())
+        
         conn.close()
         
         return jsonify({
-            'candidates': candidates,
-            'jobs': jobs,
+            'candidates': candidates['data'],
+            'jobs': jobs['data'],
             'shortlisted': shortlisted,
-            'summary': {
-                'total_candidates': len(candidates),
-                'total_jobs': len(jobs),
-                'total_shortlisted': len(shortlisted),
-                'matched_candidates': len([c for c in candidates if c['match_score']])
-            }
+            'next_after_id': {
+                'candidates': candidates['next_after_id'],
+                'jobs': jobs['next_after_id']
+            },
+            'summary': summary
         }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,51 @@
+from flask import Blueprint, request, Response, stream_with_context
+import json
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+import event_bus
+from config import EVENT_HEARTBEAT_SECONDS
+
+events_bp = Blueprint('events', __name__)
+
+def _format(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+@events_bp.route('', methods=['GET'])
+def stream_events():
+    """Server-sent event stream of pipeline progress and dashboard changes.
+
+    Query param types=a,b limits the stream to those event types. A
+    reconnecting EventSource sends Last-Event-ID and receives what it
+    missed; if that is no longer buffered it gets a "resync" event and
+    should refetch its data.
+    """
+    types = {t for t in request.args.get('types', '').split(',') if t}
+    resume_from = request.headers.get('Last-Event-ID', type=int)
+
+    def generate():
+        after_id = event_bus.last_event_id() if resume_from is None else resume_from
+        # Tells EventSource how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        if after_id > event_bus.last_event_id():
+            # The server restarted since this client's last event
+            after_id = event_bus.last_event_id()
+            yield _format({'id': after_id, 'type': 'resync', 'data': {}})
+        while True:
+            events, missed = event_bus.wait_for_events(after_id, timeout=EVENT_HEARTBEAT_SECONDS)
+            if missed:
+                yield _format({'id': events[0]['id'] - 1, 'type': 'resync', 'data': {}})
+            if not events:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                after_id = event['id']
+                if not types or event['type'] in types:
+                    yield _format(event)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,26 +1,28 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import json
 import os
 import pandas as pd
 from werkzeug.utils import secure_filename
 import sys
-import PyPDF2
-from docx import Document
 import re
 
 # Import existing scripts
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+import text_extraction
 from load_jobs import load_job_descriptions
 from jd_summarizer import process_job_descriptions
-from backend.api.utils.db_helper import get_all_jobs
+from match_candidates import get_job_summary, rank_candidates_for_job, process_candidate_matching
+from config import RANK_MAX_RESCORE
+from backend.api.utils.db_helper import get_all_jobs, list_page, DEFAULT_PAGE_SIZE
+from backend.api.routes.tasks import wants_sync, queued_response, ensure_task
 
 jobs_bp = Blueprint('jobs', __name__)
 
 def clear_job_related_data():
     """Clear all job-related data for fresh upload"""
-    import sqlite3
-    from config import DB_PATH
+    import db
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = db.connect()
     cursor = conn.cursor()
     
     print("🗑️  Clearing all job-related data...")
@@ -40,16 +42,9 @@ def allowed_file(filename):
 def extract_text_from_pdf(filepath):
     """Extract text from PDF file"""
     try:
-        text = ""
-        with open(filepath, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            print(f"   📄 PDF has {len(pdf_reader.pages)} page(s)")
-            for page_num, page in enumerate(pdf_reader.pages, 1):
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-                    print(f"   ✓ Extracted page {page_num}: {len(page_text)} chars")
-        return text.strip()
+        text = text_extraction.extract_pdf_text(filepath)
+        print(f"   ✓ Extracted {len(text)} chars from PDF")
+        return text
     except Exception as e:
         print(f"❌ Error extracting PDF text: {str(e)}")
         raise
@@ -57,15 +52,11 @@ def extract_text_from_pdf(filepath):
 def extract_text_from_docx(filepath):
     """Extract text from DOCX file"""
     try:
-        doc = Document(filepath)
-        print(f"   📄 DOCX has {len(doc.paragraphs)} paragraph(s)")
-        paragraphs = []
-        for para in doc.paragraphs:
-            if para.text.strip():
-                paragraphs.append(para.text.strip())
-        text = "\n".join(paragraphs)
-        print(f"   ✓ Extracted {len(paragraphs)} non-empty paragraphs")
-        return text.strip()
+        text = text_extraction.extract_docx_text(filepath)
+        # Blank paragraphs carry no job information
+        text = "\n".join(line.strip() for line in text.split("\n") if line.strip())
+        print(f"   ✓ Extracted {len(text)} chars from DOCX")
+        return text
     except Exception as e:
         print(f"❌ Error extracting DOCX text: {str(e)}")
         raise
@@ -379,8 +370,11 @@ def upload_job_csv():
 
 @jobs_bp.route('/summarize', methods=['POST'])
 def summarize_jobs():
-    """Trigger JD summarization using LLM"""
+    """Trigger JD summarization using LLM (runs in the background unless ?wait=true)"""
     try:
+        if not wants_sync():
+            return queued_response('summarization', process_job_descriptions)
+
         print(f"\n{'='*70}")
         print(f"🤖 STARTING JOB DESCRIPTION SUMMARIZATION")
         print(f"{'='*70}\n")
@@ -413,29 +407,97 @@ def summarize_jobs():
 
 @jobs_bp.route('/', methods=['GET'])
 def get_jobs():
-    """Get all jobs"""
+    """List jobs, newest first, one page at a time.
+
+    Query params: limit (default 100, max 1000), after_id (the previous
+    page's next_after_id), fields=id,job_title to pick columns, and
+    view=summary to leave out job_description and jd_summary.
+    """
     try:
-        jobs = get_all_jobs()
-        response = jsonify({
-            'data': jobs,
-            'count': len(jobs),
-            'timestamp': __import__('datetime').datetime.now().isoformat()
-        })
+        page = list_page(
+            'jobs',
+            fields=request.args.get('fields'),
+            view=request.args.get('view', 'full'),
+            after_id=request.args.get('after_id', type=int),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+        )
+        page['timestamp'] = __import__('datetime').datetime.now().isoformat()
+        response = jsonify(page)
         response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '0'
         return response, 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def _queue_pending(events):
+    """Hand candidates left over by a capped rescore to a background matching task."""
+    for event in events:
+        if event['type'] == 'done' and event.get('pending'):
+            event['matching_task_id'], _ = ensure_task('matching', process_candidate_matching)
+        yield event
+
+@jobs_bp.route('/<int:job_id>/candidates', methods=['GET'])
+def get_job_candidates(job_id):
+    """Rank candidates for one job.
+
+    Query params: top (page size, default 20, max 500), offset, or
+    after_score + after_id for keyset paging (use the `next` cursor of the
+    previous page), and stream=true for NDJSON that reports each freshly
+    scored candidate. Stored scores are ranked as-is by default; with
+    rescore=true up to RANK_MAX_RESCORE outdated candidates are rescored in
+    the request and, if more remain (`pending`), a background matching task
+    is queued for them (`matching_task_id`).
+    """
+    try:
+        top = max(1, min(request.args.get('top', 20, type=int), 500))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        after_score = request.args.get('after_score', type=float)
+        after_id = request.args.get('after_id', type=int)
+        after = (after_score, after_id) if after_score is not None and after_id is not None else None
+        rescore = request.args.get('rescore', 'false').lower() in ('1', 'true', 'yes')
+        stream = request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+        jd_summary = get_job_summary(job_id)
+        if jd_summary is None:
+            return jsonify({'error': f'Job {job_id} not found or not summarized yet'}), 404
+
+        events = _queue_pending(rank_candidates_for_job(job_id, jd_summary, top=top, offset=offset, after=after,
+                                                        rescore=rescore, max_rescore=RANK_MAX_RESCORE))
+        if stream:
+            lines = (json.dumps(event) + '\n' for event in events)
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
+        ranked = []
+        summary = {}
+        for event in events:
+            if event['type'] == 'candidate':
+                ranked.append({k: v for k, v in event.items() if k != 'type'})
+            elif event['type'] == 'done':
+                summary = event
+        return jsonify({
+            'job_id': job_id,
+            'data': ranked,
+            'count': len(ranked),
+            'considered': summary.get('considered', 0),
+            'rescored': summary.get('rescored', 0),
+            'pending': summary.get('pending', 0),
+            'matching_task_id': summary.get('matching_task_id'),
+            'next': summary.get('next')
+        }), 200
     except Exception as e:
+        print(f"❌ Candidate ranking error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 @jobs_bp.route('/clear', methods=['POST'])
 def clear_all_data():
     """Clear all recruitment data for fresh start"""
     try:
-        import sqlite3
-        from config import DB_PATH
+        import db
         
-        conn = sqlite3.connect(DB_PATH)
+        conn = db.connect()
         cursor = conn.cursor()
         
         print("🗑️  Clearing ALL recruitment data...")
@@ -1,4 +1,8 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+import csv
+import io
+import itertools
+import json
 import sys
 import os
 
@@ -6,14 +10,17 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 from match_candidates import process_candidate_matching
 from shortlist_candidates import shortlist_candidates
 from interview_scheduler import schedule_interviews
-from backend.api.utils.db_helper import get_matched_candidates, get_shortlisted_candidates
+from backend.api.utils.db_helper import get_matched_candidates, get_shortlisted_candidates, iter_match_results
+from backend.api.routes.tasks import wants_sync, queued_response
 
 matching_bp = Blueprint('matching', __name__)
 
 @matching_bp.route('/match', methods=['POST'])
 def trigger_matching():
-    """Trigger candidate-job matching"""
+    """Trigger candidate-job matching (runs in the background unless ?wait=true)"""
     try:
+        if not wants_sync():
+            return queued_response('matching', process_candidate_matching)
         process_candidate_matching()
         return jsonify({'message': 'Matching completed successfully'}), 200
     except Exception as e:
@@ -28,6 +35,63 @@ def get_match_results():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+def _csv_lines(rows, batch_size=500):
+    """Render rows as CSV, a few hundred lines per chunk, header from the first row."""
+    buffer = io.StringIO()
+    writer = None
+    pending = 0
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row))
+            writer.writeheader()
+        writer.writerow(row)
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.getvalue():
+        yield buffer.getvalue()
+
+@matching_bp.route('/export', methods=['GET'])
+def export_match_results():
+    """Stream match results as NDJSON (default) or CSV.
+
+    Query params: format=ndjson|csv, scope=best (each candidate's best
+    match, like /results) or pairs (every candidate/job score), job_id and
+    min_score. Rows are streamed from the database cursor, so memory use
+    does not grow with the result set.
+    """
+    try:
+        fmt = request.args.get('format', 'ndjson').lower()
+        if fmt not in ('ndjson', 'csv'):
+            return jsonify({'error': "format must be 'ndjson' or 'csv'"}), 400
+        rows = iter_match_results(
+            job_id=request.args.get('job_id', type=int),
+            min_score=request.args.get('min_score', type=float),
+            scope=request.args.get('scope', 'best')
+        )
+        # Start the query now so a bad request fails before the 200 is sent
+        first = next(rows, None)
+        rows = rows if first is None else itertools.chain([first], rows)
+
+        if fmt == 'csv':
+            response = Response(stream_with_context(_csv_lines(rows)), mimetype='text/csv')
+            response.headers['Content-Disposition'] = 'attachment; filename=match_results.csv'
+        else:
+            response = Response(stream_with_context(_ndjson_lines(rows)), mimetype='application/x-ndjson')
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @matching_bp.route('/shortlist', methods=['POST'])
 def trigger_shortlisting():
     """Trigger candidate shortlisting"""
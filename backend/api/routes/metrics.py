@@ -0,0 +1,15 @@
+from flask import Blueprint, Response
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+import metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('', methods=['GET'])
+def get_metrics():
+    """Counters and histograms for the pipeline stages, LLM calls and API routes (Prometheus text format)"""
+    response = Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
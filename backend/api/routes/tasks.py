@@ -0,0 +1,93 @@
+from flask import Blueprint, request, jsonify
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
+from backend.api.utils.task_queue import (
+    submit_task, get_task, list_tasks, cancel_task, TaskAlreadyActive
+)
+
+tasks_bp = Blueprint('tasks', __name__)
+
+def wants_sync():
+    """True when the caller asked to block until the work is done (?wait=true)."""
+    return request.args.get('wait', '').lower() in ('1', 'true', 'yes')
+
+def ensure_task(kind, fn, *args):
+    """Queue `fn` as a `kind` task unless one is already queued or running.
+
+    Returns (task_id, created).
+    """
+    try:
+        return submit_task(kind, fn, *args, unique_kind=True), True
+    except TaskAlreadyActive as e:
+        return e.task_id, False
+
+def queued_response(kind, fn, *args, message=None, extra=None):
+    """Queue `fn` as a background task and return a 202 pointing at its status.
+
+    If a task of the same kind is already queued or running, that task is
+    returned instead of starting a duplicate.
+    """
+    task_id, created = ensure_task(kind, fn, *args)
+    if not created:
+        message = f'{kind} task already in progress'
+    return task_response(task_id, message or f'{kind} task queued', extra)
+
+def task_response(task_id, message, extra=None):
+    """202 response pointing at a queued task's status URL"""
+    return jsonify({
+        'message': message,
+        'task_id': task_id,
+        'status_url': f'/api/tasks/{task_id}',
+        **(extra or {})
+    }), 202
+
+@tasks_bp.route('/', methods=['GET'])
+def get_tasks():
+    """List recent background tasks"""
+    try:
+        limit = request.args.get('limit', 20, type=int)
+        tasks = list_tasks(limit=max(1, min(limit, 100)))
+        return jsonify({'data': tasks, 'count': len(tasks)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/<task_id>', methods=['GET'])
+def get_task_status(task_id):
+    """Get status, progress and ETA of a background task"""
+    try:
+        task = get_task(task_id)
+        if task is None:
+            return jsonify({'error': 'Task not found'}), 404
+        response = jsonify(task)
+        response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        return response, 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/<task_id>/result', methods=['GET'])
+def get_task_result(task_id):
+    """Get the result of a finished task"""
+    try:
+        task = get_task(task_id)
+        if task is None:
+            return jsonify({'error': 'Task not found'}), 404
+        if task['status'] in ('queued', 'running'):
+            return jsonify({'status': task['status'], 'progress': task['progress']}), 202
+        if task['status'] != 'completed':
+            return jsonify({'status': task['status'], 'error': task['error']}), 409
+        return jsonify({'status': 'completed', 'result': task['result']}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@tasks_bp.route('/<task_id>/cancel', methods=['POST'])
+def cancel_background_task(task_id):
+    """Request cancellation of a queued or running task"""
+    try:
+        task = cancel_task(task_id)
+        if task is None:
+            return jsonify({'error': 'Task not found'}), 404
+        return jsonify(task), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,11 +1,10 @@
 import sqlite3
-from config import DB_PATH
+import db
+from database_setup import SCORE_BUCKET
 
 def get_db_connection():
-    """Get database connection"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get a pooled database connection (rows as sqlite3.Row)"""
+    return db.connect(row_factory=sqlite3.Row)
 
 def get_all_jobs():
     """Fetch all jobs from database"""
@@ -22,11 +21,103 @@ def get_all_candidates():
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM candidates ORDER BY id DESC")
-    candidates = [dict(row) for row in cursor.fetchall()]
+    internal = INTERNAL_COLUMNS['candidates']
+    candidates = [{k: v for k, v in dict(row).items() if k not in internal} for row in cursor.fetchall()]
     conn.close()
     print(f" Database query returned {len(candidates)} candidates")
     return candidates
 
+# Listing pages are bounded so response size doesn't grow with the table
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Whole-document columns left out of the summary view
+HEAVY_COLUMNS = {
+    'candidates': ('cv_text', 'resume_text'),
+    'jobs': ('job_description', 'jd_summary'),
+}
+
+# Bookkeeping columns (binary, not JSON-serializable) never returned by the API
+INTERNAL_COLUMNS = {
+    'candidates': ('minhash',),
+}
+
+def get_table_columns(table):
+    """Column names of `table` the API may return, in schema order"""
+    conn = get_db_connection()
+    columns = [col[1] for col in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    conn.close()
+    internal = INTERNAL_COLUMNS.get(table, ())
+    return [c for c in columns if c not in internal]
+
+def resolve_fields(table, fields=None, view='full'):
+    """Validate a comma-separated field list against the table's columns.
+
+    Without `fields`, view='full' selects every column and view='summary'
+    every column except HEAVY_COLUMNS. `id` is always included since it is
+    the paging cursor. Raises ValueError for unknown fields or views.
+    """
+    if view not in ('full', 'summary'):
+        raise ValueError("view must be 'full' or 'summary'")
+    columns = get_table_columns(table)
+    heavy = HEAVY_COLUMNS.get(table, ())
+
+    if fields:
+        selected = list(dict.fromkeys(f.strip() for f in fields.split(',') if f.strip()))
+        unknown = [f for f in selected if f not in columns]
+        if unknown:
+            raise ValueError(f"Unknown field(s) for {table}: {', '.join(unknown)}. "
+                             f"Available: {', '.join(columns)}")
+        if view == 'summary' and any(f in heavy for f in selected):
+            raise ValueError(f"The summary view never returns {', '.join(heavy)}")
+    elif view == 'summary':
+        selected = [c for c in columns if c not in heavy]
+    else:
+        selected = columns
+
+    if 'id' not in selected:
+        selected.insert(0, 'id')
+    return selected
+
+def list_page(table, fields=None, view='full', after_id=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of `table`, newest first, keyset-paged on id.
+
+    Pass the previous page's `next_after_id` as `after_id` to continue.
+    Returns {'data', 'count', 'limit', 'fields', 'next_after_id'}, where
+    next_after_id is None on the last page.
+    """
+    selected = resolve_fields(table, fields, view)
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+
+    query = f"SELECT {', '.join(selected)} FROM {table}"
+    params = []
+    if after_id is not None:
+        query += " WHERE id < ?"
+        params.append(after_id)
+    query += " ORDER BY id DESC LIMIT ?"
+    # One extra row tells us whether another page exists
+    params.append(limit + 1)
+
+    conn = get_db_connection()
+    rows = [dict(row) for row in conn.execute(query, params).fetchall()]
+    conn.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'data': rows,
+        'count': len(rows),
+        'limit': limit,
+        'fields': selected,
+        'next_after_id': rows[-1]['id'] if has_more else None
+    }
+
+def count_rows(table):
+    conn = get_db_connection()
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return count
+
 def get_matched_candidates():
     """Fetch candidates with match scores"""
     conn = get_db_connection()
@@ -43,6 +134,61 @@ def get_matched_candidates():
     conn.close()
     return matches
 
+# Rows fetched from SQLite per round trip while exporting
+EXPORT_BATCH_SIZE = 1000
+
+def iter_match_results(job_id=None, min_score=None, scope='best', batch_size=EXPORT_BATCH_SIZE):
+    """Yield match results as dicts straight from a SQLite cursor.
+
+    scope='best' gives each candidate's best match (what /results returns),
+    scope='pairs' every stored candidate/job score. job_id and min_score
+    filter in SQL, and the ordering follows an index, so memory stays flat
+    however many rows there are. Raises ValueError for an unknown scope.
+    """
+    if scope == 'best':
+        query = """
+            SELECT c.id, c.name, c.email, c.match_score, c.matched_job_id,
+                   j.job_title as job_title
+            FROM candidates c
+            LEFT JOIN jobs j ON c.matched_job_id = j.id
+            WHERE c.match_score IS NOT NULL
+        """
+        job_column, score_column = 'c.matched_job_id', 'c.match_score'
+        order = " ORDER BY c.match_score DESC"
+    elif scope == 'pairs':
+        query = """
+            SELECT s.candidate_id, c.name, c.email, s.job_id, j.job_title as job_title,
+                   s.score, s.scored_at
+            FROM candidate_job_scores s
+            JOIN candidates c ON c.id = s.candidate_id
+            LEFT JOIN jobs j ON j.id = s.job_id
+            WHERE 1 = 1
+        """
+        job_column, score_column = 's.job_id', 's.score'
+        order = " ORDER BY s.job_id, s.score DESC"
+    else:
+        raise ValueError("scope must be 'best' or 'pairs'")
+
+    params = []
+    if job_id is not None:
+        query += f" AND {job_column} = ?"
+        params.append(job_id)
+    if min_score is not None:
+        query += f" AND {score_column} >= ?"
+        params.append(min_score)
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.execute(query + order, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield dict(row)
+    finally:
+        conn.close()
+
 def get_shortlisted_candidates():
     """Fetch shortlisted candidates"""
     conn = get_db_connection()
@@ -58,8 +204,79 @@ def get_shortlisted_candidates():
     conn.close()
     return shortlist
 
+# Score histogram labels for dashboard_score_histogram buckets 0-9
+HISTOGRAM_LABELS = [f"{b * 10}-{b * 10 + 10}" for b in range(10)]
+
+def get_dashboard_stats_etag():
+    """ETag for the current dashboard stats, or None before the stats migration.
+
+    A single-row read: the triggers bump `version` on every change, and
+    `epoch` changes whenever the stats are recounted.
+    """
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT epoch, version FROM dashboard_stats WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    conn.close()
+    return f"stats-{row['epoch']}-{row['version']}" if row else None
+
 def get_dashboard_stats():
-    """Get statistics for dashboard"""
+    """Get statistics for dashboard from the trigger-maintained stats tables"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute("SELECT * FROM dashboard_stats WHERE id = 1").fetchone()
+        histogram = conn.execute(
+            "SELECT bucket, count FROM dashboard_score_histogram ORDER BY bucket"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        row = None
+    conn.close()
+    if row is None:
+        return _count_dashboard_stats()
+
+    avg_score = row['match_score_sum'] / row['matched_candidates'] if row['matched_candidates'] else 0
+    return {
+        'total_jobs': row['total_jobs'],
+        'total_candidates': row['total_candidates'],
+        'total_shortlisted': row['total_shortlisted'],
+        'avg_match_score': round(avg_score, 2),
+        'summarized_jobs': row['summarized_jobs'],
+        'emails_sent': row['emails_sent'],
+        'matched_candidates': row['matched_candidates'],
+        'score_histogram': [
+            {'range': HISTOGRAM_LABELS[bucket['bucket']], 'count': bucket['count']}
+            for bucket in histogram
+        ]
+    }
+
+def get_job_stats():
+    """Per-job matched, shortlisted and emailed candidate counts"""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute("""
+            SELECT j.id as job_id, j.job_title,
+                   s.matched_candidates, s.shortlisted, s.emails_sent
+            FROM dashboard_job_stats s
+            JOIN jobs j ON j.id = s.job_id
+            ORDER BY j.id
+        """).fetchall()
+    except sqlite3.OperationalError:
+        # Stats migration not applied yet: count directly
+        rows = conn.execute("""
+            SELECT j.id as job_id, j.job_title,
+                (SELECT COUNT(*) FROM candidates c
+                 WHERE c.matched_job_id = j.id AND c.match_score IS NOT NULL) as matched_candidates,
+                (SELECT COUNT(*) FROM shortlisted_candidates sc WHERE sc.job_id = j.id) as shortlisted,
+                0 as emails_sent
+            FROM jobs j
+            ORDER BY j.id
+        """).fetchall()
+    conn.close()
+    return [dict(row) for row in rows]
+
+def _count_dashboard_stats():
+    """Compute dashboard statistics with full-table queries (before the stats migration)"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -89,6 +306,14 @@ def get_dashboard_stats():
     cursor.execute("SELECT COUNT(*) as count FROM shortlisted_candidates WHERE email_sent = 1")
     emails_sent = cursor.fetchone()['count']
     
+    # Matched candidates and score histogram, bucketed like the stats triggers
+    cursor.execute(f"""
+        SELECT {SCORE_BUCKET.format(score="match_score")} as bucket, COUNT(*) as count
+        FROM candidates WHERE match_score IS NOT NULL
+        GROUP BY bucket
+    """)
+    bucket_counts = {row['bucket']: row['count'] for row in cursor.fetchall()}
+    
     conn.close()
     
     return {
@@ -97,5 +322,10 @@ def get_dashboard_stats():
         'total_shortlisted': total_shortlisted,
         'avg_match_score': round(avg_score, 2),
         'summarized_jobs': summarized_jobs,
-        'emails_sent': emails_sent
+        'emails_sent': emails_sent,
+        'matched_candidates': sum(bucket_counts.values()),
+        'score_histogram': [
+            {'range': label, 'count': bucket_counts.get(bucket, 0)}
+            for bucket, label in enumerate(HISTOGRAM_LABELS)
+        ]
     }
\ No newline at end of file
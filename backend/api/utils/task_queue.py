@@ -0,0 +1,216 @@
+"""
+Background task queue for long-running pipeline stages.
+
+Tasks run on a local worker pool and their state lives in the
+`background_tasks` table, so API calls return a task id immediately and
+clients poll for progress, cancel, or fetch the result.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+import event_bus
+from config import TASK_WORKERS
+
+# How often a running task may write progress to the database
+PROGRESS_WRITE_INTERVAL = 0.5
+
+_executor = ThreadPoolExecutor(max_workers=TASK_WORKERS, thread_name_prefix="task")
+_cancel_requested = set()
+# Futures of tasks still queued or running, for wait_task()
+_futures = {}
+_lock = threading.Lock()
+_initialized = False
+
+class TaskCancelled(Exception):
+    """Raised inside a task when a client asked for it to be cancelled."""
+
+class TaskAlreadyActive(Exception):
+    """Raised by submit_task(unique_kind=True) when a task of that kind is queued or running."""
+
+    def __init__(self, task_id):
+        super().__init__(f"task {task_id} is already active")
+        self.task_id = task_id
+
+def _connect():
+    return db.connect(row_factory=sqlite3.Row)
+
+def init_task_table():
+    """Create the task table and fail any tasks left over from a previous process."""
+    global _initialized
+    with _lock:
+        if _initialized:
+            return
+        conn = _connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS background_tasks (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                done INTEGER DEFAULT 0,
+                total INTEGER DEFAULT 0,
+                message TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        conn.execute("""
+            UPDATE background_tasks
+            SET status = 'failed', error = 'Interrupted by server restart', finished_at = ?
+            WHERE status IN ('queued', 'running')
+        """, (time.time(),))
+        conn.commit()
+        conn.close()
+        _initialized = True
+
+def _update(task_id, **fields):
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    conn = _connect()
+    try:
+        conn.execute(f"UPDATE background_tasks SET {columns} WHERE id = ?", (*fields.values(), task_id))
+        conn.commit()
+    finally:
+        conn.close()
+    event_bus.publish("task", id=task_id, **{k: v for k, v in fields.items() if k != "result"})
+
+def _make_progress(task_id):
+    """Build the progress(done, total, message) callback handed to a task."""
+    last_write = [0.0]
+
+    def progress(done, total, message=None):
+        if task_id in _cancel_requested:
+            raise TaskCancelled()
+        now = time.time()
+        if now - last_write[0] >= PROGRESS_WRITE_INTERVAL or done >= total:
+            last_write[0] = now
+            fields = {"done": done, "total": total}
+            if message is not None:
+                fields["message"] = message
+            _update(task_id, **fields)
+
+    return progress
+
+def _run(task_id, fn, args, kwargs):
+    if task_id in _cancel_requested:
+        _update(task_id, status="cancelled", finished_at=time.time())
+        return
+
+    _update(task_id, status="running", started_at=time.time())
+    print(f"⚙️  Task {task_id} started")
+    try:
+        result = fn(*args, progress=_make_progress(task_id), **kwargs)
+        _update(task_id, status="completed", result=json.dumps(result), finished_at=time.time())
+        print(f"✅ Task {task_id} completed")
+    except TaskCancelled:
+        _update(task_id, status="cancelled", finished_at=time.time())
+        print(f"🛑 Task {task_id} cancelled")
+    except Exception as e:
+        traceback.print_exc()
+        _update(task_id, status="failed", error=str(e), finished_at=time.time())
+        print(f"❌ Task {task_id} failed: {e}")
+    finally:
+        _cancel_requested.discard(task_id)
+
+def submit_task(kind, fn, *args, unique_kind=False, **kwargs):
+    """Queue `fn(*args, progress=..., **kwargs)` and return the new task id.
+
+    `fn` must accept a `progress(done, total, message=None)` keyword argument
+    and should return something JSON-serializable. With `unique_kind`, raises
+    TaskAlreadyActive instead if a task of this kind is queued or running;
+    the check and the insert happen under one lock, so concurrent requests
+    can't both start one.
+    """
+    init_task_table()
+    task_id = uuid.uuid4().hex
+    with _lock:
+        conn = _connect()
+        try:
+            if unique_kind:
+                active = conn.execute("""
+                    SELECT id FROM background_tasks
+                    WHERE kind = ? AND status IN ('queued', 'running')
+                    ORDER BY created_at LIMIT 1
+                """, (kind,)).fetchone()
+                if active:
+                    raise TaskAlreadyActive(active['id'])
+            conn.execute(
+                "INSERT INTO background_tasks (id, kind, status, created_at) VALUES (?, ?, 'queued', ?)",
+                (task_id, kind, time.time())
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    future = _executor.submit(_run, task_id, fn, args, kwargs)
+    _futures[task_id] = future
+    future.add_done_callback(lambda _: _futures.pop(task_id, None))
+    print(f"📥 Queued {kind} task {task_id}")
+    return task_id
+
+def _serialize(row):
+    task = dict(row)
+    task["result"] = json.loads(task["result"]) if task["result"] else None
+
+    eta = None
+    if task["status"] == "running" and task["started_at"] and task["done"] and task["total"]:
+        elapsed = time.time() - task["started_at"]
+        eta = round(elapsed / task["done"] * (task["total"] - task["done"]), 1)
+    task["eta_seconds"] = eta
+    task["progress"] = round(task["done"] / task["total"] * 100, 1) if task["total"] else 0.0
+    return task
+
+def get_task(task_id):
+    """Return a task as a dict (with progress % and ETA), or None."""
+    init_task_table()
+    conn = _connect()
+    row = conn.execute("SELECT * FROM background_tasks WHERE id = ?", (task_id,)).fetchone()
+    conn.close()
+    return _serialize(row) if row else None
+
+def list_tasks(limit=20):
+    """Most recent tasks first."""
+    init_task_table()
+    conn = _connect()
+    rows = conn.execute(
+        "SELECT * FROM background_tasks ORDER BY created_at DESC LIMIT ?", (limit,)
+    ).fetchall()
+    conn.close()
+    return [_serialize(row) for row in rows]
+
+def wait_task(task_id, timeout=None):
+    """Block until a task submitted by this process finishes, then return it (see get_task)."""
+    future = _futures.get(task_id)
+    if future is not None:
+        future.result(timeout=timeout)
+    return get_task(task_id)
+
+def find_active_task(kind):
+    """Return the queued or running task of this kind, if any."""
+    init_task_table()
+    conn = _connect()
+    row = conn.execute("""
+        SELECT * FROM background_tasks
+        WHERE kind = ? AND status IN ('queued', 'running')
+        ORDER BY created_at LIMIT 1
+    """, (kind,)).fetchone()
+    conn.close()
+    return _serialize(row) if row else None
+
+def cancel_task(task_id):
+    """Ask a queued or running task to stop. Returns the task, or None if unknown."""
+    task = get_task(task_id)
+    if task is None:
+        return None
+    if task["status"] in ("queued", "running"):
+        _cancel_requested.add(task_id)
+        if task["status"] == "queued":
+            _update(task_id, status="cancelled", finished_at=time.time())
+    return get_task(task_id)
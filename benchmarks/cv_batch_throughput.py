@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+CV extraction throughput (CVs/minute) for different batch sizes.
+
+Against the stub LLM (default; simulates a fixed per-request overhead plus
+a per-generated-token decode cost):
+
+    python benchmarks/cv_batch_throughput.py --cvs 24 --latency 0.5 --token-latency 0.01
+
+Against a real local model:
+
+    python benchmarks/cv_batch_throughput.py --host http://localhost:11434 --cvs 16
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def load_cvs(folder, limit):
+    from process_cvs import extract_cv_file
+
+    files = sorted(f for f in os.listdir(folder) if f.lower().endswith((".pdf", ".docx")))
+    cvs = []
+    for filename in files:
+        result = extract_cv_file(os.path.join(folder, filename))
+        if result["text"].strip():
+            cvs.append((str(len(cvs) + 1), result["text"]))
+        if len(cvs) >= limit:
+            break
+    return cvs
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched CV extraction")
+    parser.add_argument("--folder", default="data/CVs1", help="Folder of PDF/DOCX CVs")
+    parser.add_argument("--cvs", type=int, default=24, help="Number of CVs to extract per run")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--token-budget", type=int, default=None, help="Override CV_BATCH_TOKEN_BUDGET")
+    parser.add_argument("--host", help="Ollama host to benchmark; omit to use the stub")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub: seconds of overhead per request")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Stub: seconds per generated token")
+    parser.add_argument("--parallel", type=int, default=1, help="Stub: requests served at once")
+    args = parser.parse_args()
+
+    state = None
+    if args.host:
+        os.environ["OLLAMA_HOST"] = args.host
+    else:
+        from stub_ollama import start_stub_server
+        _, url, state = start_stub_server(latency=args.latency, parallel=args.parallel,
+                                          token_latency=args.token_latency)
+        os.environ["OLLAMA_HOST"] = url
+
+    # Imported after OLLAMA_HOST is set so the shared client picks it up
+    from config import CV_BATCH_TOKEN_BUDGET, OLLAMA_MODEL
+    from match_candidates import extract_cv_profiles_batched
+
+    cvs = load_cvs(args.folder, args.cvs)
+    if not cvs:
+        print(f"No readable CVs found in {args.folder}")
+        return
+
+    target = args.host or "stub"
+    print(f"📊 Extracting {len(cvs)} CVs with {OLLAMA_MODEL} via {target}")
+    print(f"{'batch':>5} {'seconds':>8} {'CVs/min':>8} {'LLM calls':>9} {'fallbacks':>9} {'speedup':>8}")
+
+    baseline = None
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            results, stats = extract_cv_profiles_batched(
+                cvs, batch_size=batch_size, token_budget=args.token_budget or CV_BATCH_TOKEN_BUDGET
+            )
+        elapsed = time.perf_counter() - start
+        per_minute = len(cvs) / elapsed * 60
+        baseline = baseline or per_minute
+        calls = stats["batch_calls"] + stats["single_calls"]
+        print(f"{batch_size:>5} {elapsed:>8.2f} {per_minute:>8.1f} {calls:>9} {stats['fallbacks']:>9} "
+              f"{per_minute / baseline:>7.2f}x")
+
+    if state is not None:
+        print(f"Stub calls: {state.calls}")
+
+if __name__ == "__main__":
+    main()
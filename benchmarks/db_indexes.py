@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Query latency before and after the index migrations on a synthetic database.
+
+Builds a throwaway SQLite database (100k candidates by default), times the
+hot queries from database_setup.QUERY_PLAN_CHECKS without indexes, applies
+the migrations, times them again and checks the query plans:
+
+    python benchmarks/db_indexes.py --candidates 100000 --jobs 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def build_database(path, n_candidates, n_jobs, pairs_per_candidate, shortlist_ratio, seed=7):
+    import db
+
+    rng = random.Random(seed)
+    conn = db.connect(path)
+    conn.executescript("""
+        CREATE TABLE jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_title TEXT NOT NULL,
+            job_description TEXT NOT NULL,
+            jd_summary TEXT DEFAULT NULL
+        );
+        CREATE TABLE candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT,
+            cv_text TEXT,
+            match_score REAL,
+            matched_job_id INTEGER
+        );
+        CREATE TABLE shortlisted_candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER,
+            name TEXT,
+            email TEXT,
+            job_id INTEGER,
+            match_score REAL,
+            email_sent INTEGER DEFAULT 0,
+            UNIQUE(candidate_id, job_id)
+        );
+        CREATE TABLE candidate_job_scores (
+            candidate_id INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            cv_hash TEXT NOT NULL,
+            jd_hash TEXT NOT NULL,
+            scorer TEXT NOT NULL,
+            score REAL NOT NULL,
+            breakdown TEXT,
+            scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (candidate_id, job_id)
+        );
+    """)
+    conn.executemany(
+        "INSERT INTO jobs (job_title, job_description, jd_summary) VALUES (?, ?, ?)",
+        [(f"Job {j}", "Description " * 50, "Summary " * 50) for j in range(n_jobs)]
+    )
+    # CV text makes candidate rows realistically wide, which is what full scans pay for
+    cv_text = "Experienced engineer. " * 150
+    candidates = []
+    pairs = []
+    shortlist = []
+    for c in range(1, n_candidates + 1):
+        scored = rng.random() < 0.9
+        job_ids = rng.sample(range(1, n_jobs + 1), min(pairs_per_candidate, n_jobs))
+        scores = [round(rng.uniform(0, 100), 1) for _ in job_ids]
+        best = max(range(len(job_ids)), key=scores.__getitem__)
+        candidates.append((f"Candidate {c}", f"c{c}@example.com", cv_text,
+                           scores[best] if scored else None, job_ids[best] if scored else None))
+        pairs.extend((c, job_id, "cv", "jd", "v4", score) for job_id, score in zip(job_ids, scores))
+        if scored and rng.random() < shortlist_ratio:
+            shortlist.append((c, f"Candidate {c}", f"c{c}@example.com", job_ids[best], scores[best],
+                              int(rng.random() < 0.8)))
+    conn.executemany(
+        "INSERT INTO candidates (name, email, cv_text, match_score, matched_job_id) VALUES (?, ?, ?, ?, ?)",
+        candidates
+    )
+    conn.executemany(
+        "INSERT INTO candidate_job_scores (candidate_id, job_id, cv_hash, jd_hash, scorer, score) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        pairs
+    )
+    conn.executemany(
+        "INSERT INTO shortlisted_candidates (candidate_id, name, email, job_id, match_score, email_sent) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        shortlist
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+    return conn
+
+def time_queries(conn, checks, repeats):
+    timings = {}
+    for name, sql, params, _ in checks:
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            samples.append(time.perf_counter() - start)
+        timings[name] = statistics.median(samples)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the database index migrations")
+    parser.add_argument("--candidates", type=int, default=100_000)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--pairs-per-candidate", type=int, default=5,
+                        help="Stored candidate/job scores per candidate (as with MATCH_TOP_K)")
+    parser.add_argument("--shortlist-ratio", type=float, default=0.2)
+    parser.add_argument("--repeats", type=int, default=5, help="Runs per query; the median is reported")
+    args = parser.parse_args()
+
+    from database_setup import QUERY_PLAN_CHECKS, apply_migrations, check_query_plans
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"🏗️  Building {args.candidates} candidates, {args.jobs} jobs, "
+              f"{args.candidates * args.pairs_per_candidate} pair scores...")
+        start = time.perf_counter()
+        conn = build_database(path, args.candidates, args.jobs, args.pairs_per_candidate,
+                              args.shortlist_ratio)
+        print(f"   built in {time.perf_counter() - start:.1f}s")
+
+        before = time_queries(conn, QUERY_PLAN_CHECKS, args.repeats)
+        start = time.perf_counter()
+        apply_migrations(conn, verbose=False)
+        conn.execute("ANALYZE")
+        conn.commit()
+        print(f"🔧 Migrations applied in {time.perf_counter() - start:.1f}s")
+        after = time_queries(conn, QUERY_PLAN_CHECKS, args.repeats)
+
+        print(f"\n{'query':<30} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+        for name, _, _, _ in QUERY_PLAN_CHECKS:
+            print(f"{name:<30} {before[name] * 1000:>10.1f} {after[name] * 1000:>10.1f} "
+                  f"{before[name] / after[name]:>7.1f}x")
+
+        print("\n🔍 Query plans:")
+        regressions = check_query_plans(conn)
+        conn.really_close()
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
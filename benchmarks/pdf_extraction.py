@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+PDF text extraction throughput by backend and budget.
+
+Extracts every PDF in a CV folder with PyPDF2 (what the JD upload route
+used), PyMuPDF with per-page string concatenation (what CV ingestion used)
+and text_extraction with and without page/character budgets. A second pass
+runs the same variants on synthetic long portfolios (each CV's pages
+repeated up to --portfolio-pages) to show what the budgets save. PyPDF2
+is no longer a dependency; `pip install pypdf2` to include it:
+
+    python benchmarks/pdf_extraction.py --folder data/CVs1 --repeats 3
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def pypdf2_concat(data):
+    import io
+    import PyPDF2
+
+    text = ""
+    for page in PyPDF2.PdfReader(io.BytesIO(data)).pages:
+        page_text = page.extract_text()
+        if page_text:
+            text += page_text + "\n"
+    return text.strip()
+
+def pymupdf_concat(data):
+    from text_extraction import pymupdf
+
+    text = ""
+    with pymupdf.open(stream=data, filetype="pdf") as doc:
+        for page in doc:
+            text += page.get_text("text") + "\n"
+    return text.strip()
+
+def build_variants(max_pages, max_chars):
+    from text_extraction import extract_pdf_text
+
+    variants = []
+    try:
+        import PyPDF2  # noqa: F401
+        variants.append(("PyPDF2, concat", pypdf2_concat))
+    except ImportError:
+        print("⚠️  PyPDF2 not installed; skipping it")
+    variants += [
+        ("PyMuPDF, concat", pymupdf_concat),
+        ("text_extraction", lambda data: extract_pdf_text(data)),
+        (f"budget {max_pages}p/{max_chars}c",
+         lambda data: extract_pdf_text(data, max_pages=max_pages, max_chars=max_chars)),
+        ("budget 3000c (embedding)", lambda data: extract_pdf_text(data, max_chars=3000)),
+    ]
+    return variants
+
+def make_portfolio(data, pages):
+    """The CV's pages repeated until the document has `pages` pages, as PDF bytes."""
+    from text_extraction import pymupdf
+
+    with pymupdf.open(stream=data, filetype="pdf") as src, pymupdf.open() as out:
+        while out.page_count < pages:
+            out.insert_pdf(src, to_page=min(src.page_count, pages - out.page_count) - 1)
+        return out.tobytes()
+
+def run(variants, documents, repeats):
+    results = []
+    for name, extract in variants:
+        per_file, chars = [], 0
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for data in documents:
+                t0 = time.perf_counter()
+                chars += len(extract(data))
+                per_file.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+        results.append({
+            "variant": name,
+            "files_per_s": len(per_file) / elapsed,
+            "p50_ms": statistics.median(per_file) * 1000,
+            "p95_ms": statistics.quantiles(per_file, n=20)[18] * 1000 if len(per_file) > 1 else per_file[0] * 1000,
+            "avg_chars": chars / len(per_file),
+        })
+    return results
+
+def report(title, results):
+    print(f"\n{title}")
+    print(f"{'variant':<28} {'files/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'chars':>8}")
+    baseline = results[0]["files_per_s"]
+    for r in results:
+        print(f"{r['variant']:<28} {r['files_per_s']:>9.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['avg_chars']:>8.0f}  ({r['files_per_s'] / baseline:.1f}x)")
+
+def main():
+    from config import CV_MAX_PAGES, CV_MAX_CHARS
+
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction backends")
+    parser.add_argument("--folder", default="data/CVs1")
+    parser.add_argument("--limit", type=int, default=0, help="Use only the first N PDFs (0 = all)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--max-pages", type=int, default=CV_MAX_PAGES)
+    parser.add_argument("--max-chars", type=int, default=CV_MAX_CHARS)
+    parser.add_argument("--portfolio-pages", type=int, default=30,
+                        help="Length of the synthetic portfolios (0 skips that pass)")
+    parser.add_argument("--portfolios", type=int, default=20, help="How many CVs to turn into portfolios")
+    args = parser.parse_args()
+
+    files = sorted(f for f in os.listdir(args.folder) if f.lower().endswith(".pdf"))
+    if args.limit:
+        files = files[:args.limit]
+    if not files:
+        sys.exit(f"No PDFs in {args.folder}")
+    # Read everything up front so disk I/O is not part of the comparison
+    documents = []
+    for filename in files:
+        with open(os.path.join(args.folder, filename), "rb") as f:
+            documents.append(f.read())
+
+    variants = build_variants(args.max_pages, args.max_chars)
+    print(f"📄 {len(documents)} PDFs from {args.folder}, {args.repeats} repeat(s)")
+    report("⏱️  CVs as uploaded", run(variants, documents, args.repeats))
+
+    if args.portfolio_pages:
+        portfolios = [make_portfolio(data, args.portfolio_pages) for data in documents[:args.portfolios]]
+        report(f"📚 {len(portfolios)} portfolios of {args.portfolio_pages} pages",
+               run(variants, portfolios, args.repeats))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Throughput of each pipeline stage against the stub Ollama and SMTP servers.
+
+Runs the stages in pipeline order on a throwaway database (DB_PATH points
+at a temporary file), fully offline:
+
+    process_cvs_from_folder -> process_job_descriptions -> process_candidate_matching
+    -> shortlist_candidates -> schedule_interviews
+
+For each stage it reports items/sec, p50/p99 time per item, peak RSS of
+this process while the stage ran (CV extraction workers not included) and
+the LLM calls it made. Time per item is the gap between successive item
+completions, taken from the stage's event_bus events; matching profiles
+everything before it writes scores, so its first gap includes that phase.
+
+--scale copies the CV corpus N times and --jobs cycles the JD CSV rows into
+N jobs; copies are made distinct so the caches do not collapse them. The
+LLM response cache is off unless --llm-cache is given, so the numbers
+measure model calls.
+
+    python benchmarks/pipeline_stages.py --scale 2 --jobs 10 --latency 0.2
+    python benchmarks/pipeline_stages.py --json results/$(git rev-parse --short HEAD).json
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, ROOT)
+
+# (stage, event published once per finished item, or None)
+STAGES = [
+    ("process_cvs", "candidate_processed"),
+    ("summarize_jobs", "job_summarized"),
+    ("matching", "score_written"),
+    ("shortlist", None),
+    ("schedule_interviews", "email_sent"),
+]
+
+def create_schema(path):
+    import db
+
+    conn = db.connect(path)
+    conn.executescript("""
+        CREATE TABLE jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_title TEXT NOT NULL,
+            job_description TEXT NOT NULL,
+            jd_summary TEXT DEFAULT NULL
+        );
+        CREATE TABLE candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT,
+            cv_text TEXT,
+            match_score REAL,
+            matched_job_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE shortlisted_candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER,
+            name TEXT,
+            email TEXT,
+            job_id INTEGER,
+            match_score REAL,
+            email_sent INTEGER DEFAULT 0,
+            UNIQUE(candidate_id, job_id)
+        );
+    """)
+    conn.commit()
+    conn.close()
+
+def copy_corpus(folder, target, scale, limit=None):
+    """Copy the CVs in `folder` into `target` `scale` times; returns the file count."""
+    files = sorted(f for f in os.listdir(folder) if f.lower().endswith((".pdf", ".docx")))[:limit]
+    for copy in range(scale):
+        for filename in files:
+            stem, ext = os.path.splitext(filename)
+            name = filename if scale == 1 else f"{stem}_copy{copy}{ext}"
+            shutil.copyfile(os.path.join(folder, filename), os.path.join(target, name))
+    return len(files) * scale
+
+def write_jobs_csv(source, target, n_jobs):
+    """Cycle the rows of the JD CSV into `n_jobs` distinct jobs."""
+    with open(source, encoding="latin1", newline="") as f:
+        rows = [row for row in csv.DictReader(f) if row.get("Job Title") and row.get("Job Description")]
+    with open(target, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Job Title", "Job Description"])
+        for i in range(n_jobs):
+            row = rows[i % len(rows)]
+            copy = i // len(rows)
+            title = row["Job Title"] if copy == 0 else f"{row['Job Title']} ({copy + 1})"
+            description = row["Job Description"] if copy == 0 else f"{row['Job Description']}\nTeam {copy + 1}."
+            writer.writerow([title, description])
+
+def make_cvs_distinct():
+    """Tag each CV with its candidate id so copies of one file are distinct CVs."""
+    import db
+
+    conn = db.connect()
+    conn.execute("UPDATE candidates SET cv_text = cv_text || char(10) || 'Candidate reference: ' || id")
+    conn.commit()
+    conn.close()
+
+class PeakRSS:
+    """Samples this process's resident set size in the background; peak_mb is the maximum seen."""
+
+    def __init__(self, interval=0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            # No procfs: fall back to the lifetime peak (KB on Linux)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+    @property
+    def peak_mb(self):
+        return round(self.peak / (1024 * 1024), 1)
+
+class EventCollector:
+    """Records the time of every event_bus event of one type while the stage runs."""
+
+    def __init__(self, event_type):
+        import event_bus
+
+        self.event_bus = event_bus
+        self.event_type = event_type
+        self.times = []
+        self.missed = False
+        self._after = event_bus.last_event_id()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _drain(self, timeout):
+        events, missed = self.event_bus.wait_for_events(self._after, timeout)
+        self.missed = self.missed or missed
+        for event in events:
+            self._after = event["id"]
+            if event["type"] == self.event_type:
+                self.times.append(event["time"])
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._drain(0.1)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._drain(0)
+
+def percentile(values, pct):
+    """Nearest-rank percentile of `values` (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def run_stage(name, event_type, fn, llm_state, count_items=None):
+    calls_before = dict(llm_state.calls)
+    collector = EventCollector(event_type) if event_type else contextlib.nullcontext()
+    with PeakRSS() as rss, collector:
+        start = time.time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        elapsed = time.time() - start
+
+    gaps = []
+    if event_type:
+        times = collector.times
+        gaps = [b - a for a, b in zip([start] + times, times)]
+        items = len(times)
+    else:
+        items = count_items()
+    result = {
+        "items": items,
+        "seconds": round(elapsed, 3),
+        "items_per_sec": round(items / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(gaps, 50) * 1000, 2) if gaps else None,
+        "p99_ms": round(percentile(gaps, 99) * 1000, 2) if gaps else None,
+        "peak_rss_mb": rss.peak_mb,
+        "llm_calls": {kind: llm_state.calls[kind] - calls_before[kind] for kind in ("chat", "embeddings")},
+    }
+    if event_type and collector.missed:
+        result["note"] = "event buffer overflowed; item timings incomplete"
+    return result
+
+def git_label():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage against stub servers")
+    parser.add_argument("--folder", default=os.path.join(ROOT, "data", "CVs1"), help="Folder of PDF/DOCX CVs")
+    parser.add_argument("--cv-limit", type=int, default=None, help="Use only the first N CVs of the folder")
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the CV corpus to ingest")
+    parser.add_argument("--jobs-csv", default=os.path.join(ROOT, "data", "job_description.csv"))
+    parser.add_argument("--jobs", type=int, default=10, help="Jobs to load, cycling the CSV rows")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub LLM: seconds per request")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Stub LLM: seconds per generated token")
+    parser.add_argument("--parallel", type=int, default=0, help="Stub LLM: requests served at once (0 = unlimited)")
+    parser.add_argument("--smtp-latency", type=float, default=0.0, help="Stub SMTP: seconds per message")
+    parser.add_argument("--threshold", type=float, default=50, help="Shortlisting threshold")
+    parser.add_argument("--llm-cache", action="store_true", help="Leave the LLM response cache on")
+    parser.add_argument("--label", default=None, help="Label for the results (default: git commit)")
+    parser.add_argument("--json", dest="json_path", help="Write the results as JSON to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    db_path = os.path.join(tmp.name, "bench.db")
+    cv_folder = os.path.join(tmp.name, "cvs")
+    os.makedirs(cv_folder)
+    # Set before the pipeline modules import config
+    os.environ["DB_PATH"] = db_path
+    os.environ["LLM_CACHE_ENABLED"] = "true" if args.llm_cache else "false"
+    os.environ["EVENT_BUFFER_SIZE"] = "100000"
+    os.environ["MOCK_EMAIL_MODE"] = "false"
+
+    from stub_ollama import start_stub_server
+    from stub_smtp import start_stub_server as start_smtp_stub
+
+    llm_server, url, llm_state = start_stub_server(latency=args.latency, parallel=args.parallel,
+                                                   token_latency=args.token_latency)
+    os.environ["OLLAMA_HOST"] = url
+    smtp_server, smtp_address, smtp_state = start_smtp_stub(message_latency=args.smtp_latency)
+    logging.disable(logging.WARNING)
+
+    import db
+    import load_jobs
+    from interview_scheduler import schedule_interviews
+    from jd_summarizer import process_job_descriptions
+    from mailer import Mailer, SMTPConnectionPool
+    from match_candidates import process_candidate_matching
+    from process_cvs import process_cvs_from_folder
+    from shortlist_candidates import shortlist_candidates
+
+    create_schema(db_path)
+    n_files = copy_corpus(args.folder, cv_folder, args.scale, args.cv_limit)
+    load_jobs.CSV_FILE_PATH = os.path.join(tmp.name, "jobs.csv")
+    write_jobs_csv(args.jobs_csv, load_jobs.CSV_FILE_PATH, args.jobs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_jobs.load_job_descriptions()
+
+    def ingest():
+        process_cvs_from_folder(cv_folder)
+        if args.scale > 1:
+            make_cvs_distinct()
+
+    def shortlisted():
+        conn = db.connect()
+        count = conn.execute("SELECT COUNT(*) FROM shortlisted_candidates").fetchone()[0]
+        conn.close()
+        return count
+
+    def interviews():
+        pool = SMTPConnectionPool(host=smtp_address[0], port=smtp_address[1], user="bench", password="bench",
+                                  use_tls=False)
+        mailer = Mailer(pool=pool, rate_per_minute=0)
+        try:
+            schedule_interviews(mailer=mailer)
+        finally:
+            mailer.close()
+
+    runners = {
+        "process_cvs": ingest,
+        "summarize_jobs": process_job_descriptions,
+        "matching": process_candidate_matching,
+        "shortlist": lambda: shortlist_candidates(threshold=args.threshold),
+        "schedule_interviews": interviews,
+    }
+
+    print(f"📊 {n_files} CV files ({args.scale}x {args.folder}), {args.jobs} jobs; "
+          f"stub LLM latency {args.latency}s, LLM cache {'on' if args.llm_cache else 'off'}\n")
+    print(f"{'stage':<20} {'items':>6} {'seconds':>8} {'items/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'RSS MB':>7} {'chat':>5} {'embed':>5}")
+    results = {}
+    for name, event_type in STAGES:
+        stage = run_stage(name, event_type, runners[name], llm_state, count_items=shortlisted)
+        results[name] = stage
+        fmt = lambda value: "-" if value is None else f"{value:.1f}"
+        print(f"{name:<20} {stage['items']:>6} {stage['seconds']:>8.2f} {fmt(stage['items_per_sec']):>8} "
+              f"{fmt(stage['p50_ms']):>8} {fmt(stage['p99_ms']):>8} {stage['peak_rss_mb']:>7.1f} "
+              f"{stage['llm_calls']['chat']:>5} {stage['llm_calls']['embeddings']:>5}")
+
+    report = {
+        "label": args.label or git_label(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "cv_files": n_files,
+            "scale": args.scale,
+            "jobs": args.jobs,
+            "llm_latency": args.latency,
+            "llm_token_latency": args.token_latency,
+            "llm_parallel": args.parallel,
+            "smtp_latency": args.smtp_latency,
+            "llm_cache": args.llm_cache,
+        },
+        "stages": results,
+    }
+    if args.json_path == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json_path:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json_path)), exist_ok=True)
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Results written to {args.json_path}")
+
+    llm_server.shutdown()
+    smtp_server.shutdown()
+    db.close_thread_connections()
+    tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
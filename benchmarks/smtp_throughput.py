@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Interview invitation throughput (messages/second) against the stub SMTP server.
+
+Runs schedule_interviews() on a throwaway database of shortlisted candidates
+three ways: a new SMTP session per message sent one at a time (the old
+behaviour), one pooled session sent serially, and the pooled concurrent
+mailer. The stub simulates session setup (TCP + TLS + login) and
+per-message latency; a last run adds temporary and permanent failures and
+re-runs to show that delivery resumes without re-sending:
+
+    python benchmarks/smtp_throughput.py --invitations 1000 --workers 8
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def build_database(path, n_invitations, n_jobs=20):
+    import db
+
+    conn = db.connect(path)
+    conn.executescript("""
+        CREATE TABLE jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_title TEXT NOT NULL,
+            job_description TEXT NOT NULL,
+            jd_summary TEXT DEFAULT NULL
+        );
+        CREATE TABLE shortlisted_candidates (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            candidate_id INTEGER,
+            name TEXT,
+            email TEXT,
+            job_id INTEGER,
+            match_score REAL,
+            email_sent INTEGER DEFAULT 0,
+            UNIQUE(candidate_id, job_id)
+        );
+    """)
+    conn.executemany(
+        "INSERT INTO jobs (job_title, job_description) VALUES (?, ?)",
+        [(f"Job {j}", "Description") for j in range(n_jobs)]
+    )
+    conn.executemany(
+        "INSERT INTO shortlisted_candidates (candidate_id, name, email, job_id, match_score) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [(c, f"Candidate {c}", f"c{c}@example.com", c % n_jobs + 1, 80.0)
+         for c in range(1, n_invitations + 1)]
+    )
+    conn.commit()
+    conn.close()
+
+def reset(path, limit=None):
+    """Mark invitations unsent again; with `limit`, leave only the first `limit` pending."""
+    import db
+
+    conn = db.connect(path)
+    conn.execute("UPDATE shortlisted_candidates SET email_sent = 0")
+    columns = {col[1] for col in conn.execute("PRAGMA table_info(shortlisted_candidates)")}
+    if "email_status" in columns:
+        conn.execute("UPDATE shortlisted_candidates SET email_status = NULL, email_attempts = 0, "
+                     "email_error = NULL, email_sent_at = NULL")
+    if limit is not None:
+        conn.execute("UPDATE shortlisted_candidates SET email_sent = 1 WHERE id > ?", (limit,))
+    conn.commit()
+    conn.close()
+
+def status_counts(path):
+    import db
+
+    conn = db.connect(path)
+    rows = conn.execute("""
+        SELECT COALESCE(email_status, 'pending'), COUNT(*), SUM(email_attempts)
+        FROM shortlisted_candidates GROUP BY 1
+    """).fetchall()
+    conn.close()
+    return {status: (count, attempts) for status, count, attempts in rows}
+
+def run(label, path, address, state, workers, per_connection, n_messages, max_retries=3):
+    from interview_scheduler import schedule_interviews
+    from mailer import Mailer, SMTPConnectionPool
+
+    pool = SMTPConnectionPool(host=address[0], port=address[1], user="bench", password="bench",
+                              size=workers, use_tls=False, max_messages_per_connection=per_connection)
+    mailer = Mailer(pool=pool, workers=workers, rate_per_minute=0, max_retries=max_retries,
+                    retry_backoff=0.05)
+    delivered_before, sessions_before = len(state.messages), state.sessions
+    start = time.perf_counter()
+    schedule_interviews(mailer=mailer)
+    elapsed = time.perf_counter() - start
+    mailer.close()
+    delivered = len(state.messages) - delivered_before
+    print(f"{label:<34} {n_messages:>6} {delivered:>9} {state.sessions - sessions_before:>9} "
+          f"{elapsed:>8.2f} {delivered / elapsed:>9.1f}")
+    return delivered / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interview invitation sending")
+    parser.add_argument("--invitations", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent SMTP sessions for the pooled run")
+    parser.add_argument("--connect-latency", type=float, default=0.15,
+                        help="Seconds the stub takes to set up a session (TCP + TLS + login)")
+    parser.add_argument("--message-latency", type=float, default=0.01, help="Seconds per message")
+    parser.add_argument("--legacy-sample", type=int, default=100,
+                        help="Messages for the session-per-message run (it is slow)")
+    parser.add_argument("--temp-fail-rate", type=float, default=0.2,
+                        help="Fraction of messages answered 451 in the failure run (one retry each)")
+    parser.add_argument("--perm-fail-rate", type=float, default=0.01,
+                        help="Fraction of messages answered 550 in the failure run")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    path = os.path.join(tmp.name, "bench.db")
+    os.environ["DB_PATH"] = path
+    logging.disable(logging.CRITICAL)
+
+    from stub_smtp import start_stub_server
+
+    build_database(path, args.invitations)
+    server, address, state = start_stub_server(connect_latency=args.connect_latency,
+                                               message_latency=args.message_latency)
+    print(f"📨 {args.invitations} invitations; stub session setup {args.connect_latency}s, "
+          f"{args.message_latency}s per message\n")
+    print(f"{'mode':<34} {'queued':>6} {'delivered':>9} {'sessions':>9} {'seconds':>8} {'msgs/sec':>9}")
+
+    reset(path, limit=args.legacy_sample)
+    legacy = run("session per message, serial", path, address, state, 1, 1, args.legacy_sample)
+    reset(path)
+    serial = run("pooled session, serial", path, address, state, 1, 100, args.invitations)
+    reset(path)
+    pooled = run(f"pooled, {args.workers} concurrent sessions", path, address, state, args.workers, 100,
+                 args.invitations)
+    print(f"\n   pooled serial {serial / legacy:.1f}x, pooled concurrent {pooled / legacy:.1f}x "
+          f"the session-per-message rate")
+
+    print(f"\n⚠️  With {args.temp_fail_rate:.0%} temporary and {args.perm_fail_rate:.0%} permanent failures:")
+    reset(path)
+    state.temp_fail_rate, state.perm_fail_rate = args.temp_fail_rate, args.perm_fail_rate
+    run("first run, 1 retry", path, address, state, args.workers, 100, args.invitations, max_retries=1)
+    print(f"   status: {status_counts(path)}")
+    state.temp_fail_rate = state.perm_fail_rate = 0.0
+    pending = status_counts(path).get("retry", (0, 0))[0]
+    run("re-run (resumes)", path, address, state, args.workers, 100, pending)
+    print(f"   status: {status_counts(path)}")
+    print(f"   stub received {len(state.messages)} messages in total, peak {state.peak_sessions} sessions")
+
+    server.shutdown()
+    tmp.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -11,3 +11,88 @@ SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 SMTP_SERVER = os.getenv("SMTP_SERVER")
 SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 DB_PATH = os.getenv("DB_PATH", "recruitment.db")
+
+# Embedding cache (in-memory LRU tier size; the SQLite tier is unbounded)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 2048))
+
+# Skill matching: "local" (taxonomy + token matching) or "llm_rerank"
+# (local for every pair, then the LLM rescores each candidate's top-K jobs)
+SKILL_MATCH_MODE = os.getenv("SKILL_MATCH_MODE", "local")
+SKILL_RERANK_TOP_K = int(os.getenv("SKILL_RERANK_TOP_K", 3))
+# Cosine threshold for embedding-based skill equivalence; 0 disables it
+SKILL_EMBEDDING_THRESHOLD = float(os.getenv("SKILL_EMBEDDING_THRESHOLD", 0))
+
+# LLM client (Ollama). OLLAMA_HOST defaults to http://localhost:11434.
+# Raise OLLAMA_NUM_PARALLEL on the Ollama server to benefit from LLM_MAX_WORKERS > 1.
+OLLAMA_HOST = os.getenv("OLLAMA_HOST")
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", 4))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 120))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", 1.0))
+
+# LLM response cache (llm_cache.py): bump LLM_CACHE_VERSION after changing prompts to
+# invalidate old answers; entries expire after LLM_CACHE_TTL_DAYS (0 = never)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_VERSION = os.getenv("LLM_CACHE_VERSION", "1")
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", 30))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", 256))
+
+# CV ingestion: worker processes for PDF/DOCX text extraction
+CV_INGEST_WORKERS = int(os.getenv("CV_INGEST_WORKERS", os.cpu_count() or 1))
+
+# CV text extraction budgets (text_extraction.py): pages read per PDF and characters kept
+# per CV (0 = unlimited); long portfolios stop parsing once the budget is spent
+CV_MAX_PAGES = int(os.getenv("CV_MAX_PAGES", 10))
+CV_MAX_CHARS = int(os.getenv("CV_MAX_CHARS", 20000))
+
+# Near-duplicate CVs (dedup.py): estimated Jaccard similarity of word shingles at which a
+# CV is linked to an earlier candidate and reuses its profile and scores (0 disables)
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.9))
+
+# Background tasks (matching, summarization, CV ingestion) run one at a time by default
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", 1))
+
+# Two-stage matching: shortlist each CV's MATCH_TOP_K nearest jobs by embedding
+# before full scoring (0 scores every job). MATCH_INDEX is "flat" (exact) or "ivf".
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", 0))
+MATCH_INDEX = os.getenv("MATCH_INDEX", "flat")
+MATCH_IVF_LISTS = int(os.getenv("MATCH_IVF_LISTS", 0))
+MATCH_IVF_PROBE = int(os.getenv("MATCH_IVF_PROBE", 2))
+
+# GET /api/jobs/<id>/candidates?rescore=true recomputes at most this many outdated
+# candidates in the request; the rest are left to a background matching task
+RANK_MAX_RESCORE = int(os.getenv("RANK_MAX_RESCORE", 25))
+
+# Batched CV extraction: pack up to CV_BATCH_SIZE CVs into one LLM prompt while the
+# estimated prompt stays under CV_BATCH_TOKEN_BUDGET tokens (1 disables batching)
+CV_BATCH_SIZE = int(os.getenv("CV_BATCH_SIZE", 1))
+CV_BATCH_TOKEN_BUDGET = int(os.getenv("CV_BATCH_TOKEN_BUDGET", 6000))
+
+# Constrained decoding for extraction prompts: "schema" (Ollama JSON schema, falls
+# back to "json" on servers without schema support), "json" or "off"
+LLM_STRUCTURED_OUTPUT = os.getenv("LLM_STRUCTURED_OUTPUT", "schema")
+
+# SQLite access layer (db.py): idle connections kept per thread, seconds to wait on
+# a locked database, and per-connection page cache / memory-map sizes
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 4))
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", 30))
+DB_CACHE_SIZE_MB = int(os.getenv("DB_CACHE_SIZE_MB", 32))
+DB_MMAP_SIZE_MB = int(os.getenv("DB_MMAP_SIZE_MB", 256))
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "NORMAL")
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", 256))
+
+# Server-sent events (/api/events): events kept for clients that reconnect or lag,
+# and seconds between keep-alive comments on idle streams
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", 1000))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", 15))
+
+# Interview mailer (mailer.py): pooled SMTP sessions sending concurrently, a provider
+# rate limit (messages per minute, 0 = unlimited), retries for temporary failures,
+# and how many messages one session sends before it is recycled
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", 30))
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 4))
+SMTP_RATE_PER_MINUTE = float(os.getenv("SMTP_RATE_PER_MINUTE", 0))
+SMTP_MAX_RETRIES = int(os.getenv("SMTP_MAX_RETRIES", 3))
+SMTP_RETRY_BACKOFF = float(os.getenv("SMTP_RETRY_BACKOFF", 2.0))
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", 100))
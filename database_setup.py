@@ -1,11 +1,446 @@
 """
 Complete database migration script to align with your existing schema
 Fixes column name mismatches between your database.py and load_jobs.py
+
+Schema changes after the initial fixes are versioned migrations (see
+MIGRATIONS): each runs once, in order, and is recorded in the
+schema_migrations table and PRAGMA user_version.
 """
 
 import sqlite3
+import time
+
+import db
 from config import DB_PATH
 
+class MigrationDeferred(Exception):
+    """A migration's table does not exist yet; it is retried on a later run."""
+
+def _require(cursor, table, *columns):
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {col[1] for col in cursor.fetchall()}
+    if not existing:
+        raise MigrationDeferred(f"table '{table}' does not exist yet")
+    missing = [col for col in columns if col not in existing]
+    if missing:
+        raise MigrationDeferred(f"table '{table}' is missing columns {missing}")
+
+def _index_candidates_by_score(cursor):
+    # Covers the matched-candidates listing (ORDER BY match_score DESC) and the
+    # shortlist threshold scan (match_score >= ?) without touching the table
+    _require(cursor, "candidates", "match_score", "matched_job_id", "name", "email")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_candidates_match_score
+        ON candidates (match_score DESC, matched_job_id, name, email)
+        WHERE match_score IS NOT NULL
+    """)
+
+def _index_pending_interview_emails(cursor):
+    # schedule_interviews only ever reads rows with email_sent = 0
+    _require(cursor, "shortlisted_candidates", "job_id", "name", "email")
+    cursor.execute("PRAGMA table_info(shortlisted_candidates)")
+    if 'email_sent' not in [col[1] for col in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE shortlisted_candidates ADD COLUMN email_sent INTEGER DEFAULT 0")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_shortlist_pending_email
+        ON shortlisted_candidates (job_id, name, email)
+        WHERE email_sent = 0
+    """)
+
+def _index_shortlist_by_score(cursor):
+    _require(cursor, "shortlisted_candidates", "match_score")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_shortlist_match_score
+        ON shortlisted_candidates (match_score DESC)
+    """)
+
+def _index_pair_scores_by_job(cursor):
+    # Per-job rankings and exports read one job's scores best-first
+    _require(cursor, "candidate_job_scores", "job_id", "score")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pair_scores_job_score
+        ON candidate_job_scores (job_id, score DESC)
+    """)
+
+def _add_email_delivery_state(cursor):
+    # Per-invitation delivery state, so an interrupted or partly failed run
+    # resumes where it stopped: email_status is NULL (pending), 'sent',
+    # 'retry' (temporary failure) or 'failed' (permanent failure)
+    _require(cursor, "shortlisted_candidates", "email_sent")
+    cursor.execute("PRAGMA table_info(shortlisted_candidates)")
+    existing = {col[1] for col in cursor.fetchall()}
+    for column, definition in (("email_status", "TEXT"),
+                               ("email_attempts", "INTEGER DEFAULT 0"),
+                               ("email_error", "TEXT"),
+                               ("email_sent_at", "REAL")):
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE shortlisted_candidates ADD COLUMN {column} {definition}")
+    cursor.execute("UPDATE shortlisted_candidates SET email_status = 'sent' WHERE email_sent = 1")
+
+def _add_candidate_dedup(cursor):
+    # Near-duplicate CV links (dedup.py): each candidate's MinHash signature,
+    # the canonical candidate it duplicates, and the LSH band buckets
+    _require(cursor, "candidates", "cv_text")
+    cursor.execute("PRAGMA table_info(candidates)")
+    existing = {col[1] for col in cursor.fetchall()}
+    for column, definition in (("canonical_id", "INTEGER"), ("minhash", "BLOB")):
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE candidates ADD COLUMN {column} {definition}")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_lsh (
+            rows_per_band INTEGER NOT NULL,
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            candidate_id INTEGER NOT NULL,
+            PRIMARY KEY (rows_per_band, band, bucket, candidate_id)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidate_lsh_candidate ON candidate_lsh (candidate_id)")
+
+# Dashboard counters kept current by triggers, so reading them is O(1).
+# Histogram buckets are 10 points wide; bucket 9 also holds scores of 100.
+SCORE_BUCKET = "MAX(0, MIN(CAST({score} / 10 AS INTEGER), 9))"
+
+_DASHBOARD_TRIGGERS = {
+    "trg_stats_candidates_insert": """
+        AFTER INSERT ON candidates BEGIN
+            UPDATE dashboard_stats SET
+                total_candidates = total_candidates + 1,
+                matched_candidates = matched_candidates + (NEW.match_score IS NOT NULL),
+                match_score_sum = match_score_sum + COALESCE(NEW.match_score, 0),
+                version = version + 1
+            WHERE id = 1;
+            UPDATE dashboard_score_histogram SET count = count + 1
+            WHERE bucket = {new_bucket};
+            UPDATE dashboard_job_stats SET matched_candidates = matched_candidates + 1
+            WHERE job_id = NEW.matched_job_id AND NEW.match_score IS NOT NULL;
+        END
+    """,
+    "trg_stats_candidates_delete": """
+        AFTER DELETE ON candidates BEGIN
+            UPDATE dashboard_stats SET
+                total_candidates = total_candidates - 1,
+                matched_candidates = matched_candidates - (OLD.match_score IS NOT NULL),
+                match_score_sum = match_score_sum - COALESCE(OLD.match_score, 0),
+                version = version + 1
+            WHERE id = 1;
+            UPDATE dashboard_score_histogram SET count = count - 1
+            WHERE bucket = {old_bucket};
+            UPDATE dashboard_job_stats SET matched_candidates = matched_candidates - 1
+            WHERE job_id = OLD.matched_job_id AND OLD.match_score IS NOT NULL;
+        END
+    """,
+    # refresh_best_matches rewrites every row; only real changes touch the stats
+    "trg_stats_candidates_update": """
+        AFTER UPDATE OF match_score, matched_job_id ON candidates
+        WHEN OLD.match_score IS NOT NEW.match_score OR OLD.matched_job_id IS NOT NEW.matched_job_id
+        BEGIN
+            UPDATE dashboard_stats SET
+                matched_candidates = matched_candidates
+                    - (OLD.match_score IS NOT NULL) + (NEW.match_score IS NOT NULL),
+                match_score_sum = match_score_sum
+                    - COALESCE(OLD.match_score, 0) + COALESCE(NEW.match_score, 0),
+                version = version + 1
+            WHERE id = 1;
+            UPDATE dashboard_score_histogram SET count = count - 1
+            WHERE bucket = {old_bucket};
+            UPDATE dashboard_score_histogram SET count = count + 1
+            WHERE bucket = {new_bucket};
+            UPDATE dashboard_job_stats SET matched_candidates = matched_candidates - 1
+            WHERE job_id = OLD.matched_job_id AND OLD.match_score IS NOT NULL;
+            UPDATE dashboard_job_stats SET matched_candidates = matched_candidates + 1
+            WHERE job_id = NEW.matched_job_id AND NEW.match_score IS NOT NULL;
+        END
+    """,
+    "trg_stats_jobs_insert": """
+        AFTER INSERT ON jobs BEGIN
+            UPDATE dashboard_stats SET
+                total_jobs = total_jobs + 1,
+                summarized_jobs = summarized_jobs + (NEW.jd_summary IS NOT NULL),
+                version = version + 1
+            WHERE id = 1;
+            INSERT OR IGNORE INTO dashboard_job_stats (job_id) VALUES (NEW.id);
+        END
+    """,
+    "trg_stats_jobs_delete": """
+        AFTER DELETE ON jobs BEGIN
+            UPDATE dashboard_stats SET
+                total_jobs = total_jobs - 1,
+                summarized_jobs = summarized_jobs - (OLD.jd_summary IS NOT NULL),
+                version = version + 1
+            WHERE id = 1;
+            DELETE FROM dashboard_job_stats WHERE job_id = OLD.id;
+        END
+    """,
+    "trg_stats_jobs_update": """
+        AFTER UPDATE OF jd_summary ON jobs
+        WHEN (OLD.jd_summary IS NULL) != (NEW.jd_summary IS NULL)
+        BEGIN
+            UPDATE dashboard_stats SET
+                summarized_jobs = summarized_jobs + (NEW.jd_summary IS NOT NULL) - (OLD.jd_summary IS NOT NULL),
+                version = version + 1
+            WHERE id = 1;
+        END
+    """,
+    "trg_stats_shortlist_insert": """
+        AFTER INSERT ON shortlisted_candidates BEGIN
+            UPDATE dashboard_stats SET
+                total_shortlisted = total_shortlisted + 1,
+                emails_sent = emails_sent + (NEW.email_sent IS 1),
+                version = version + 1
+            WHERE id = 1;
+            UPDATE dashboard_job_stats SET
+                shortlisted = shortlisted + 1,
+                emails_sent = emails_sent + (NEW.email_sent IS 1)
+            WHERE job_id = NEW.job_id;
+        END
+    """,
+    "trg_stats_shortlist_delete": """
+        AFTER DELETE ON shortlisted_candidates BEGIN
+            UPDATE dashboard_stats SET
+                total_shortlisted = total_shortlisted - 1,
+                emails_sent = emails_sent - (OLD.email_sent IS 1),
+                version = version + 1
+            WHERE id = 1;
+            UPDATE dashboard_job_stats SET
+                shortlisted = shortlisted - 1,
+                emails_sent = emails_sent - (OLD.email_sent IS 1)
+            WHERE job_id = OLD.job_id;
+        END
+    """,
+    "trg_stats_shortlist_update": """
+        AFTER UPDATE OF email_sent, job_id ON shortlisted_candidates
+        WHEN OLD.email_sent IS NOT NEW.email_sent OR OLD.job_id IS NOT NEW.job_id
+        BEGIN
+            UPDATE dashboard_stats SET
+                emails_sent = emails_sent - (OLD.email_sent IS 1) + (NEW.email_sent IS 1),
+                version = version + 1
+            WHERE id = 1;
+            UPDATE dashboard_job_stats SET
+                shortlisted = shortlisted - 1,
+                emails_sent = emails_sent - (OLD.email_sent IS 1)
+            WHERE job_id = OLD.job_id;
+            UPDATE dashboard_job_stats SET
+                shortlisted = shortlisted + 1,
+                emails_sent = emails_sent + (NEW.email_sent IS 1)
+            WHERE job_id = NEW.job_id;
+        END
+    """,
+}
+
+def install_dashboard_stats(cursor):
+    """Create the dashboard stats tables and triggers, and recount them from scratch.
+
+    Safe to re-run; use it to repair the counters, e.g. after a table was
+    rebuilt and lost its triggers.
+    """
+    _require(cursor, "candidates", "match_score", "matched_job_id")
+    _require(cursor, "jobs", "jd_summary")
+    _require(cursor, "shortlisted_candidates", "job_id", "email_sent")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dashboard_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_jobs INTEGER NOT NULL DEFAULT 0,
+            summarized_jobs INTEGER NOT NULL DEFAULT 0,
+            total_candidates INTEGER NOT NULL DEFAULT 0,
+            matched_candidates INTEGER NOT NULL DEFAULT 0,
+            match_score_sum REAL NOT NULL DEFAULT 0,
+            total_shortlisted INTEGER NOT NULL DEFAULT 0,
+            emails_sent INTEGER NOT NULL DEFAULT 0,
+            version INTEGER NOT NULL DEFAULT 0,
+            epoch TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dashboard_score_histogram (
+            bucket INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS dashboard_job_stats (
+            job_id INTEGER PRIMARY KEY,
+            matched_candidates INTEGER NOT NULL DEFAULT 0,
+            shortlisted INTEGER NOT NULL DEFAULT 0,
+            emails_sent INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for name, body in _DASHBOARD_TRIGGERS.items():
+        body = body.format(old_bucket=SCORE_BUCKET.format(score="OLD.match_score"),
+                           new_bucket=SCORE_BUCKET.format(score="NEW.match_score"))
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+    # Recount; the epoch changes so cached ETags from before don't match
+    cursor.execute("DELETE FROM dashboard_stats")
+    cursor.execute("""
+        INSERT INTO dashboard_stats (
+            id, total_jobs, summarized_jobs, total_candidates, matched_candidates,
+            match_score_sum, total_shortlisted, emails_sent, version, epoch
+        )
+        SELECT 1,
+            (SELECT COUNT(*) FROM jobs),
+            (SELECT COUNT(*) FROM jobs WHERE jd_summary IS NOT NULL),
+            (SELECT COUNT(*) FROM candidates),
+            (SELECT COUNT(*) FROM candidates WHERE match_score IS NOT NULL),
+            (SELECT COALESCE(SUM(match_score), 0) FROM candidates),
+            (SELECT COUNT(*) FROM shortlisted_candidates),
+            (SELECT COUNT(*) FROM shortlisted_candidates WHERE email_sent = 1),
+            0, ?
+    """, (f"{time.time():.6f}",))
+    cursor.execute("DELETE FROM dashboard_score_histogram")
+    cursor.executemany("INSERT INTO dashboard_score_histogram (bucket) VALUES (?)",
+                       [(bucket,) for bucket in range(10)])
+    cursor.execute(f"""
+        UPDATE dashboard_score_histogram SET count = (
+            SELECT COUNT(*) FROM candidates
+            WHERE match_score IS NOT NULL
+            AND {SCORE_BUCKET.format(score="match_score")} = dashboard_score_histogram.bucket
+        )
+    """)
+    cursor.execute("DELETE FROM dashboard_job_stats")
+    cursor.execute("""
+        INSERT INTO dashboard_job_stats (job_id, matched_candidates, shortlisted, emails_sent)
+        SELECT j.id,
+            (SELECT COUNT(*) FROM candidates c
+             WHERE c.matched_job_id = j.id AND c.match_score IS NOT NULL),
+            (SELECT COUNT(*) FROM shortlisted_candidates sc WHERE sc.job_id = j.id),
+            (SELECT COUNT(*) FROM shortlisted_candidates sc WHERE sc.job_id = j.id AND sc.email_sent = 1)
+        FROM jobs j
+    """)
+
+# (version, name, apply(cursor)); append new migrations, never renumber
+MIGRATIONS = [
+    (1, "index_candidates_by_match_score", _index_candidates_by_score),
+    (2, "index_pending_interview_emails", _index_pending_interview_emails),
+    (3, "index_shortlist_by_match_score", _index_shortlist_by_score),
+    (4, "index_pair_scores_by_job", _index_pair_scores_by_job),
+    (5, "dashboard_stats_triggers", install_dashboard_stats),
+    (6, "email_delivery_state", _add_email_delivery_state),
+    (7, "candidate_dedup", _add_candidate_dedup),
+]
+
+def apply_migrations(conn=None, verbose=True):
+    """Apply every pending migration and return the names of those applied.
+
+    A migration whose table does not exist yet is skipped and retried on the
+    next call; the others still run. Cheap when the schema is up to date.
+    """
+    own_conn = conn is None
+    conn = conn or db.connect()
+    applied_now = []
+    try:
+        latest = MIGRATIONS[-1][0]
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= latest:
+            return applied_now
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+        applied = {row[0] for row in conn.execute("SELECT version FROM schema_migrations")}
+
+        for version, name, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+                migrate(cursor)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                    (version, name, time.time())
+                )
+                conn.commit()
+            except MigrationDeferred as e:
+                conn.rollback()
+                if verbose:
+                    print(f"⏳ Migration {version} ({name}) deferred: {e}")
+                continue
+            except Exception:
+                conn.rollback()
+                raise
+            applied.add(version)
+            applied_now.append(name)
+            if verbose:
+                print(f"✅ Applied migration {version}: {name}")
+
+        # user_version is the highest version with every earlier one applied
+        contiguous = 0
+        while contiguous + 1 in applied:
+            contiguous += 1
+        conn.execute(f"PRAGMA user_version = {contiguous}")
+        conn.commit()
+        return applied_now
+    finally:
+        if own_conn:
+            conn.close()
+
+# Hot queries and the index each one must use; see check_query_plans()
+QUERY_PLAN_CHECKS = [
+    ("matched candidates by score", """
+        SELECT c.id, c.name, c.email, c.match_score, c.matched_job_id, j.job_title
+        FROM candidates c
+        LEFT JOIN jobs j ON c.matched_job_id = j.id
+        WHERE c.match_score IS NOT NULL
+        ORDER BY c.match_score DESC
+    """, (), "idx_candidates_match_score"),
+    ("shortlist threshold scan", """
+        SELECT id, name, email, matched_job_id, match_score
+        FROM candidates
+        WHERE match_score >= ?
+    """, (50,), "idx_candidates_match_score"),
+    ("pending interview emails", """
+        SELECT sc.id, sc.name, sc.email, j.job_title
+        FROM shortlisted_candidates sc
+        JOIN jobs j ON sc.job_id = j.id
+        WHERE sc.email_sent = 0 AND sc.email_status IS NOT 'failed'
+    """, (), "idx_shortlist_pending_email"),
+    ("shortlist by score", """
+        SELECT sc.id, sc.name, sc.email, sc.match_score, sc.email_sent, j.job_title, j.id
+        FROM shortlisted_candidates sc
+        LEFT JOIN jobs j ON sc.job_id = j.id
+        ORDER BY sc.match_score DESC
+    """, (), "idx_shortlist_match_score"),
+    ("job scores best-first", """
+        SELECT candidate_id, score FROM candidate_job_scores
+        WHERE job_id = ? AND score >= ?
+        ORDER BY score DESC
+    """, (1, 0), "idx_pair_scores_job_score"),
+]
+
+def check_query_plans(conn=None, verbose=True):
+    """Run EXPLAIN QUERY PLAN on the hot queries and report any that no longer use their index.
+
+    Returns a list of (query name, plan) for the regressions; empty means
+    every check passed. Queries over tables that don't exist are skipped.
+    """
+    own_conn = conn is None
+    conn = conn or db.connect()
+    regressions = []
+    try:
+        for name, sql, params, index in QUERY_PLAN_CHECKS:
+            try:
+                rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            except sqlite3.OperationalError as e:
+                if verbose:
+                    print(f"   - {name}: skipped ({e})")
+                continue
+            plan = " | ".join(row[-1] for row in rows)
+            uses_index = index in plan
+            if not uses_index:
+                regressions.append((name, plan))
+            if verbose:
+                print(f"   {'✓' if uses_index else '✗'} {name}: {plan}")
+        return regressions
+    finally:
+        if own_conn:
+            conn.close()
+
 def fix_database():
     """Migrate database to ensure compatibility"""
     print("\n" + "="*70)
@@ -13,7 +448,7 @@ def fix_database():
     print("="*70 + "\n")
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db.connect()
         cursor = conn.cursor()
         print(f"✅ Connected to: {DB_PATH}")
         
@@ -125,6 +560,20 @@ def fix_database():
         else:
             print(f"   ✅ All required columns present")
         
+        # Versioned migrations (indexes etc.)
+        print(f"\n🔄 Applying schema migrations...")
+        applied = apply_migrations(conn)
+        changes_made.extend(f"Migration: {name}" for name in applied)
+        
+        # Table rebuilds drop triggers, so re-install and recount the dashboard stats
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='dashboard_stats'")
+        if cursor.fetchone() and 'dashboard_stats_triggers' not in applied:
+            install_dashboard_stats(cursor)
+            conn.commit()
+            print(f"   ✅ Dashboard stats recounted")
+        print(f"   Schema version: {conn.execute('PRAGMA user_version').fetchone()[0]}"
+              f"/{MIGRATIONS[-1][0]}")
+        
         conn.close()
         
         print(f"\n{'='*70}")
@@ -164,7 +613,7 @@ def verify_database():
     print("="*70 + "\n")
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db.connect()
         cursor = conn.cursor()
         
         # Check all tables
@@ -194,9 +643,14 @@ def verify_database():
         if missing:
             print(f"\n❌ Missing required columns: {missing}")
             return False
-        else:
-            print(f"\n✅ All required columns present!")
-            return True
+        print(f"\n✅ All required columns present!")
+        
+        print(f"\n🔍 Query plans:")
+        regressions = check_query_plans(conn)
+        if regressions:
+            print(f"\n❌ {len(regressions)} query plan(s) no longer use their index")
+            return False
+        return True
         
     except Exception as e:
         print(f"❌ Verification error: {str(e)}")
@@ -0,0 +1,103 @@
+"""
+Shared SQLite access for the backend and the pipeline scripts.
+
+connect() hands out connections from a small per-thread pool instead of
+opening a new one per call, so each thread keeps its page cache and
+prepared-statement cache warm. Every connection runs in WAL mode with tuned
+pragmas, which lets dashboard readers proceed while a match run is writing.
+close() returns the connection to the pool (rolling back anything left
+uncommitted), so existing `conn = connect() ... conn.close()` code works
+unchanged.
+"""
+
+import sqlite3
+import threading
+
+from config import (
+    DB_PATH, DB_POOL_SIZE, DB_BUSY_TIMEOUT, DB_CACHE_SIZE_MB, DB_MMAP_SIZE_MB,
+    DB_SYNCHRONOUS, DB_STATEMENT_CACHE
+)
+
+_local = threading.local()
+_stats = {"opened": 0, "reused": 0}
+_stats_lock = threading.Lock()
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection whose close() returns it to its thread's pool."""
+
+    def close(self):
+        if getattr(self, "_pool", None) is None:
+            return super().close()
+        try:
+            if self.in_transaction:
+                self.rollback()
+            self.row_factory = None
+        except sqlite3.Error:
+            self._pool = None
+            return super().close()
+        pool, self._pool = self._pool, None
+        if len(pool) < DB_POOL_SIZE:
+            pool.append(self)
+        else:
+            super().close()
+
+    def really_close(self):
+        """Close the underlying connection instead of pooling it."""
+        self._pool = None
+        super().close()
+
+def _open(path):
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT,
+        factory=PooledConnection,
+        cached_statements=DB_STATEMENT_CACHE,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={DB_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT * 1000)}")
+    conn.execute(f"PRAGMA cache_size={-DB_CACHE_SIZE_MB * 1024}")
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE_MB * 1024 * 1024}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    with _stats_lock:
+        _stats["opened"] += 1
+    return conn
+
+def _thread_pool(path):
+    pools = getattr(_local, "pools", None)
+    if pools is None:
+        pools = _local.pools = {}
+    return pools.setdefault(path, [])
+
+def connect(path=None, row_factory=None):
+    """Return a pooled, WAL-mode connection to `path` (default DB_PATH).
+
+    Call close() when done; the connection goes back to this thread's pool.
+    """
+    path = path or DB_PATH
+    pool = _thread_pool(path)
+    conn = None
+    while pool and conn is None:
+        candidate = pool.pop()
+        try:
+            candidate.execute("SELECT 1")
+            conn = candidate
+            with _stats_lock:
+                _stats["reused"] += 1
+        except sqlite3.Error:
+            candidate.really_close()
+    if conn is None:
+        conn = _open(path)
+    conn._pool = pool
+    conn.row_factory = row_factory
+    return conn
+
+def close_thread_connections():
+    """Close every idle pooled connection held by the calling thread."""
+    for pool in getattr(_local, "pools", {}).values():
+        while pool:
+            pool.pop().really_close()
+
+def get_stats():
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,151 @@
+"""
+Near-duplicate CV detection with MinHash signatures and an LSH index.
+
+Each ingested CV gets a MinHash signature of its word shingles, stored in
+`candidates.minhash`, and its signature bands are indexed in the
+`candidate_lsh` table. A new CV whose estimated Jaccard similarity to an
+earlier candidate reaches DEDUP_THRESHOLD is linked to it through
+`candidates.canonical_id` (always the first CV of the group), and matching
+then reuses the canonical candidate's profile and scores instead of sending
+a near-identical document through the LLM again.
+
+The band layout is derived from the threshold; changing DEDUP_THRESHOLD
+rebuilds the index from the stored signatures on the next run.
+"""
+
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+import metrics
+from config import DEDUP_THRESHOLD
+
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+# Candidate pairs at exactly the threshold are found by LSH at least this often
+_MIN_RECALL = 0.95
+_SEED = 20240501
+
+_rng = np.random.default_rng(_SEED)
+# Multiply-shift hashing: h(x) = ((a * x + b) mod 2^64) >> 32, with odd a
+_A = _rng.integers(0, 2**64, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_B = _rng.integers(0, 2**64, size=NUM_PERM, dtype=np.uint64)
+
+DUPLICATES = metrics.counter("cv_near_duplicates_total", "CVs linked to an earlier near-identical CV")
+
+def shingles(text):
+    """32-bit ids of the overlapping SHINGLE_SIZE-word shingles of `text`."""
+    words = re.findall(r"\w+", (text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    return np.unique(np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams),
+                                 dtype=np.uint64, count=len(grams)))
+
+def signature(text):
+    """MinHash signature (NUM_PERM uint32 values) of a CV text."""
+    ids = shingles(text)
+    hashed = (_A[:, None] * ids[None, :] + _B[:, None]) >> np.uint64(32)
+    return hashed.min(axis=1).astype(np.uint32)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+def band_layout(threshold):
+    """(bands, rows per band) with the fewest bands that still find pairs at `threshold`."""
+    for rows in range(NUM_PERM, 0, -1):
+        bands = NUM_PERM // rows
+        if 1 - (1 - threshold ** rows) ** bands >= _MIN_RECALL:
+            return bands, rows
+    return NUM_PERM, 1
+
+def _buckets(sig, bands, rows):
+    for band in range(bands):
+        digest = hashlib.blake2b(sig[band * rows:(band + 1) * rows].tobytes(), digest_size=8).digest()
+        yield band, int.from_bytes(digest, "big", signed=True)
+
+def _has_dedup_schema(cursor):
+    cursor.execute("PRAGMA table_info(candidates)")
+    columns = {col[1] for col in cursor.fetchall()}
+    return {"cv_text", "canonical_id", "minhash"} <= columns
+
+def _index(cursor, candidate_id, sig, bands, rows):
+    cursor.executemany(
+        "INSERT OR IGNORE INTO candidate_lsh (rows_per_band, band, bucket, candidate_id) VALUES (?, ?, ?, ?)",
+        [(rows, band, bucket, candidate_id) for band, bucket in _buckets(sig, bands, rows)]
+    )
+
+def _find_canonical(cursor, sig, bands, rows, threshold):
+    """The canonical id of the most similar indexed CV at or above `threshold`, or None."""
+    matches = set()
+    for band, bucket in _buckets(sig, bands, rows):
+        cursor.execute(
+            "SELECT candidate_id FROM candidate_lsh WHERE rows_per_band = ? AND band = ? AND bucket = ?",
+            (rows, band, bucket)
+        )
+        matches.update(row[0] for row in cursor.fetchall())
+    if not matches:
+        return None
+
+    placeholders = ",".join("?" * len(matches))
+    cursor.execute(
+        f"SELECT id, canonical_id, minhash FROM candidates WHERE id IN ({placeholders}) AND minhash IS NOT NULL",
+        sorted(matches)
+    )
+    best, best_score = None, threshold
+    for candidate_id, canonical_id, blob in cursor.fetchall():
+        score = similarity(sig, np.frombuffer(blob, dtype=np.uint32))
+        if score >= best_score:
+            best, best_score = canonical_id or candidate_id, score
+    return best
+
+def index_candidates(cursor, threshold=DEDUP_THRESHOLD):
+    """Sign and index every candidate without a signature, linking near-duplicates.
+
+    Candidates are processed in id order, so the earliest CV of a group
+    becomes its canonical record. Runs inside the caller's transaction and
+    returns the number of candidates linked to a canonical one.
+    """
+    if not threshold or not _has_dedup_schema(cursor):
+        return 0
+    bands, rows = band_layout(threshold)
+
+    # Forget deleted candidates; rebuild the index if the band layout changed
+    cursor.execute("DELETE FROM candidate_lsh WHERE candidate_id NOT IN (SELECT id FROM candidates)")
+    cursor.execute("SELECT 1 FROM candidate_lsh WHERE rows_per_band != ? LIMIT 1", (rows,))
+    if cursor.fetchone():
+        cursor.execute("DELETE FROM candidate_lsh")
+        cursor.execute("SELECT id, minhash FROM candidates WHERE minhash IS NOT NULL ORDER BY id")
+        for candidate_id, blob in cursor.fetchall():
+            _index(cursor, candidate_id, np.frombuffer(blob, dtype=np.uint32), bands, rows)
+
+    cursor.execute("SELECT id, cv_text FROM candidates WHERE minhash IS NULL ORDER BY id")
+    linked = 0
+    for candidate_id, cv_text in cursor.fetchall():
+        sig = signature(cv_text)
+        canonical_id = _find_canonical(cursor, sig, bands, rows, threshold)
+        cursor.execute(
+            "UPDATE candidates SET minhash = ?, canonical_id = ? WHERE id = ?",
+            (sig.tobytes(), canonical_id, candidate_id)
+        )
+        _index(cursor, candidate_id, sig, bands, rows)
+        if canonical_id is not None:
+            linked += 1
+    if linked:
+        DUPLICATES.inc(linked)
+    return linked
+
+def canonical_map(cursor):
+    """{duplicate candidate id: canonical candidate id} for every linked candidate."""
+    if not DEDUP_THRESHOLD or not _has_dedup_schema(cursor):
+        return {}
+    cursor.execute("""
+        SELECT d.id, d.canonical_id FROM candidates d
+        JOIN candidates c ON c.id = d.canonical_id
+        WHERE d.canonical_id IS NOT NULL
+    """)
+    return dict(cursor.fetchall())
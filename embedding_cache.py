@@ -0,0 +1,152 @@
+"""
+Persistent, content-addressed embedding cache.
+
+Embeddings are keyed by a hash of (model, truncated text) and stored in the
+`embedding_cache` table of the main SQLite database, with an in-memory LRU
+tier in front of it. Rows produced by a different OLLAMA_MODEL are dropped
+the first time the cache is used, so switching models never serves stale
+vectors.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import db
+import metrics
+from config import DB_PATH, OLLAMA_MODEL, EMBEDDING_CACHE_SIZE
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_initialized_for = None
+
+stats = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "evictions": 0,
+}
+
+metrics.register_collector(
+    "embedding_cache_lookups_total", "Embedding cache lookups by result", "counter",
+    lambda: {(result,): stats[result] for result in ("memory_hits", "disk_hits", "misses")},
+    ["result"]
+)
+
+def make_key(model, text):
+    """Content hash used as the cache key for an embedding."""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+def _connect():
+    conn = db.connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            dim INTEGER NOT NULL,
+            vector BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return conn
+
+def _ensure_initialized(conn):
+    """Drop embeddings produced by any model other than the configured one."""
+    global _initialized_for
+    if _initialized_for == (DB_PATH, OLLAMA_MODEL):
+        return
+    cursor = conn.execute("DELETE FROM embedding_cache WHERE model != ?", (OLLAMA_MODEL,))
+    if cursor.rowcount:
+        print(f"  🗑️  Invalidated {cursor.rowcount} cached embeddings from other models")
+    conn.commit()
+    _memory.clear()
+    _initialized_for = (DB_PATH, OLLAMA_MODEL)
+
+def _remember(key, embedding):
+    _memory[key] = embedding
+    _memory.move_to_end(key)
+    while len(_memory) > EMBEDDING_CACHE_SIZE:
+        _memory.popitem(last=False)
+        stats["evictions"] += 1
+
+def get(text, model=OLLAMA_MODEL):
+    """Return the cached embedding for `text`, or None on a miss."""
+    key = make_key(model, text)
+    with _lock:
+        if key in _memory and _initialized_for == (DB_PATH, OLLAMA_MODEL):
+            _memory.move_to_end(key)
+            stats["memory_hits"] += 1
+            return _memory[key]
+
+    conn = _connect()
+    try:
+        with _lock:
+            _ensure_initialized(conn)
+        row = conn.execute(
+            "SELECT dim, vector FROM embedding_cache WHERE key = ?", (key,)
+        ).fetchone()
+    finally:
+        conn.close()
+
+    with _lock:
+        if row is None:
+            stats["misses"] += 1
+            return None
+        embedding = np.frombuffer(row[1], dtype=np.float32, count=row[0]).copy()
+        _remember(key, embedding)
+        stats["disk_hits"] += 1
+        return embedding
+
+def put(text, embedding, model=OLLAMA_MODEL):
+    """Store an embedding in both the memory and disk tiers."""
+    key = make_key(model, text)
+    vector = np.asarray(embedding, dtype=np.float32)
+
+    conn = _connect()
+    try:
+        with _lock:
+            _ensure_initialized(conn)
+        conn.execute(
+            "INSERT OR REPLACE INTO embedding_cache (key, model, dim, vector) VALUES (?, ?, ?, ?)",
+            (key, model, int(vector.size), vector.tobytes())
+        )
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        # Keep the memory tier even if the database is busy
+        print(f"  ⚠️  Could not persist embedding: {e}")
+    finally:
+        conn.close()
+
+    with _lock:
+        _remember(key, vector)
+
+def clear():
+    """Remove every cached embedding."""
+    global _initialized_for
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM embedding_cache")
+        conn.commit()
+    finally:
+        conn.close()
+    with _lock:
+        _memory.clear()
+        _initialized_for = None
+
+def get_stats():
+    """Hit/miss counters plus the current size of the memory tier."""
+    with _lock:
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        return {
+            **stats,
+            "memory_entries": len(_memory),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
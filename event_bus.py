@@ -0,0 +1,59 @@
+"""
+In-process publish/subscribe for pipeline progress and dashboard updates.
+
+Pipeline stages call publish(); the /api/events SSE endpoint streams the
+events to browsers. Events go into one shared ring buffer, and every
+subscriber just remembers the id of the last event it sent, so publishing
+costs the same however many clients are connected and no subscriber ever
+touches the database. A subscriber that falls further behind than the
+buffer gets a "resync" event telling it to refetch instead.
+
+Only events published in the API server process reach its subscribers;
+stages run from the command line publish into their own process.
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+
+from config import EVENT_BUFFER_SIZE
+
+_events = deque(maxlen=EVENT_BUFFER_SIZE)
+_ids = itertools.count(1)
+_condition = threading.Condition()
+_last_id = 0
+
+def publish(event_type, **data):
+    """Record an event and wake every waiting subscriber. Returns its id."""
+    global _last_id
+    with _condition:
+        event_id = next(_ids)
+        _events.append({"id": event_id, "type": event_type, "time": time.time(), "data": data})
+        _last_id = event_id
+        _condition.notify_all()
+    return event_id
+
+def last_event_id():
+    with _condition:
+        return _last_id
+
+def wait_for_events(after_id, timeout):
+    """Block until there are events newer than `after_id`, or `timeout` seconds pass.
+
+    Returns (events, missed): the newer events in order, and whether some
+    were already dropped from the buffer.
+    """
+    with _condition:
+        _condition.wait_for(lambda: _last_id > after_id, timeout=timeout)
+        if _last_id <= after_id:
+            return [], False
+        missed = bool(_events) and _events[0]["id"] > after_id + 1
+        # Newest events are at the right; walk back only as far as needed
+        newer = []
+        for event in reversed(_events):
+            if event["id"] <= after_id:
+                break
+            newer.append(event)
+        newer.reverse()
+        return newer, missed
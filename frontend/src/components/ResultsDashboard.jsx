@@ -1,5 +1,8 @@
 import React, { useState, useEffect } from 'react';
-import { getDashboardStats, getMatchResults, getShortlist, triggerShortlisting, triggerScheduling } from '../services/api';
+import {
+  getDashboardStats, getMatchResults, getShortlist, triggerShortlisting, triggerScheduling,
+  subscribeToEvents, DASHBOARD_EVENT_TYPES,
+} from '../services/api';
 import { TrendingUp, Users, Award, Target, Mail, RefreshCw, Loader } from 'lucide-react';
 import { PieChart, Pie, Cell, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 
@@ -12,9 +15,22 @@ const ResultsDashboard = () => {
 
   useEffect(() => {
     fetchData();
-    // Auto-refresh every 30 seconds to catch new data
-    const interval = setInterval(fetchData, 30000);
-    return () => clearInterval(interval);
+    // Refresh when the server pushes a pipeline event; bursts (e.g. one event per
+    // scored candidate) are coalesced into one refetch per second
+    let pending = null;
+    const scheduleRefresh = () => {
+      if (!pending) pending = setTimeout(() => { pending = null; fetchData(); }, 1000);
+    };
+    // Fall back to polling every 30 seconds while the event stream is down
+    let interval = null;
+    const source = subscribeToEvents(DASHBOARD_EVENT_TYPES, scheduleRefresh);
+    source.onopen = () => { clearInterval(interval); interval = null; };
+    source.onerror = () => { if (!interval) interval = setInterval(fetchData, 30000); };
+    return () => {
+      source.close();
+      clearInterval(interval);
+      clearTimeout(pending);
+    };
   }, []);
 
   const fetchData = async () => {
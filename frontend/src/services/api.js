@@ -8,6 +8,28 @@ const api = axios.create({
   headers: { 'Content-Type': 'application/json' },
 });
 
+// ======================
+// ⏳ BACKGROUND TASKS API
+// ======================
+export const getTask = (taskId) => api.get(`/tasks/${taskId}`);
+export const cancelTask = (taskId) => api.post(`/tasks/${taskId}/cancel`);
+
+// Long-running endpoints answer 202 with a task_id; poll until the task finishes.
+// `onProgress(task)` receives each status update (progress %, message, eta_seconds).
+export const waitForTask = async (response, { interval = 2000, onProgress } = {}) => {
+  if (response.status !== 202 || !response.data?.task_id) return response;
+  const taskId = response.data.task_id;
+  for (;;) {
+    const { data: task } = await getTask(taskId);
+    if (onProgress) onProgress(task);
+    if (task.status === 'completed') return { ...response, data: { ...response.data, ...task } };
+    if (task.status === 'failed' || task.status === 'cancelled') {
+      throw new Error(task.error || `Task ${task.status}`);
+    }
+    await new Promise((resolve) => setTimeout(resolve, interval));
+  }
+};
+
 // ======================
 // 🧠 JOBS API
 // ======================
@@ -19,26 +41,28 @@ export const uploadJobCSV = (file) => {
   });
 };
 
-export const summarizeJobs = () => api.post('/jobs/summarize');
-export const getJobs = () => api.get('/jobs');
+export const summarizeJobs = (options) => api.post('/jobs/summarize').then((res) => waitForTask(res, options));
+// params: { limit, after_id, fields, view } — pass next_after_id back as after_id for the next page
+export const getJobs = (params) => api.get('/jobs', { params });
 
 // ======================
 // 👤 CANDIDATES API
 // ======================
-export const uploadCVs = (files) => {
+export const uploadCVs = (files, options) => {
   const formData = new FormData();
   files.forEach((file) => formData.append('files', file));
   return api.post('/candidates/upload', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
-  });
+  }).then((res) => waitForTask(res, options));
 };
 
-export const getCandidates = () => api.get('/candidates');
+// params: { limit, after_id, fields, view } — pass next_after_id back as after_id for the next page
+export const getCandidates = (params) => api.get('/candidates', { params });
 
 // ======================
 // 🔍 MATCHING API
 // ======================
-export const triggerMatching = () => api.post('/matching/match');
+export const triggerMatching = (options) => api.post('/matching/match').then((res) => waitForTask(res, options));
 export const getMatchResults = () => api.get('/matching/results');
 export const triggerShortlisting = () => api.post('/matching/shortlist');
 export const getShortlist = () => api.get('/matching/shortlist');
@@ -49,6 +73,27 @@ export const triggerScheduling = () => api.post('/matching/schedule');
 // ======================
 export const getDashboardStats = () => api.get('/dashboard/stats');
 
+// ======================
+// 📡 LIVE EVENTS (server-sent events)
+// ======================
+// Pipeline events that change what the dashboard shows
+export const DASHBOARD_EVENT_TYPES = [
+  'candidates_ingested', 'job_summarized', 'score_written', 'matching_completed',
+  'email_sent', 'interviews_scheduled',
+];
+
+// Calls `onEvent(type, data)` for each event (plus 'resync' when events were missed).
+// Returns the EventSource; call .close() to unsubscribe.
+export const subscribeToEvents = (types, onEvent) => {
+  const url = new URL('events', API_BASE_URL);
+  if (types?.length) url.searchParams.set('types', types.join(','));
+  const source = new EventSource(url);
+  [...(types || []), 'resync'].forEach((type) => {
+    source.addEventListener(type, (e) => onEvent(type, JSON.parse(e.data)));
+  });
+  return source;
+};
+
 // ======================
 // 🧹 UTILITY API
 // ======================
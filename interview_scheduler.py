@@ -1,11 +1,16 @@
-import sqlite3
 import smtplib
 import random
 import logging
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from config import DB_PATH, SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD
+import time
+import db
+import event_bus
+import metrics
+from database_setup import apply_migrations
+from mailer import Mailer, build_message, close_session, is_temporary, open_session
+from config import SMTP_USER
+
+INVITATIONS = metrics.counter("interview_emails_total", "Interview invitations by outcome", ["outcome"])
 
 # Check if mock mode is enabled
 MOCK_EMAIL_MODE = os.getenv('MOCK_EMAIL_MODE', 'false').lower() == 'true'
@@ -37,6 +42,7 @@ Best regards,<br>
     return subject, body
 
 def send_email(recipient_email, subject, body):
+    """Send a single email over a one-off SMTP session (batches go through schedule_interviews)."""
     if not recipient_email:
         raise ValueError("Recipient email address is missing.")
     
@@ -49,27 +55,12 @@ def send_email(recipient_email, subject, body):
         logging.info("✅ Mock email 'sent' successfully!")
         return
     
-    msg = MIMEMultipart("alternative")
-    msg['From'] = SMTP_USER
-    msg['To'] = recipient_email
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'html'))
-
-    # Debug logging
-    logging.info(f"Attempting to send email to: {recipient_email}")
-    logging.info(f"SMTP Server: {SMTP_SERVER}:{SMTP_PORT}")
-    logging.info(f"SMTP User: {SMTP_USER}")
-    logging.info(f"SMTP Password configured: {'Yes' if SMTP_PASSWORD else 'No'}")
-
+    msg = build_message(SMTP_USER, recipient_email, subject, body)
+    server = None
     try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            logging.info("Connecting to SMTP server...")
-            server.starttls()
-            logging.info("Starting TLS...")
-            server.login(SMTP_USER, SMTP_PASSWORD)
-            logging.info("Login successful, sending message...")
-            server.send_message(msg)
-            logging.info(f"Email sent successfully to {recipient_email}")
+        server = open_session()
+        server.send_message(msg)
+        logging.info(f"Email sent successfully to {recipient_email}")
     except smtplib.SMTPAuthenticationError as e:
         logging.error(f"SMTP Authentication failed: {e}")
         raise RuntimeError(f"Email authentication failed for {recipient_email}. Please check: 1) Gmail 2FA is enabled, 2) App Password is correct, 3) Account settings allow less secure apps. Error: {e}")
@@ -79,22 +70,44 @@ def send_email(recipient_email, subject, body):
     except Exception as e:
         logging.error(f"Unexpected error: {e}")
         raise RuntimeError(f"Failed to send email to {recipient_email}: {e}")
+    finally:
+        if server is not None:
+            close_session(server)
 
 def ensure_email_sent_column(cursor):
     cursor.execute("PRAGMA table_info(shortlisted_candidates)")
     if 'email_sent' not in [col[1] for col in cursor.fetchall()]:
         cursor.execute("ALTER TABLE shortlisted_candidates ADD COLUMN email_sent INTEGER DEFAULT 0")
 
-def schedule_interviews():
-    conn = sqlite3.connect(DB_PATH)
+@metrics.track_stage("interview_scheduling")
+def schedule_interviews(retry_failed=False, mailer=None):
+    """Email an interview invitation to every shortlisted candidate not yet invited.
+
+    Messages go out concurrently over pooled SMTP sessions (see mailer.py).
+    Each result is committed as it arrives: sent rows get email_sent = 1,
+    rows that still fail temporarily after the retries are left pending
+    ('retry') for the next run, and permanent failures are marked 'failed'
+    and skipped from then on unless `retry_failed` is set. An interrupted
+    run therefore resumes without re-sending anything.
+    """
+    conn = db.connect()
     cursor = conn.cursor()
     ensure_email_sent_column(cursor)
+    conn.commit()
+    apply_migrations(verbose=False)
+
+    if retry_failed:
+        cursor.execute("""
+            UPDATE shortlisted_candidates SET email_status = NULL
+            WHERE email_sent = 0 AND email_status = 'failed'
+        """)
+        conn.commit()
 
     cursor.execute("""
         SELECT sc.id, sc.name, sc.email, j.job_title
         FROM shortlisted_candidates sc
         JOIN jobs j ON sc.job_id = j.id
-        WHERE sc.email_sent = 0
+        WHERE sc.email_sent = 0 AND sc.email_status IS NOT 'failed'
     """)
     candidates = cursor.fetchall()
 
@@ -103,25 +116,63 @@ def schedule_interviews():
         conn.close()
         return
 
-    for sc_id, name, email, job_title in candidates:
-        logging.info(f"Preparing to send email to: {name} ({email}) for role: {job_title}")
-        try:
+    job_titles = {sc_id: job_title for sc_id, _, _, job_title in candidates}
+
+    def record(sc_id, attempts, error):
+        if error is None:
+            cursor.execute("""
+                UPDATE shortlisted_candidates
+                SET email_sent = 1, email_status = 'sent', email_error = NULL, email_sent_at = ?,
+                    email_attempts = COALESCE(email_attempts, 0) + ?
+                WHERE id = ?
+            """, (time.time(), attempts, sc_id))
+            conn.commit()
+            INVITATIONS.inc(outcome="sent")
+            event_bus.publish("email_sent", shortlist_id=sc_id, job_title=job_titles[sc_id])
+            return
+        status = 'retry' if is_temporary(error) else 'failed'
+        cursor.execute("""
+            UPDATE shortlisted_candidates
+            SET email_status = ?, email_error = ?, email_attempts = COALESCE(email_attempts, 0) + ?
+            WHERE id = ?
+        """, (status, str(error)[:500], attempts, sc_id))
+        conn.commit()
+        INVITATIONS.inc(outcome=status)
+        logging.error(f"Failed to send interview email for shortlist ID {sc_id} ({status}): {error}")
+
+    def messages():
+        for sc_id, name, email, job_title in candidates:
             if not email:
-                raise ValueError(f"Missing email for candidate ID {sc_id}")
-
+                record(sc_id, 0, ValueError(f"Missing email for candidate ID {sc_id}"))
+                continue
             slot = random.choice(INTERVIEW_SLOTS)
             subject, body = generate_email(name, job_title, slot)
-            send_email(email, subject, body)
+            yield sc_id, build_message(SMTP_USER, email, subject, body)
 
-            cursor.execute("UPDATE shortlisted_candidates SET email_sent = 1 WHERE id = ?", (sc_id,))
-            logging.info(f" Email successfully sent to {email}")
-
-        except Exception as e:
-            logging.error(f"Failed to send interview email to {name} ({email}): {e}")
+    logging.info(f"Sending {len(candidates)} interview invitations...")
+    if MOCK_EMAIL_MODE:
+        for sc_id, msg in messages():
+            logging.info(f"🚀 MOCK EMAIL MODE - '{msg['Subject']}' would be sent to {msg['To']}")
+            record(sc_id, 1, None)
+    else:
+        own_mailer = mailer is None
+        mailer = mailer or Mailer()
+        try:
+            sent, failed = mailer.send_many(messages(), on_result=record)
+            logging.info(f"Sent {sent} invitations, {failed} failed")
+        finally:
+            if own_mailer:
+                mailer.close()
 
-    conn.commit()
     conn.close()
     logging.info("Email job completed and database updated.")
+    event_bus.publish("interviews_scheduled", candidates=len(candidates))
 
 if __name__ == "__main__":
-    schedule_interviews()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Send interview invitations to shortlisted candidates")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Also retry invitations that previously failed permanently")
+    args = parser.parse_args()
+    schedule_interviews(retry_failed=args.retry_failed)
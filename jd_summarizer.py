@@ -1,6 +1,12 @@
 import sqlite3
-import ollama
-from config import OLLAMA_MODEL, DB_PATH
+import db
+import event_bus
+import llm_cache
+import llm_client
+import metrics
+from config import OLLAMA_MODEL
+
+JOBS_SUMMARIZED = metrics.counter("jobs_summarized_total", "Job descriptions summarized by outcome", ["outcome"])
 
 def summarize_job_description(job_title, jd_text):
     """Uses Ollama LLM to extract key skills, experience, and qualifications from JD."""
@@ -53,8 +59,7 @@ IMPORTANT RULES:
 
     try:
         print(f"   🤖 Calling Ollama model: {OLLAMA_MODEL}")
-        response = ollama.chat(
-            model=OLLAMA_MODEL, 
+        response = llm_client.chat(
             messages=[
                 {
                     "role": "system", 
@@ -64,18 +69,24 @@ IMPORTANT RULES:
                     "role": "user", 
                     "content": prompt
                 }
-            ]
+            ],
+            purpose="jd_summary"
         )
         return response["message"]["content"]
     except Exception as e:
         print(f"   ❌ Ollama API Error: {str(e)}")
         raise
 
-def process_job_descriptions():
-    """Fetches JDs from SQLite, summarizes them using Ollama, and updates the database."""
+@metrics.track_stage("jd_summarization")
+def process_job_descriptions(progress=None):
+    """Fetches JDs from SQLite, summarizes them using Ollama, and updates the database.
+
+    `progress(done, total, message)` is called as each summary finishes.
+    Returns a dict with processed and failed counts.
+    """
     try:
         # Connect to SQLite
-        conn = sqlite3.connect(DB_PATH)
+        conn = db.connect()
         cursor = conn.cursor()
 
         # Check which column name is used for job title
@@ -93,7 +104,7 @@ def process_job_descriptions():
         if not jobs:
             print("✅ All job descriptions are already summarized.")
             conn.close()
-            return
+            return {"processed": 0, "failed": 0, "total": 0}
 
         print(f"\n{'='*60}")
         print(f"📋 Found {len(jobs)} job description(s) to process")
@@ -103,36 +114,59 @@ def process_job_descriptions():
         processed_count = 0
         failed_count = 0
         
-        for idx, (job_id, job_title, jd_text) in enumerate(jobs, 1):
-            print(f"\n[{idx}/{len(jobs)}] Processing Job ID: {job_id}")
+        # Validate job descriptions before spending any LLM time on them
+        valid_jobs = []
+        for job_id, job_title, jd_text in jobs:
+            if not jd_text or len(jd_text.strip()) < 20:
+                print(f"   ⚠️  Job {job_id} ({job_title}): description too short or empty. Skipping...")
+                failed_count += 1
+                continue
+            valid_jobs.append((job_id, job_title, jd_text))
+        
+        def summarize(job):
+            job_id, job_title, jd_text = job
+            try:
+                return summarize_job_description(job_title, jd_text), None
+            except Exception as e:
+                return None, e
+        
+        # Summaries are generated concurrently; results come back in job order
+        finished = [0]
+
+        def report(index, _):
+            finished[0] += 1
+            if progress:
+                progress(finished[0], len(valid_jobs), f"Summarized job {valid_jobs[index][0]}")
+
+        summaries = llm_client.map_concurrent(summarize, valid_jobs, on_result=report)
+        
+        for idx, ((job_id, job_title, jd_text), (summary, error)) in enumerate(zip(valid_jobs, summaries), 1):
+            print(f"\n[{idx}/{len(valid_jobs)}] Processing Job ID: {job_id}")
             print(f"   📌 Job Title: {job_title}")
+            print(f"   📝 Description length: {len(jd_text)} characters")
             
             try:
-                # Validate job description
-                if not jd_text or len(jd_text.strip()) < 20:
-                    print(f"   ⚠️  Job description too short or empty. Skipping...")
-                    failed_count += 1
-                    continue
-                
-                print(f"   📝 Description length: {len(jd_text)} characters")
-                
-                # Generate summary using LLM
-                summary = summarize_job_description(job_title, jd_text)
+                if error is not None:
+                    raise error
                 
                 if not summary or len(summary.strip()) < 50:
                     print(f"   ⚠️  Generated summary is too short. Skipping...")
+                    JOBS_SUMMARIZED.inc(outcome="too_short")
                     failed_count += 1
                     continue
                 
                 # Update database with the summary
                 cursor.execute("UPDATE jobs SET jd_summary = ? WHERE id = ?", (summary, job_id))
                 conn.commit()
+                event_bus.publish("job_summarized", job_id=job_id, job_title=job_title)
                 
                 processed_count += 1
+                JOBS_SUMMARIZED.inc(outcome="ok")
                 print(f"   ✅ Successfully summarized (Summary length: {len(summary)} chars)")
                 
             except Exception as e:
                 print(f"   ❌ Error: {str(e)}")
+                JOBS_SUMMARIZED.inc(outcome="error")
                 failed_count += 1
                 continue
         
@@ -146,11 +180,18 @@ def process_job_descriptions():
         print(f"✅ Successfully Processed: {processed_count}")
         print(f"❌ Failed: {failed_count}")
         print(f"📝 Total: {len(jobs)}")
+        cache_stats = llm_cache.get_stats()
+        print(f"💾 LLM cache: {cache_stats['hits'] + cache_stats['coalesced']} hits, "
+              f"{cache_stats['misses']} misses (hit rate {cache_stats['hit_rate']:.0%})")
         print(f"{'='*60}\n")
         
         if failed_count > 0:
             print(f"⚠️  {failed_count} job(s) failed to process. Check logs above for details.")
-        
+
+        event_bus.publish("summaries_completed", processed=processed_count, failed=failed_count)
+
+        return {"processed": processed_count, "failed": failed_count, "total": len(jobs)}
+
     except sqlite3.Error as e:
         print(f"❌ Database error: {str(e)}")
         raise
@@ -0,0 +1,195 @@
+"""
+Tolerant parsing of JSON produced by the LLM.
+
+Models often wrap JSON in code fences or prose, use single quotes or
+Python literals, leave trailing commas, or stop mid-array when they hit
+num_predict. loads() fixes those locally so the pipeline only asks the LLM
+to re-format its answer when the output is beyond repair.
+"""
+
+import json
+import re
+import threading
+from collections import Counter
+
+import metrics
+
+_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)(?:```|$)", re.S)
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+# How many partial trailing elements may be dropped when closing truncated output
+MAX_TRUNCATION_CUTS = 20
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+def record(outcome):
+    """Count a parse outcome: "clean", "repaired", "failed" or "llm_fallback"."""
+    with _stats_lock:
+        _stats[outcome] += 1
+
+def get_stats():
+    """Parse outcome counts plus repair and LLM-fallback rates."""
+    with _stats_lock:
+        stats = {k: _stats[k] for k in ("clean", "repaired", "failed", "llm_fallback")}
+    total = stats["clean"] + stats["repaired"] + stats["failed"]
+    stats["repair_rate"] = stats["repaired"] / total if total else 0.0
+    stats["llm_fallback_rate"] = stats["llm_fallback"] / total if total else 0.0
+    return stats
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+metrics.register_collector(
+    "llm_json_parse_total", "Parses of LLM JSON output by outcome (llm_fallback = re-asked the LLM)", "counter",
+    lambda: {(outcome,): count for outcome, count in get_stats().items() if not outcome.endswith("_rate")},
+    ["outcome"]
+)
+
+def _strip_wrapping(text):
+    """Drop code fences and any prose before the first { or [."""
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    return text[min(starts):] if starts else text
+
+def _normalize(text):
+    """Rewrite quotes, literals and trailing commas into strict JSON.
+
+    Returns (normalized text, truncation cut points, final bracket stack,
+    whether the text ended inside a string). Cut points are
+    (length, stack) snapshots just before each comma and just after each
+    opening bracket, where the text can be cut and closed if the tail is
+    a partial element.
+    """
+    out = []
+    stack = []
+    cuts = []
+    quote = None
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == "\\" and i + 1 < len(text):
+                nxt = text[i + 1]
+                # \' is not a valid JSON escape
+                out.append("'" if nxt == "'" else ch + nxt)
+                i += 2
+                continue
+            if ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+        elif ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+            cuts.append((len(out), list(stack)))
+        elif ch in "}]":
+            # Trailing comma before a closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                break
+        elif ch == ",":
+            cuts.append((len(out), list(stack)))
+            out.append(ch)
+        elif ch.isalpha():
+            j = i
+            while j < len(text) and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out), cuts, stack, quote is not None
+
+def _close(text, stack):
+    text = text.rstrip()
+    if text.endswith(","):
+        text = text[:-1]
+    elif text.endswith(":"):
+        text += " null"
+    return text + "".join(reversed(stack))
+
+def repair(text):
+    """Parse LLM output as JSON, repairing common defects. Raises ValueError if it can't."""
+    if not isinstance(text, str):
+        raise ValueError("expected a string")
+    body = _strip_wrapping(text.translate(_SMART_QUOTES)).strip()
+    if not body:
+        raise ValueError("no JSON found")
+
+    normalized, cuts, stack, open_string = _normalize(body)
+    decoder = json.JSONDecoder()
+    if not stack and not open_string:
+        # Complete but malformed output: cutting it would silently drop data
+        try:
+            value, _ = decoder.raw_decode(_close(normalized, stack))
+            return value
+        except json.JSONDecodeError:
+            raise ValueError("could not repair JSON") from None
+
+    # Truncated output: drop the partial trailing element and close what is open
+    attempts = [
+        _close(normalized[:length], cut_stack)
+        for length, cut_stack in reversed(cuts[-MAX_TRUNCATION_CUTS:])
+    ]
+    if open_string:
+        # A string cut off mid-way is a partial value; only keep it as a last resort
+        attempts.append(_close(normalized + '"', stack))
+    else:
+        attempts.insert(0, _close(normalized, stack))
+
+    for attempt in attempts:
+        try:
+            value, _ = decoder.raw_decode(attempt)
+        except json.JSONDecodeError:
+            continue
+        # Closing a bare opening bracket recovers nothing worth keeping
+        if value:
+            return value
+    raise ValueError("could not repair JSON")
+
+def loads(text, expect=None):
+    """json.loads with local repair as a fallback; records the outcome in the stats.
+
+    `expect` (dict or list) rejects a parsed value of the wrong type.
+    Raises ValueError when the text cannot be parsed or repaired.
+    """
+    try:
+        value = json.loads(text)
+        if expect is None or isinstance(value, expect):
+            record("clean")
+            return value
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    try:
+        value = repair(text)
+    except ValueError:
+        record("failed")
+        raise
+    if expect is not None and not isinstance(value, expect):
+        record("failed")
+        raise ValueError(f"expected {expect.__name__}, got {type(value).__name__}")
+    record("repaired")
+    return value
@@ -0,0 +1,227 @@
+"""
+Persistent cache of LLM chat responses.
+
+Responses are keyed by a hash of (cache version, model, options, format,
+messages) and stored in the `llm_cache` table of the main SQLite database,
+so re-running a stage on the same JDs or CVs (e.g. after re-uploading a
+CSV, which wipes the jobs table) replays earlier answers instead of calling
+Ollama again. Entries older than LLM_CACHE_TTL_DAYS are ignored, rows from
+another LLM_CACHE_VERSION are dropped the first time the cache is used
+(bump it after changing prompts or parsing), and the least recently used
+entries are evicted once the stored responses exceed LLM_CACHE_MAX_MB.
+
+Identical prompts issued concurrently share one in-flight request: the
+first caller asks the LLM and the others wait for its answer.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import db
+from config import DB_PATH, LLM_CACHE_VERSION, LLM_CACHE_TTL_DAYS, LLM_CACHE_MAX_MB
+
+# Hits refresh last_used at most this often, so reads rarely need a write
+_TOUCH_INTERVAL = 3600
+_EVICT_BATCH = 200
+
+_lock = threading.Lock()
+_in_flight = {}
+_initialized_for = None
+_stored_bytes = 0
+
+stats = {
+    "hits": 0,
+    "misses": 0,
+    "coalesced": 0,
+    "expired": 0,
+    "stores": 0,
+    "evictions": 0,
+}
+
+def make_key(model, messages, options=None, format=None):
+    """Content hash used as the cache key for a chat request."""
+    payload = json.dumps(
+        [LLM_CACHE_VERSION, model, options or {}, format, messages],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _connect():
+    conn = db.connect()
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            model TEXT NOT NULL,
+            content TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)")
+    return conn
+
+def _ensure_initialized(conn):
+    """Drop entries from other cache versions and total up the stored size."""
+    global _initialized_for, _stored_bytes
+    if _initialized_for == (DB_PATH, LLM_CACHE_VERSION):
+        return
+    cursor = conn.execute("DELETE FROM llm_cache WHERE version != ?", (LLM_CACHE_VERSION,))
+    if cursor.rowcount:
+        print(f"  🗑️  Invalidated {cursor.rowcount} cached LLM responses from other cache versions")
+    conn.commit()
+    _stored_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+    _initialized_for = (DB_PATH, LLM_CACHE_VERSION)
+
+def _response(model, content):
+    # Same shape callers read from ollama.chat: response["message"]["content"]
+    return {"model": model, "message": {"role": "assistant", "content": content}, "cached": True}
+
+def _lookup(key):
+    now = time.time()
+    conn = _connect()
+    try:
+        with _lock:
+            _ensure_initialized(conn)
+        row = conn.execute(
+            "SELECT model, content, created_at, last_used FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        model, content, created_at, last_used = row
+        if LLM_CACHE_TTL_DAYS and created_at < now - LLM_CACHE_TTL_DAYS * 86400:
+            with _lock:
+                stats["expired"] += 1
+            return None
+        if last_used < now - _TOUCH_INTERVAL:
+            conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return _response(model, content)
+    except sqlite3.OperationalError as e:
+        print(f"  ⚠️  LLM cache lookup failed: {e}")
+        return None
+    finally:
+        conn.close()
+
+def _evict(conn):
+    """Delete least recently used entries until the store is back under 90% of its limit."""
+    global _stored_bytes
+    target = LLM_CACHE_MAX_MB * 1024 * 1024 * 0.9
+    while _stored_bytes > target:
+        rows = conn.execute(
+            "SELECT key, size FROM llm_cache ORDER BY last_used LIMIT ?", (_EVICT_BATCH,)
+        ).fetchall()
+        if not rows:
+            _stored_bytes = 0
+            break
+        conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(key,) for key, _ in rows])
+        _stored_bytes -= sum(size for _, size in rows)
+        stats["evictions"] += len(rows)
+    conn.commit()
+
+def _store(key, model, content):
+    global _stored_bytes
+    now = time.time()
+    size = len(content.encode("utf-8"))
+    conn = _connect()
+    try:
+        with _lock:
+            _ensure_initialized(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, version, model, content, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, LLM_CACHE_VERSION, model, content, size, now, now)
+            )
+            conn.commit()
+            _stored_bytes += size
+            stats["stores"] += 1
+            if _stored_bytes > LLM_CACHE_MAX_MB * 1024 * 1024:
+                _evict(conn)
+    except sqlite3.OperationalError as e:
+        # A busy database only costs us the cache entry
+        print(f"  ⚠️  Could not persist LLM response: {e}")
+    finally:
+        conn.close()
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+def cached_chat(model, messages, options, format, call, validate=None):
+    """Return the cached response for this request, or `call()` it and cache the answer.
+
+    `call()` returns (response, format actually sent); the answer is stored
+    under that format, so a plain-JSON fallback reply never lands under the
+    JSON-schema key. Only non-empty answers that pass `validate(content)`
+    are stored: a truncated or malformed reply is returned once but asked
+    for again next time. Concurrent callers with the same key wait for the
+    first one's call instead of issuing their own; if it fails, they all
+    see its error.
+    """
+    key = make_key(model, messages, options, format)
+    response = _lookup(key)
+    if response is not None:
+        with _lock:
+            stats["hits"] += 1
+        return response
+
+    with _lock:
+        flight = _in_flight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _in_flight[key] = _Flight()
+        else:
+            stats["coalesced"] += 1
+
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return _response(model, flight.response["message"]["content"])
+
+    try:
+        with _lock:
+            stats["misses"] += 1
+        flight.response, sent_format = call()
+        content = flight.response["message"]["content"]
+        if content and content.strip() and (validate is None or validate(content)):
+            store_key = key if sent_format == format else make_key(model, messages, options, sent_format)
+            _store(store_key, model, content)
+        return flight.response
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _lock:
+            del _in_flight[key]
+        flight.done.set()
+
+def clear():
+    """Remove every cached response."""
+    global _initialized_for, _stored_bytes
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM llm_cache")
+        conn.commit()
+    finally:
+        conn.close()
+    with _lock:
+        _initialized_for = None
+        _stored_bytes = 0
+
+def get_stats():
+    """Hit/miss counters plus the size of the on-disk store."""
+    with _lock:
+        lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+        served = stats["hits"] + stats["coalesced"]
+        return {
+            **stats,
+            "stored_mb": round(_stored_bytes / (1024 * 1024), 2),
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+        }
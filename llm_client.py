@@ -0,0 +1,191 @@
+"""
+Shared Ollama client used by every pipeline stage.
+
+Wraps a single ollama.Client with per-request timeouts and retry with
+jittered exponential backoff, answers repeated chat prompts from llm_cache,
+and provides map_concurrent() to fan calls out over a bounded worker pool
+while keeping results in input order.
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import httpx
+import ollama
+
+import llm_cache
+import metrics
+from config import (
+    OLLAMA_MODEL, OLLAMA_HOST, LLM_MAX_WORKERS, LLM_TIMEOUT, LLM_MAX_RETRIES, LLM_RETRY_BACKOFF,
+    LLM_STRUCTURED_OUTPUT, LLM_CACHE_ENABLED
+)
+
+_client = None
+_client_lock = threading.Lock()
+# Set once the server rejects a JSON-schema `format`; later calls use plain JSON mode
+_schema_unsupported = False
+
+LLM_REQUESTS = metrics.counter("llm_requests_total", "Ollama requests (each retry counts) by purpose and outcome",
+                               ["purpose", "outcome"])
+LLM_SECONDS = metrics.histogram("llm_request_duration_seconds", "Latency of one Ollama request", ["purpose"])
+LLM_RETRIES = metrics.counter("llm_retries_total", "Ollama requests retried after a transient error", ["purpose"])
+LLM_PROMPT_TOKENS = metrics.counter("llm_prompt_tokens_total", "Prompt tokens evaluated (prompt_eval_count)",
+                                    ["purpose"])
+LLM_COMPLETION_TOKENS = metrics.counter("llm_completion_tokens_total", "Tokens generated (eval_count)", ["purpose"])
+LLM_EVAL_SECONDS = metrics.counter("llm_eval_duration_seconds_total",
+                                   "Time the model spent generating (eval_duration)", ["purpose"])
+metrics.register_collector(
+    "llm_cache_lookups_total", "LLM response cache lookups by result", "counter",
+    lambda: {(result,): llm_cache.get_stats()[result] for result in ("hits", "misses", "coalesced")},
+    ["result"]
+)
+
+def get_client():
+    """Return the process-wide ollama.Client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ollama.Client(host=OLLAMA_HOST, timeout=LLM_TIMEOUT)
+        return _client
+
+def _is_retryable(error):
+    if isinstance(error, ollama.ResponseError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError))
+
+def _record_usage(response, purpose):
+    """Token counts and generation time Ollama reports with a chat response."""
+    try:
+        prompt_tokens, eval_tokens, eval_ns = (response.get(field) for field in
+                                               ("prompt_eval_count", "eval_count", "eval_duration"))
+    except AttributeError:
+        return
+    if prompt_tokens:
+        LLM_PROMPT_TOKENS.inc(prompt_tokens, purpose=purpose)
+    if eval_tokens:
+        LLM_COMPLETION_TOKENS.inc(eval_tokens, purpose=purpose)
+    if eval_ns:
+        LLM_EVAL_SECONDS.inc(eval_ns / 1e9, purpose=purpose)
+
+def _with_retries(call, description, purpose):
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        start = time.perf_counter()
+        try:
+            result = call()
+            LLM_SECONDS.observe(time.perf_counter() - start, purpose=purpose)
+            LLM_REQUESTS.inc(purpose=purpose, outcome="ok")
+            return result
+        except Exception as e:
+            LLM_SECONDS.observe(time.perf_counter() - start, purpose=purpose)
+            LLM_REQUESTS.inc(purpose=purpose, outcome="error")
+            if attempt == LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            LLM_RETRIES.inc(purpose=purpose)
+            # Full jitter keeps parallel workers from retrying in lockstep
+            delay = random.uniform(0, LLM_RETRY_BACKOFF * (2 ** attempt))
+            print(f"   ⚠️  {description} failed ({e}); retrying in {delay:.1f}s "
+                  f"[{attempt + 1}/{LLM_MAX_RETRIES}]")
+            time.sleep(delay)
+
+def structured_format(schema):
+    """The `format` to request for output matching `schema`, per LLM_STRUCTURED_OUTPUT."""
+    if LLM_STRUCTURED_OUTPUT == "off":
+        return None
+    if LLM_STRUCTURED_OUTPUT == "json" or _schema_unsupported:
+        return "json"
+    return schema
+
+def chat(messages, options=None, format=None, model=OLLAMA_MODEL, cache=True, purpose="chat", validate=None):
+    """ollama.chat through the shared client, with timeout and retries.
+
+    Answers are cached (see llm_cache) unless `cache` is False or
+    LLM_CACHE_ENABLED is off, and identical concurrent prompts share one
+    request. `validate(content)` decides whether an answer is good enough
+    to cache (see json_reply). A JSON-schema `format` the server rejects is
+    retried once in plain JSON mode, and plain JSON mode is used from then
+    on. `purpose` labels the call's metrics (e.g. "cv_extraction").
+    """
+    if isinstance(format, dict) and _schema_unsupported:
+        format = "json"
+    if not (cache and LLM_CACHE_ENABLED):
+        return _chat(messages, options, format, model, purpose)[0]
+    return llm_cache.cached_chat(model, messages, options, format,
+                                 lambda: _chat(messages, options, format, model, purpose),
+                                 validate=validate)
+
+def json_reply(*fields):
+    """A `validate` callback for chat(): the reply's outermost {...} is valid JSON as-is
+    (no repair needed) and at least one of `fields` is present and non-empty."""
+    def validate(content):
+        start, end = content.find("{"), content.rfind("}") + 1
+        try:
+            data = json.loads(content[start:end]) if start >= 0 and end > start else None
+        except ValueError:
+            return False
+        return isinstance(data, dict) and (not fields or any(data.get(f) not in (None, "", [], {}) for f in fields))
+    return validate
+
+def _chat(messages, options, format, model, purpose):
+    """Returns (response, format actually sent)."""
+    global _schema_unsupported
+    client = get_client()
+    try:
+        response = _with_retries(
+            lambda: client.chat(model=model, messages=messages, options=options, format=format),
+            "LLM chat", purpose
+        )
+    except ollama.ResponseError as e:
+        if not isinstance(format, dict) or not 400 <= e.status_code < 500 or e.status_code == 429:
+            raise
+        print(f"   ⚠️  Server rejected JSON schema output ({e}); using plain JSON mode")
+        _schema_unsupported = True
+        format = "json"
+        response = _with_retries(
+            lambda: client.chat(model=model, messages=messages, options=options, format=format),
+            "LLM chat", purpose
+        )
+    _record_usage(response, purpose)
+    return response, format
+
+def embeddings(prompt, model=OLLAMA_MODEL):
+    """ollama.embeddings through the shared client, with timeout and retries."""
+    client = get_client()
+    return _with_retries(
+        lambda: client.embeddings(model=model, prompt=prompt),
+        "LLM embedding", "embedding"
+    )
+
+def map_concurrent(fn, items, max_workers=None, on_result=None):
+    """Apply `fn` to every item on a bounded thread pool; results keep input order.
+
+    `on_result(index, result)` is called from the calling thread as each
+    item finishes, in completion order, e.g. for progress reporting.
+    """
+    items = list(items)
+    workers = max(1, min(max_workers or LLM_MAX_WORKERS, len(items) or 1))
+    if workers == 1:
+        results = []
+        for index, item in enumerate(items):
+            results.append(fn(item))
+            if on_result:
+                on_result(index, results[-1])
+        return results
+
+    results = [None] * len(items)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(fn, item): index for index, item in enumerate(items)}
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            if on_result:
+                on_result(index, results[index])
+    except BaseException:
+        # Drop queued work so a failure or cancellation stops promptly
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+    return results
@@ -3,6 +3,7 @@ import sqlite3
 import os
 from datetime import datetime
 
+import db
 from config import DB_PATH
 
 CSV_FILE_PATH = "data/job_description.csv"
@@ -216,7 +217,7 @@ def load_job_descriptions():
     
     # Connect to database
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db.connect()
         cursor = conn.cursor()
         print(f"✅ Connected to database: {DB_PATH}")
     except sqlite3.Error as e:
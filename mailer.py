@@ -0,0 +1,250 @@
+"""
+Pooled, concurrent SMTP sender used by interview_scheduler.
+
+Opening an SMTP session costs a TCP connect, STARTTLS and a login, which
+is usually far more than sending one message, so sessions are kept in a
+pool and reused for many messages. Mailer.send_many() sends a batch over a
+bounded number of worker threads, spaces messages to stay under the
+provider's rate limit, and retries temporary failures (4xx replies,
+dropped connections) with jittered exponential backoff. Permanent failures
+(5xx replies, bad credentials) are reported straight away.
+"""
+
+import logging
+import queue
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import metrics
+from config import (
+    SMTP_SERVER, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_USE_TLS, SMTP_TIMEOUT, SMTP_POOL_SIZE,
+    SMTP_RATE_PER_MINUTE, SMTP_MAX_RETRIES, SMTP_RETRY_BACKOFF, SMTP_MAX_MESSAGES_PER_CONNECTION
+)
+
+SMTP_SESSIONS = metrics.counter("smtp_sessions_opened_total", "SMTP sessions opened (connect, TLS, login)")
+SMTP_SEND_SECONDS = metrics.histogram("smtp_send_duration_seconds", "Time to send one message over SMTP",
+                                      ["outcome"])
+
+def build_message(sender, recipient, subject, html_body):
+    msg = MIMEMultipart("alternative")
+    msg['From'] = sender
+    msg['To'] = recipient
+    msg['Subject'] = subject
+    msg.attach(MIMEText(html_body, 'html'))
+    return msg
+
+def open_session(host=SMTP_SERVER, port=SMTP_PORT, user=SMTP_USER, password=SMTP_PASSWORD,
+                 use_tls=SMTP_USE_TLS, timeout=SMTP_TIMEOUT):
+    """Connect, say EHLO, upgrade to TLS and log in; returns the smtplib.SMTP session."""
+    server = smtplib.SMTP(host, port, timeout=timeout)
+    try:
+        server.ehlo()
+        if use_tls:
+            server.starttls()
+            server.ehlo()
+        if user:
+            server.login(user, password)
+    except Exception:
+        server.close()
+        raise
+    SMTP_SESSIONS.inc()
+    return server
+
+def close_session(server):
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+class SMTPConnectionPool:
+    """Logged-in SMTP sessions shared between threads.
+
+    acquire() hands out an idle session (or opens one) and takes it back
+    afterwards. A session that broke is closed rather than reused, and one
+    that has sent `max_messages_per_connection` messages is recycled, since
+    providers cap messages per session.
+    """
+
+    def __init__(self, host=SMTP_SERVER, port=SMTP_PORT, user=SMTP_USER, password=SMTP_PASSWORD,
+                 size=SMTP_POOL_SIZE, use_tls=SMTP_USE_TLS, timeout=SMTP_TIMEOUT,
+                 max_messages_per_connection=SMTP_MAX_MESSAGES_PER_CONNECTION):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        # LIFO so the most recently used session (least likely to have timed out) goes first
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def _open(self):
+        server = open_session(self.host, self.port, self.user, self.password, self.use_tls, self.timeout)
+        with self._lock:
+            self.opened += 1
+        return server
+
+    @staticmethod
+    def _close(server):
+        close_session(server)
+
+    @contextmanager
+    def acquire(self):
+        try:
+            server, sent = self._idle.get_nowait()
+        except queue.Empty:
+            server, sent = self._open(), 0
+        try:
+            yield server
+        except smtplib.SMTPResponseException as e:
+            # The server refused this message but the session is still usable
+            # (smtplib has already sent RSET), unless it is shutting down
+            if e.smtp_code == 421:
+                self._close(server)
+            else:
+                self._release(server, sent)
+            raise
+        except Exception:
+            self._close(server)
+            raise
+        self._release(server, sent + 1)
+
+    def _release(self, server, sent):
+        if sent >= self.max_messages_per_connection:
+            self._close(server)
+            return
+        try:
+            self._idle.put_nowait((server, sent))
+        except queue.Full:
+            self._close(server)
+
+    def close_all(self):
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+class RateLimiter:
+    """Hands out send slots at most `per_minute` times a minute (0 = unlimited)."""
+
+    def __init__(self, per_minute=SMTP_RATE_PER_MINUTE):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def is_temporary(error):
+    """Whether a send failure is worth retrying."""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # Network errors (SMTPException is itself an OSError subclass)
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+class Mailer:
+    """Sends batches of messages over an SMTPConnectionPool."""
+
+    def __init__(self, pool=None, workers=SMTP_POOL_SIZE, rate_per_minute=SMTP_RATE_PER_MINUTE,
+                 max_retries=SMTP_MAX_RETRIES, retry_backoff=SMTP_RETRY_BACKOFF):
+        self.pool = pool or SMTPConnectionPool(size=workers)
+        self.workers = max(1, workers)
+        self.rate_limiter = RateLimiter(rate_per_minute)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def send(self, msg):
+        """Send one message, retrying temporary failures. Returns the number of attempts."""
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait()
+            start = time.perf_counter()
+            try:
+                with self.pool.acquire() as server:
+                    server.send_message(msg)
+                SMTP_SEND_SECONDS.observe(time.perf_counter() - start, outcome="ok")
+                return attempt + 1
+            except Exception as e:
+                SMTP_SEND_SECONDS.observe(time.perf_counter() - start, outcome="error")
+                if attempt == self.max_retries or not is_temporary(e):
+                    e.attempts = attempt + 1
+                    raise
+                # Full jitter keeps the workers from retrying in lockstep
+                delay = random.uniform(0, self.retry_backoff * (2 ** attempt))
+                logging.warning(f"Sending to {msg['To']} failed ({e}); retrying in {delay:.1f}s "
+                                f"[{attempt + 1}/{self.max_retries}]")
+                time.sleep(delay)
+
+    def send_many(self, messages, on_result=None):
+        """Send (key, message) pairs concurrently.
+
+        `on_result(key, attempts, error)` is called from the calling thread
+        as each message finishes, in completion order; `error` is None on
+        success. At most a few messages per worker are in flight at once,
+        so a huge batch does not queue up all at once. Returns
+        (sent, failed) counts.
+        """
+        sent = failed = 0
+        results = queue.Queue()
+        slots = threading.BoundedSemaphore(self.workers * 2)
+
+        def run(key, msg):
+            try:
+                results.put((key, self.send(msg), None))
+            except Exception as e:
+                results.put((key, getattr(e, 'attempts', 1), e))
+            finally:
+                slots.release()
+
+        def drain(block):
+            nonlocal sent, failed
+            while True:
+                try:
+                    key, attempts, error = results.get(block=block)
+                except queue.Empty:
+                    return
+                if error is None:
+                    sent += 1
+                else:
+                    failed += 1
+                if on_result:
+                    on_result(key, attempts, error)
+                if block:
+                    return
+
+        submitted = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for key, msg in messages:
+                while not slots.acquire(timeout=0.05):
+                    drain(block=False)
+                executor.submit(run, key, msg)
+                submitted += 1
+                drain(block=False)
+            while sent + failed < submitted:
+                drain(block=True)
+        return sent, failed
+
+    def close(self):
+        self.pool.close_all()
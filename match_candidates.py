@@ -1,9 +1,81 @@
 import sqlite3
-import ollama
-from config import OLLAMA_MODEL, DB_PATH
+import hashlib
+import heapq
+from config import (
+    OLLAMA_MODEL, SKILL_MATCH_MODE, SKILL_RERANK_TOP_K, SKILL_EMBEDDING_THRESHOLD,
+    MATCH_TOP_K, MATCH_INDEX, MATCH_IVF_LISTS, MATCH_IVF_PROBE, CV_BATCH_SIZE, CV_BATCH_TOKEN_BUDGET
+)
+import database_setup
+import db
+import dedup
+import embedding_cache
+import event_bus
+import json_repair
+import llm_cache
+import llm_client
+import metrics
+import skill_matcher
+import vector_index
 import numpy as np
 import json
-from typing import Dict, List, Tuple
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+# Bump whenever the CV extraction prompt or parsing changes so stored profiles are re-extracted
+CV_PROMPT_VERSION = "cv-v2"
+
+PAIRS_SCORED = metrics.counter("match_pairs_scored_total", "Candidate/job pairs scored and stored")
+CANDIDATE_SCORING_SECONDS = metrics.histogram(
+    "match_candidate_scoring_seconds", "Time to score one candidate against its stale jobs (incl. LLM reranking)"
+)
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# JSON schemas for Ollama's structured `format` option
+CV_EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "technical_skills": _STRING_LIST,
+        "soft_skills": _STRING_LIST,
+        "domain_skills": _STRING_LIST,
+        "experience_years": {"type": "number"},
+        "keywords": _STRING_LIST,
+    },
+    "required": ["technical_skills", "soft_skills", "domain_skills", "experience_years", "keywords"],
+}
+
+CV_BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "cvs": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"id": {"type": "string"}, **CV_EXTRACTION_SCHEMA["properties"]},
+                "required": ["id"] + CV_EXTRACTION_SCHEMA["required"],
+            },
+        },
+    },
+    "required": ["cvs"],
+}
+
+CV_FALLBACK_SCHEMA = {
+    "type": "object",
+    "properties": {"skills": _STRING_LIST, "experience_years": {"type": "number"}, "keywords": _STRING_LIST},
+    "required": ["skills", "experience_years", "keywords"],
+}
+
+JD_EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "required_skills": _STRING_LIST,
+        "preferred_skills": _STRING_LIST,
+        "min_experience": {"type": "number"},
+        "keywords": _STRING_LIST,
+    },
+    "required": ["required_skills", "preferred_skills", "min_experience", "keywords"],
+}
 
 def extract_skills_from_cv(cv_text):
     """Extract skills and experience using LLM with JSON output."""
@@ -32,10 +104,12 @@ Rules:
 Extract the information now:"""
 
     try:
-        response = ollama.chat(
-            model=OLLAMA_MODEL, 
+        response = llm_client.chat(
             messages=[{"role": "user", "content": prompt}],
-            options={"temperature": 0.1, "num_predict": 800}
+            options={"temperature": 0.1, "num_predict": 800},
+            format=llm_client.structured_format(CV_EXTRACTION_SCHEMA),
+            purpose="cv_extraction",
+            validate=llm_client.json_reply("technical_skills", "soft_skills", "domain_skills", "keywords")
         )
         llm_output = response["message"]["content"].strip()
         
@@ -60,8 +134,8 @@ def parse_cv_extraction(llm_response):
     }
     
     try:
-        # Try to parse as JSON first
-        data = json.loads(llm_response)
+        # Parse JSON, repairing common formatting mistakes locally
+        data = json_repair.loads(llm_response, expect=dict)
         
         # Extract all skills
         technical = data.get("technical_skills", [])
@@ -112,9 +186,10 @@ def parse_cv_extraction(llm_response):
         print(f"    ✓ JSON parsed: {len(info['skills'])} skills, {info['experience_years']} years, {len(info['keywords'])} keywords")
         return info
         
-    except json.JSONDecodeError as e:
+    except ValueError as e:
         print(f"    ⚠️  JSON parse failed, using LLM fallback: {e}")
-        # Fallback: Use LLM to extract from the response
+        # Last resort: ask the LLM to re-format its own response
+        json_repair.record("llm_fallback")
         return parse_cv_with_llm_fallback(llm_response)
 
 def parse_cv_with_llm_fallback(llm_response):
@@ -132,20 +207,16 @@ Return ONLY this JSON structure:
 }}"""
 
     try:
-        response = ollama.chat(
-            model=OLLAMA_MODEL,
+        response = llm_client.chat(
             messages=[{"role": "user", "content": prompt}],
-            options={"temperature": 0.1, "num_predict": 500}
+            options={"temperature": 0.1, "num_predict": 500},
+            format=llm_client.structured_format(CV_FALLBACK_SCHEMA),
+            purpose="cv_json_fallback",
+            validate=llm_client.json_reply("skills", "keywords")
         )
         fallback_output = response["message"]["content"].strip()
         
-        # Extract JSON
-        json_start = fallback_output.find('{')
-        json_end = fallback_output.rfind('}') + 1
-        if json_start >= 0 and json_end > json_start:
-            fallback_output = fallback_output[json_start:json_end]
-        
-        data = json.loads(fallback_output)
+        data = json_repair.repair(fallback_output)
         
         info = {
             "skills": data.get("skills", []),
@@ -191,10 +262,12 @@ Rules:
 Extract the requirements now:"""
 
     try:
-        response = ollama.chat(
-            model=OLLAMA_MODEL,
+        response = llm_client.chat(
             messages=[{"role": "user", "content": prompt}],
-            options={"temperature": 0.1, "num_predict": 800}
+            options={"temperature": 0.1, "num_predict": 800},
+            format=llm_client.structured_format(JD_EXTRACTION_SCHEMA),
+            purpose="jd_extraction",
+            validate=llm_client.json_reply("required_skills", "preferred_skills", "keywords")
         )
         llm_output = response["message"]["content"].strip()
         
@@ -220,8 +293,8 @@ def parse_jd_extraction(llm_response):
     }
     
     try:
-        # Parse JSON
-        data = json.loads(llm_response)
+        # Parse JSON, repairing common formatting mistakes locally
+        data = json_repair.loads(llm_response, expect=dict)
         
         # Extract required skills
         required = data.get("required_skills", [])
@@ -271,8 +344,9 @@ def parse_jd_extraction(llm_response):
         
         return info
         
-    except json.JSONDecodeError:
+    except ValueError:
         print(f"    ⚠️  JD JSON parse failed, using LLM fallback")
+        json_repair.record("llm_fallback")
         return parse_jd_with_llm_fallback(llm_response)
 
 def parse_jd_with_llm_fallback(llm_response):
@@ -291,20 +365,16 @@ Return ONLY this JSON structure:
 }}"""
 
     try:
-        response = ollama.chat(
-            model=OLLAMA_MODEL,
+        response = llm_client.chat(
             messages=[{"role": "user", "content": prompt}],
-            options={"temperature": 0.1, "num_predict": 500}
+            options={"temperature": 0.1, "num_predict": 500},
+            format=llm_client.structured_format(JD_EXTRACTION_SCHEMA),
+            purpose="jd_json_fallback",
+            validate=llm_client.json_reply("required_skills", "preferred_skills", "keywords")
         )
         fallback_output = response["message"]["content"].strip()
         
-        # Extract JSON
-        json_start = fallback_output.find('{')
-        json_end = fallback_output.rfind('}') + 1
-        if json_start >= 0 and json_end > json_start:
-            fallback_output = fallback_output[json_start:json_end]
-        
-        data = json.loads(fallback_output)
+        data = json_repair.repair(fallback_output)
         
         return {
             "required_skills": data.get("required_skills", []),
@@ -325,20 +395,23 @@ Return ONLY this JSON structure:
         }
 
 def get_embedding(text):
-    """Safely get embedding from Ollama with retry logic."""
-    max_retries = 2
-    for attempt in range(max_retries):
-        try:
-            # Limit text length for embedding
-            text_limited = text[:3000] if len(text) > 3000 else text
-            result = ollama.embeddings(model=OLLAMA_MODEL, prompt=text_limited)
-            embedding = np.array(result["embedding"])
-            if embedding.size > 0:
-                return embedding
-        except Exception as e:
-            if attempt == max_retries - 1:
-                print(f"  Embedding failed: {e}")
-                return np.zeros(4096)
+    """Safely get embedding from Ollama through the persistent cache."""
+    # Limit text length for embedding
+    text_limited = text[:3000] if len(text) > 3000 else text
+
+    cached = embedding_cache.get(text_limited)
+    if cached is not None:
+        return cached
+
+    # Retries and timeouts are handled by llm_client
+    try:
+        result = llm_client.embeddings(text_limited)
+        embedding = np.array(result["embedding"])
+        if embedding.size > 0:
+            embedding_cache.put(text_limited, embedding)
+            return embedding
+    except Exception as e:
+        print(f"  Embedding failed: {e}")
     return np.zeros(4096)
 
 def cosine_similarity(a, b):
@@ -352,13 +425,42 @@ def cosine_similarity(a, b):
     similarity = np.dot(a, b) / (norm_a * norm_b)
     return float(np.clip(similarity, -1.0, 1.0))
 
+def build_embedding_matrix(texts):
+    """Stack embeddings for `texts` into one L2-normalized float32 matrix (one row per text)."""
+    embeddings = [np.asarray(e, dtype=np.float32) for e in llm_client.map_concurrent(get_embedding, texts)]
+    
+    # Failed embeddings come back as zero vectors, possibly with a different size
+    dim = next((e.size for e in embeddings if np.any(e)), embeddings[0].size if embeddings else 0)
+    matrix = np.zeros((len(embeddings), dim), dtype=np.float32)
+    for row, embedding in enumerate(embeddings):
+        if embedding.size == dim:
+            matrix[row] = embedding
+    
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def compute_similarity_matrix(cv_matrix, jd_matrix):
+    """Cosine similarity of every CV row against every JD row in a single matmul."""
+    if cv_matrix.size == 0 or jd_matrix.size == 0:
+        return np.zeros((len(cv_matrix), len(jd_matrix)), dtype=np.float32)
+    return np.clip(cv_matrix @ jd_matrix.T, -1.0, 1.0)
+
+def normalize_terms(terms):
+    """Lowercased, stripped set of terms for set-based comparisons."""
+    return {t.lower().strip() for t in terms if isinstance(t, str) and t.strip()}
+
 def compute_keyword_overlap(cv_keywords, jd_keywords):
     """Compute keyword overlap score using Jaccard similarity."""
     if not cv_keywords or not jd_keywords:
         return 0.0
     
-    cv_set = set(k.lower().strip() for k in cv_keywords)
-    jd_set = set(k.lower().strip() for k in jd_keywords)
+    return compute_keyword_overlap_sets(normalize_terms(cv_keywords), normalize_terms(jd_keywords))
+
+def compute_keyword_overlap_sets(cv_set, jd_set):
+    """Keyword overlap on already-normalized keyword sets."""
+    if not cv_set or not jd_set:
+        return 0.0
     
     intersection = cv_set.intersection(jd_set)
     union = cv_set.union(jd_set)
@@ -376,20 +478,34 @@ def compute_keyword_overlap(cv_keywords, jd_keywords):
     
     return jaccard
 
-def compute_skill_match(cv_skills, required_skills, preferred_skills):
-    """Compute skill match scores with fuzzy matching using LLM."""
+def compute_skill_match(cv_skills, required_skills, preferred_skills, use_llm=False, skill_index=None):
+    """Compute skill match scores.
+    
+    Uses the local taxonomy matcher by default; `use_llm=True` asks the LLM
+    instead (two chat calls per pair, so only used for reranking).
+    """
     if not cv_skills:
         return 0.0, 0.0
     
+    if use_llm:
+        scorer = compute_skill_similarity_with_llm
+    else:
+        if skill_index is None:
+            skill_index = skill_matcher.build_skill_index(cv_skills)
+        embed = get_embedding if SKILL_EMBEDDING_THRESHOLD > 0 else None
+        scorer = lambda _, skills: skill_matcher.score_skills(
+            skill_index, skills, embed=embed, embedding_threshold=SKILL_EMBEDDING_THRESHOLD
+        )
+    
     # Required skills match
     required_match = 0.0
     if required_skills:
-        required_match = compute_skill_similarity_with_llm(cv_skills, required_skills)
+        required_match = scorer(cv_skills, required_skills)
     
     # Preferred skills match
     preferred_match = 0.0
     if preferred_skills:
-        preferred_match = compute_skill_similarity_with_llm(cv_skills, preferred_skills)
+        preferred_match = scorer(cv_skills, preferred_skills)
     
     return required_match, preferred_match
 
@@ -420,10 +536,11 @@ Return ONLY a JSON with the match score:
 The match_percentage should be: (matches / total_required) * 100"""
 
     try:
-        response = ollama.chat(
-            model=OLLAMA_MODEL,
+        response = llm_client.chat(
             messages=[{"role": "user", "content": prompt}],
-            options={"temperature": 0.2, "num_predict": 200}
+            options={"temperature": 0.2, "num_predict": 200},
+            purpose="skill_matching",
+            validate=llm_client.json_reply("match_percentage")
         )
         
         output = response["message"]["content"].strip()
@@ -473,37 +590,318 @@ def compute_experience_match(cv_exp, required_exp):
         else:
             return max(0.2, ratio)
 
-def compute_match_score(jd_summary, cv_summary, cv_text="", jd_text=""):
-    """Enhanced matching with multiple scoring factors."""
+@dataclass
+class JobProfile:
+    """Everything about a job that matching needs, computed once per job."""
+    job_id: Optional[int]
+    summary: str
+    extracted: str
+    required_skills: List[str]
+    preferred_skills: List[str]
+    min_experience: float
+    keywords: List[str]
+    keyword_set: Set[str] = field(default_factory=set)
+    embedding: Optional[np.ndarray] = None
+
+@dataclass
+class CandidateProfile:
+    """Everything about a candidate that matching needs, computed once per CV."""
+    candidate_id: Optional[int]
+    cv_text: str
+    extracted: str
+    skills: List[str]
+    experience_years: float
+    keywords: List[str]
+    keyword_set: Set[str] = field(default_factory=set)
+    skill_index: Optional[dict] = None
+    embedding: Optional[np.ndarray] = None
+
+def build_job_profile(job_id, jd_summary, jd_extracted=None, embedding=None):
+    """Extract (if needed) and parse a JD once into a reusable JobProfile."""
+    if jd_extracted is None:
+        jd_extracted = extract_jd_requirements(jd_summary)
+    jd_info = parse_jd_extraction(jd_extracted)
+    return JobProfile(
+        job_id=job_id,
+        summary=jd_summary or jd_info["raw_text"],
+        extracted=jd_extracted,
+        required_skills=jd_info["required_skills"],
+        preferred_skills=jd_info["preferred_skills"],
+        min_experience=jd_info["min_experience"],
+        keywords=jd_info["keywords"],
+        keyword_set=normalize_terms(jd_info["keywords"]),
+        embedding=embedding
+    )
+
+def ensure_profile_table(cursor):
+    """Create the table of stored CV extractions if needed."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_profiles (
+            cv_hash TEXT NOT NULL,
+            prompt_version TEXT NOT NULL,
+            model TEXT NOT NULL,
+            extracted TEXT,
+            profile TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (cv_hash, prompt_version, model)
+        )
+    """)
+
+def load_cv_profile(cv_hash):
+    """Return the stored (extracted, parsed info) for a CV hash, or None."""
+    conn = db.connect()
+    try:
+        ensure_profile_table(conn.cursor())
+        row = conn.execute(
+            "SELECT extracted, profile FROM candidate_profiles "
+            "WHERE cv_hash = ? AND prompt_version = ? AND model = ?",
+            (cv_hash, CV_PROMPT_VERSION, OLLAMA_MODEL)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    return row[0], json.loads(row[1])
+
+def save_cv_profile(cv_hash, extracted, cv_info):
+    """Store a parsed CV extraction so the CV is never sent to the LLM again."""
+    profile = {k: cv_info[k] for k in ("skills", "experience_years", "keywords")}
+    conn = db.connect()
+    try:
+        ensure_profile_table(conn.cursor())
+        conn.execute(
+            "INSERT OR REPLACE INTO candidate_profiles (cv_hash, prompt_version, model, extracted, profile) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (cv_hash, CV_PROMPT_VERSION, OLLAMA_MODEL, extracted, json.dumps(profile))
+        )
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        print(f"    ⚠️  Could not store CV profile: {e}")
+    finally:
+        conn.close()
+
+def get_cv_info(cv_text):
+    """Parsed CV extraction for `cv_text`, from the profile store or a fresh LLM extraction."""
+    cv_hash = content_hash(cv_text)
+    stored = load_cv_profile(cv_hash)
+    if stored is not None:
+        extracted, profile = stored
+        return extracted, {**profile, "raw_text": extracted}
+
+    extracted = extract_skills_from_cv(cv_text)
+    cv_info = parse_cv_extraction(extracted)
+    # Don't remember failed extractions; they should be retried next run
+    if cv_info["skills"] or cv_info["keywords"]:
+        save_cv_profile(cv_hash, extracted, cv_info)
+    return extracted, cv_info
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token) for prompt budgeting."""
+    return len(text or "") // 4 + 1
+
+# Tokens taken by the batch prompt's instructions, excluding the CVs themselves
+CV_BATCH_PROMPT_TOKENS = 350
+
+def pack_cv_batches(cvs, batch_size=CV_BATCH_SIZE, token_budget=CV_BATCH_TOKEN_BUDGET):
+    """Greedily group (key, cv_text) pairs into batches under the size and token limits.
+
+    A CV too large for the budget on its own ends up in a batch by itself.
+    """
+    batches, current, current_tokens = [], [], CV_BATCH_PROMPT_TOKENS
+    for key, cv_text in cvs:
+        tokens = estimate_tokens(cv_text)
+        if current and (len(current) >= batch_size or current_tokens + tokens > token_budget):
+            batches.append(current)
+            current, current_tokens = [], CV_BATCH_PROMPT_TOKENS
+        current.append((key, cv_text))
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def extract_skills_from_cv_batch(cvs):
+    """Extract several CVs with one LLM call; returns the raw model output ({"cvs": [...]})."""
+    cv_blocks = "\n\n".join(
+        f"=== CV id: {key} ===\n{cv_text}\n=== END CV {key} ===" for key, cv_text in cvs
+    )
+    prompt = f"""You are an expert CV analyzer. Analyze each CV below and extract information.
+
+CVS TO ANALYZE:
+{cv_blocks}
+
+You MUST respond with ONLY a valid JSON object holding one entry per CV, in this exact format (no other text):
+{{
+  "cvs": [
+    {{
+      "id": "<CV id>",
+      "technical_skills": ["Python", "SQL", "Machine Learning"],
+      "soft_skills": ["Leadership", "Communication"],
+      "domain_skills": ["Data Science", "Finance"],
+      "experience_years": 5,
+      "keywords": ["Python", "Data Analysis", "ML", "SQL", "ETL"]
+    }}
+  ]
+}}
+
+Rules:
+- Include every CV id exactly once, copied exactly
+- Include 5-15 technical skills
+- Include 3-8 soft skills
+- Include 2-5 domain/industry skills
+- Experience in years as a number
+- Include 10-20 important keywords from CV
+- Return ONLY the JSON object, no extra text
+
+Extract the information now:"""
+
+    try:
+        response = llm_client.chat(
+            messages=[{"role": "user", "content": prompt}],
+            options={"temperature": 0.1, "num_predict": 600 * len(cvs)},
+            format=llm_client.structured_format(CV_BATCH_SCHEMA),
+            purpose="cv_extraction_batch",
+            validate=llm_client.json_reply("cvs")
+        )
+        return response["message"]["content"].strip()
+    except Exception as e:
+        print(f"❌ LLM error extracting CV batch: {e}")
+        return '{"cvs": []}'
+
+def split_cv_batch_extraction(llm_response, keys):
+    """Validate a batch response and split it into {key: single-CV JSON string}.
+
+    Entries with an unknown or duplicate id, missing fields (e.g. cut off
+    by num_predict), or without any skills or keywords, are dropped so those
+    CVs fall back to single extraction.
+    """
+    try:
+        entries = json_repair.loads(llm_response)
+    except ValueError:
+        return {}
+    if isinstance(entries, dict):
+        entries = entries.get("cvs")
+    if not isinstance(entries, list):
+        return {}
+
+    expected = {str(key): key for key in keys}
+    extracted = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        key = expected.get(str(entry.get("id")))
+        if key is None or key in extracted:
+            continue
+        fields = {k: v for k, v in entry.items() if k != "id"}
+        if any(k not in fields for k in CV_EXTRACTION_SCHEMA["required"]):
+            continue
+        if not any(isinstance(fields.get(k), list) and fields[k]
+                   for k in ("technical_skills", "soft_skills", "domain_skills", "keywords")):
+            continue
+        extracted[key] = json.dumps(fields)
+    return extracted
+
+def extract_cv_profiles_batched(cvs, batch_size=CV_BATCH_SIZE, token_budget=CV_BATCH_TOKEN_BUDGET):
+    """Extract (key, cv_text) pairs in batched prompts, falling back to one prompt per CV.
+
+    Returns ({key: (extracted, cv_info)}, stats).
+    """
+    batches = pack_cv_batches(cvs, batch_size, token_budget)
+    multi = [batch for batch in batches if len(batch) > 1]
+
+    results = {}
+    responses = llm_client.map_concurrent(extract_skills_from_cv_batch, multi)
+    for batch, response in zip(multi, responses):
+        for key, extracted in split_cv_batch_extraction(response, [k for k, _ in batch]).items():
+            results[key] = (extracted, parse_cv_extraction(extracted))
+
+    # Single CVs, plus anything the batch answers missed or got wrong
+    remaining = [(key, cv_text) for key, cv_text in cvs if key not in results]
+    singles = llm_client.map_concurrent(lambda cv: extract_skills_from_cv(cv[1]), remaining)
+    for (key, _), extracted in zip(remaining, singles):
+        results[key] = (extracted, parse_cv_extraction(extracted))
+
+    stats = {
+        "cvs": len(cvs),
+        "batch_calls": len(multi),
+        "batched": sum(len(batch) for batch in multi),
+        "single_calls": len(remaining),
+        "fallbacks": len(remaining) - sum(1 for batch in batches if len(batch) == 1),
+    }
+    return results, stats
+
+def prefetch_cv_profiles(candidates, batch_size=CV_BATCH_SIZE):
+    """Fill the profile store for (candidate_id, cv_text) rows using batched extraction."""
+    pending = {}
+    for candidate_id, cv_text in candidates:
+        cv_hash = content_hash(cv_text)
+        if cv_hash not in pending and load_cv_profile(cv_hash) is None:
+            pending[cv_hash] = (candidate_id, cv_text)
+    if not pending:
+        return None
+
+    hash_by_key = {candidate_id: cv_hash for cv_hash, (candidate_id, _) in pending.items()}
+    results, stats = extract_cv_profiles_batched(list(pending.values()), batch_size=batch_size)
+    for key, (extracted, cv_info) in results.items():
+        if cv_info["skills"] or cv_info["keywords"]:
+            save_cv_profile(hash_by_key[key], extracted, cv_info)
+
+    print(f"📦 Batched CV extraction: {stats['cvs']} CVs in {stats['batch_calls']} batch + "
+          f"{stats['single_calls']} single calls ({stats['fallbacks']} fallbacks)")
+    return stats
+
+def build_candidate_profile(candidate_id, cv_text, cv_summary=None, embedding=None):
+    """Parse a CV once into a reusable CandidateProfile.
     
-    # Parse extracted information
-    cv_info = parse_cv_extraction(cv_summary)
-    jd_info = parse_jd_extraction(jd_summary)
+    Without `cv_summary` the extraction comes from the candidate_profiles
+    store, so each distinct CV text is sent to the LLM at most once.
+    """
+    if cv_summary is None:
+        cv_summary, cv_info = get_cv_info(cv_text)
+    else:
+        cv_info = parse_cv_extraction(cv_summary)
+    return CandidateProfile(
+        candidate_id=candidate_id,
+        cv_text=cv_text or cv_info["raw_text"],
+        extracted=cv_summary,
+        skills=cv_info["skills"],
+        experience_years=cv_info["experience_years"],
+        keywords=cv_info["keywords"],
+        keyword_set=normalize_terms(cv_info["keywords"]),
+        skill_index=skill_matcher.build_skill_index(cv_info["skills"]),
+        embedding=embedding
+    )
+
+def score_profiles(candidate, job, semantic_score=None, use_llm_skills=False):
+    """Score a precompiled candidate against a precompiled job.
     
-    # Use original texts if available
-    text_for_cv = cv_text if cv_text else cv_info["raw_text"]
-    text_for_jd = jd_text if jd_text else jd_info["raw_text"]
+    Returns (final_percentage, breakdown). `semantic_score` normally comes
+    from the similarity matrix; otherwise the profile embeddings are used.
+    """
     
     # 1. Semantic Similarity (20% weight)
-    emb_cv = get_embedding(text_for_cv)
-    emb_jd = get_embedding(text_for_jd)
-    semantic_score = cosine_similarity(emb_cv, emb_jd)
+    if semantic_score is None:
+        emb_cv = candidate.embedding if candidate.embedding is not None else get_embedding(candidate.cv_text)
+        emb_jd = job.embedding if job.embedding is not None else get_embedding(job.summary)
+        semantic_score = cosine_similarity(emb_cv, emb_jd)
+    semantic_score = float(semantic_score)
     
     # 2. Keyword Overlap (20% weight)
-    keyword_score = compute_keyword_overlap(cv_info["keywords"], jd_info["keywords"])
+    keyword_score = compute_keyword_overlap_sets(candidate.keyword_set, job.keyword_set)
     
     # 3. Skills Match (50% weight) - most important
     required_match, preferred_match = compute_skill_match(
-        cv_info["skills"],
-        jd_info["required_skills"],
-        jd_info["preferred_skills"]
+        candidate.skills,
+        job.required_skills,
+        job.preferred_skills,
+        use_llm=use_llm_skills,
+        skill_index=candidate.skill_index
     )
     skills_score = (required_match * 0.85) + (preferred_match * 0.15)
     
     # 4. Experience Match (10% weight)
     experience_score = compute_experience_match(
-        cv_info["experience_years"],
-        jd_info["min_experience"]
+        candidate.experience_years,
+        job.min_experience
     )
     
     # Weighted final score
@@ -527,117 +925,559 @@ def compute_match_score(jd_summary, cv_summary, cv_text="", jd_text=""):
     
     return final_percentage, breakdown
 
-def process_candidate_matching():
-    """Enhanced matching with multi-factor scoring and LLM-based parsing."""
-    conn = sqlite3.connect(DB_PATH)
+def compute_match_score(jd_summary, cv_summary, cv_text="", jd_text="", semantic_score=None):
+    """Enhanced matching with multiple scoring factors.
+    
+    Convenience wrapper that parses both extractions and calls score_profiles;
+    batch callers should build the profiles once and call score_profiles directly.
+    """
+    candidate = build_candidate_profile(None, cv_text, cv_summary)
+    job = build_job_profile(None, jd_text, jd_summary)
+    return score_profiles(candidate, job, semantic_score=semantic_score)
+
+# Bump when the scoring formula changes so every stored pair score is recomputed
+SCORER_VERSION = "v5"
+
+def content_hash(text):
+    """Stable hash of a CV text or JD summary, used to detect changed inputs."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def ensure_score_table(cursor):
+    """Create the persisted per-pair score table if needed."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS candidate_job_scores (
+            candidate_id INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            cv_hash TEXT NOT NULL,
+            jd_hash TEXT NOT NULL,
+            scorer TEXT NOT NULL,
+            score REAL NOT NULL,
+            breakdown TEXT,
+            scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (candidate_id, job_id)
+        )
+    """)
+
+def _scorer_tag():
+    return f"{SCORER_VERSION}:{SKILL_MATCH_MODE}"
+
+def find_stale_pairs(cursor, cv_hashes, jd_hashes):
+    """Return the (candidate_id, job_id) pairs whose stored score is missing or outdated."""
+    scorer = _scorer_tag()
+    fresh = set()
+    cursor.execute("SELECT candidate_id, job_id, cv_hash, jd_hash, scorer FROM candidate_job_scores")
+    for candidate_id, job_id, cv_hash, jd_hash, pair_scorer in cursor.fetchall():
+        if (cv_hashes.get(candidate_id) == cv_hash and jd_hashes.get(job_id) == jd_hash
+                and pair_scorer == scorer):
+            fresh.add((candidate_id, job_id))
+    return {
+        (candidate_id, job_id)
+        for candidate_id in cv_hashes
+        for job_id in jd_hashes
+        if (candidate_id, job_id) not in fresh
+    }
+
+def refresh_best_matches(cursor):
+    """Re-derive match_score / matched_job_id for every candidate from the stored pair scores."""
+    cursor.execute("""
+        UPDATE candidates SET
+            match_score = (
+                SELECT s.score FROM candidate_job_scores s
+                WHERE s.candidate_id = candidates.id
+                ORDER BY s.score DESC, s.job_id LIMIT 1
+            ),
+            matched_job_id = (
+                SELECT s.job_id FROM candidate_job_scores s
+                WHERE s.candidate_id = candidates.id
+                ORDER BY s.score DESC, s.job_id LIMIT 1
+            )
+    """)
+
+def store_profile_columns(cursor, candidate_profiles):
+    """Mirror extracted skills/experience into the candidates table where those columns exist."""
+    cursor.execute("PRAGMA table_info(candidates)")
+    columns = {col[1] for col in cursor.fetchall()}
+    if not {"skills", "experience"} <= columns:
+        return
+    cursor.executemany(
+        "UPDATE candidates SET skills = ?, experience = ? WHERE id = ?",
+        [(json.dumps(c.skills), str(c.experience_years), c.candidate_id) for c in candidate_profiles]
+    )
+
+def copy_canonical_results(cursor, duplicate_pairs, canonical_of, cv_hashes, jd_hashes):
+    """Give near-duplicate candidates their canonical candidate's scores and profile columns.
+
+    Only fresh canonical scores are copied; a duplicate pair whose canonical
+    pair is missing (e.g. pruned by top-K retrieval) stays unscored. Returns
+    the number of pairs copied.
+    """
+    scorer = _scorer_tag()
+    copied = 0
+    for candidate_id, job_id in sorted(duplicate_pairs):
+        canonical_id = canonical_of[candidate_id]
+        cursor.execute("""
+            INSERT OR REPLACE INTO candidate_job_scores
+            (candidate_id, job_id, cv_hash, jd_hash, scorer, score, breakdown)
+            SELECT ?, job_id, ?, jd_hash, scorer, score, breakdown
+            FROM candidate_job_scores
+            WHERE candidate_id = ? AND job_id = ? AND cv_hash = ? AND jd_hash = ? AND scorer = ?
+        """, (candidate_id, cv_hashes[candidate_id], canonical_id, job_id,
+              cv_hashes[canonical_id], jd_hashes[job_id], scorer))
+        copied += cursor.rowcount
+
+    cursor.execute("PRAGMA table_info(candidates)")
+    columns = {col[1] for col in cursor.fetchall()}
+    if {"skills", "experience"} <= columns and canonical_of:
+        cursor.executemany("""
+            UPDATE candidates SET
+                skills = (SELECT skills FROM candidates c WHERE c.id = ?),
+                experience = (SELECT experience FROM candidates c WHERE c.id = ?)
+            WHERE id = ?
+        """, [(canonical_id, canonical_id, candidate_id) for candidate_id, canonical_id in canonical_of.items()])
+    return copied
+
+def build_job_index(jobs, kind=MATCH_INDEX):
+    """Vector index over the JD summaries of `jobs` ((id, jd_summary) rows)."""
+    jd_matrix = build_embedding_matrix([jd_summary for _, jd_summary in jobs])
+    return vector_index.build_index(
+        [job_id for job_id, _ in jobs], jd_matrix, kind=kind,
+        n_lists=MATCH_IVF_LISTS or None, n_probe=MATCH_IVF_PROBE
+    )
+
+def retrieve_top_k_pairs(candidates, jobs, k, kind=MATCH_INDEX):
+    """First retrieval stage: the (candidate_id, job_id) pairs for each CV's k nearest jobs."""
+    index = build_job_index(jobs, kind)
+    cv_matrix = build_embedding_matrix([cv_text for _, cv_text in candidates])
+    hits = index.search(cv_matrix, k)
+    return {
+        (candidate_id, job_id)
+        for (candidate_id, _), neighbours in zip(candidates, hits)
+        for job_id, _ in neighbours
+    }
+
+@metrics.track_stage("matching")
+def process_candidate_matching(progress=None):
+    """Enhanced matching with multi-factor scoring and LLM-based parsing.
+    
+    Only candidate/job pairs whose CV text, JD summary or scorer changed since
+    they were last scored are recomputed; each candidate's best match is then
+    re-derived from candidate_job_scores. With MATCH_TOP_K set, only each
+    CV's top-K jobs from the vector index are scored. Near-duplicate CVs
+    (see dedup.py) copy their canonical candidate's scores.
+
+    `progress(done, total, message)` is called as jobs are profiled and
+    candidates are profiled and scored. Returns a summary dict.
+    """
+    conn = db.connect()
+    try:
+        return _match_all(conn, progress)
+    finally:
+        # Also reached when the task is cancelled mid-run
+        conn.close()
+
+def _match_all(conn, progress):
     cursor = conn.cursor()
+    ensure_score_table(cursor)
 
-    cursor.execute("SELECT id, cv_text FROM candidates WHERE match_score IS NULL")
-    candidates = cursor.fetchall()
+    cursor.execute("SELECT id, cv_text FROM candidates")
+    all_candidates = cursor.fetchall()
 
     cursor.execute("SELECT id, jd_summary FROM jobs WHERE jd_summary IS NOT NULL")
-    jobs = cursor.fetchall()
+    all_jobs = cursor.fetchall()
 
-    if not candidates:
-        print("ℹ️  No new candidates to process.")
-        conn.close()
-        return
+    # Forget scores for candidates or jobs that no longer exist
+    cursor.execute("DELETE FROM candidate_job_scores WHERE candidate_id NOT IN (SELECT id FROM candidates)")
+    cursor.execute("""
+        DELETE FROM candidate_job_scores
+        WHERE job_id NOT IN (SELECT id FROM jobs WHERE jd_summary IS NOT NULL)
+    """)
+    conn.commit()
+
+    if not all_candidates:
+        print("ℹ️  No candidates to process.")
+        return {"candidates": 0, "jobs": len(all_jobs), "pairs_scored": 0}
     
-    if not jobs:
+    if not all_jobs:
         print("⚠️  No job descriptions available.")
-        conn.close()
-        return
+        return {"candidates": len(all_candidates), "jobs": 0, "pairs_scored": 0}
+
+    cv_hashes = {candidate_id: content_hash(cv_text) for candidate_id, cv_text in all_candidates}
+    jd_hashes = {job_id: content_hash(jd_summary) for job_id, jd_summary in all_jobs}
+    stale_pairs = find_stale_pairs(cursor, cv_hashes, jd_hashes)
+
+    # Near-duplicate CVs are not profiled or scored; they copy their canonical CV's results
+    canonical_of = {
+        candidate_id: canonical_id
+        for candidate_id, canonical_id in dedup.canonical_map(cursor).items()
+        if candidate_id in cv_hashes and canonical_id in cv_hashes
+    }
+    duplicate_pairs = {pair for pair in stale_pairs if pair[0] in canonical_of}
+    stale_pairs -= duplicate_pairs
+    if canonical_of:
+        print(f"🔗 {len(canonical_of)} near-duplicate candidates reuse their canonical CV's profile and scores")
+
+    if stale_pairs and MATCH_TOP_K and len(all_jobs) > MATCH_TOP_K:
+        # Two-stage retrieval: the full scorer only sees each CV's nearest jobs
+        stale_candidate_ids = {candidate_id for candidate_id, _ in stale_pairs}
+        retrieved = retrieve_top_k_pairs(
+            [c for c in all_candidates if c[0] in stale_candidate_ids], all_jobs, MATCH_TOP_K
+        )
+        skipped = len(stale_pairs - retrieved)
+        stale_pairs &= retrieved
+        print(f"🔎 Top-{MATCH_TOP_K} retrieval ({MATCH_INDEX} index): "
+              f"{len(stale_pairs)} pairs kept, {skipped} skipped")
+
+    if not stale_pairs:
+        pairs_copied = copy_canonical_results(cursor, duplicate_pairs, canonical_of, cv_hashes, jd_hashes)
+        refresh_best_matches(cursor)
+        conn.commit()
+        print("ℹ️  All candidate/job scores are up to date.")
+        return {"candidates": len(all_candidates), "jobs": len(all_jobs), "pairs_scored": 0,
+                "pairs_copied": pairs_copied}
+
+    # Only profile the candidates and jobs that take part in a stale pair
+    stale_candidate_ids = {candidate_id for candidate_id, _ in stale_pairs}
+    stale_job_ids = {job_id for _, job_id in stale_pairs}
+    candidates = [c for c in all_candidates if c[0] in stale_candidate_ids]
+    jobs = [j for j in all_jobs if j[0] in stale_job_ids]
+
+    # One step per job profile, candidate profile and scored candidate
+    total_steps = len(jobs) + 2 * len(candidates)
+    steps_done = [0]
+
+    def report(message):
+        steps_done[0] += 1
+        if progress:
+            progress(steps_done[0], total_steps, message)
 
     print(f"\n{'='*70}")
     print(f"🔍 ENHANCED MATCHING SYSTEM v3.0 (LLM-Based Parsing)")
     print(f"{'='*70}")
-    print(f"📋 Candidates: {len(candidates)} | 💼 Jobs: {len(jobs)}")
+    print(f"📋 Candidates: {len(candidates)}/{len(all_candidates)} | 💼 Jobs: {len(jobs)}/{len(all_jobs)}")
+    print(f"🔁 Pairs to score: {len(stale_pairs)} of {len(all_candidates) * len(all_jobs)}")
     print(f"{'='*70}\n")
 
-    # Pre-process job descriptions
+    # Embed every CV and JD once and score all pairs semantically in one matmul
+    print("🧮 Computing semantic similarity matrix...")
+    cv_matrix = build_embedding_matrix([cv_text for _, cv_text in candidates])
+    jd_matrix = build_embedding_matrix([jd_summary for _, jd_summary in jobs])
+    similarity_matrix = compute_similarity_matrix(cv_matrix, jd_matrix)
+    print(f"  ✓ {similarity_matrix.shape[0]}×{similarity_matrix.shape[1]} similarity matrix ready\n")
+
+    # Pre-process job descriptions into reusable profiles (LLM calls fan out)
     print("🔄 Analyzing job requirements...\n")
-    job_requirements = {}
-    for job_id, jd_summary in jobs:
-        jd_extracted = extract_jd_requirements(jd_summary)
-        jd_info = parse_jd_extraction(jd_extracted)
-        job_requirements[job_id] = {
-            "summary": jd_summary,
-            "extracted": jd_extracted,
-            "parsed": jd_info
-        }
-        print(f"  ✓ Job {job_id}: {len(jd_info['required_skills'])} required, "
-              f"{len(jd_info['preferred_skills'])} preferred, {len(jd_info['keywords'])} keywords")
+    job_profiles = llm_client.map_concurrent(
+        lambda i: build_job_profile(jobs[i][0], jobs[i][1], embedding=jd_matrix[i]),
+        range(len(jobs)),
+        on_result=lambda _, job: report(f"Analyzed job {job.job_id}")
+    )
+    for job in job_profiles:
+        print(f"  ✓ Job {job.job_id}: {len(job.required_skills)} required, "
+              f"{len(job.preferred_skills)} preferred, {len(job.keywords)} keywords")
     
     print(f"\n{'='*70}\n")
 
+    # Extract every candidate profile up front (LLM calls fan out)
+    print(f"📊 Extracting {len(candidates)} candidate profiles...\n")
+    if CV_BATCH_SIZE > 1:
+        prefetch_cv_profiles(candidates)
+    candidate_profiles = llm_client.map_concurrent(
+        lambda i: build_candidate_profile(candidates[i][0], candidates[i][1], embedding=cv_matrix[i]),
+        range(len(candidates)),
+        on_result=lambda _, candidate: report(f"Profiled candidate {candidate.candidate_id}")
+    )
+    store_profile_columns(cursor, candidate_profiles)
+    conn.commit()
+    print(f"\n{'='*70}\n")
+
+    scorer = _scorer_tag()
+    pairs_scored = 0
+
     # Process each candidate
-    for idx, (candidate_id, cv_text) in enumerate(candidates, 1):
+    for idx, candidate in enumerate(candidate_profiles, 1):
+        candidate_start = time.perf_counter()
+        candidate_id = candidate.candidate_id
         print(f"👤 Candidate {candidate_id} ({idx}/{len(candidates)})")
         print(f"{'-'*70}")
         
-        print("  📊 Extracting profile...")
-        cv_summary = extract_skills_from_cv(cv_text)
-        cv_info = parse_cv_extraction(cv_summary)
-        
-        print(f"  ✓ Skills: {len(cv_info['skills'])}", end="")
-        if cv_info['skills'][:3]:
-            print(f" ({', '.join(cv_info['skills'][:3])}...)")
+        print(f"  ✓ Skills: {len(candidate.skills)}", end="")
+        if candidate.skills[:3]:
+            print(f" ({', '.join(candidate.skills[:3])}...)")
         else:
             print()
-        print(f"  ✓ Experience: {cv_info['experience_years']} years")
-        print(f"  ✓ Keywords: {len(cv_info['keywords'])}", end="")
-        if cv_info['keywords'][:3]:
-            print(f" ({', '.join(cv_info['keywords'][:3])}...)")
+        print(f"  ✓ Experience: {candidate.experience_years} years")
+        print(f"  ✓ Keywords: {len(candidate.keywords)}", end="")
+        if candidate.keywords[:3]:
+            print(f" ({', '.join(candidate.keywords[:3])}...)")
         else:
             print()
 
-        best_score = 0
-        best_job_id = None
-        best_breakdown = None
-
-        print(f"\n  🎯 Matching against {len(jobs)} positions:\n")
-        for job_id, jd_summary in jobs:
-            jd_extracted = job_requirements[job_id]["extracted"]
-            
-            score, breakdown = compute_match_score(
-                jd_extracted, 
-                cv_summary,
-                cv_text,
-                jd_summary
-            )
-            
+        results = []
+        for job_idx, job in enumerate(job_profiles):
+            if (candidate_id, job.job_id) not in stale_pairs:
+                continue
+            semantic = similarity_matrix[idx - 1, job_idx]
+            score, breakdown = score_profiles(candidate, job, semantic_score=semantic)
+            results.append((score, breakdown, job, semantic))
+
+        if SKILL_MATCH_MODE == "llm_rerank":
+            # Let the LLM rescore skills for this candidate's most promising jobs only
+            results.sort(key=lambda r: r[0], reverse=True)
+            for pos, (_, _, job, semantic) in enumerate(results[:SKILL_RERANK_TOP_K]):
+                score, breakdown = score_profiles(candidate, job, semantic_score=semantic, use_llm_skills=True)
+                results[pos] = (score, breakdown, job, semantic)
+
+        print(f"\n  🎯 Matching against {len(results)} positions:\n")
+        for score, breakdown, job, _ in results:
+            job_id = job.job_id
             print(f"    Job {job_id}: {score}% match")
             print(f"      ├─ Skills: {breakdown['skills']}% (Req: {breakdown['required_skills']}%, Pref: {breakdown['preferred_skills']}%)")
             print(f"      ├─ Keywords: {breakdown['keywords']}%")
             print(f"      ├─ Semantic: {breakdown['semantic']}%")
             print(f"      └─ Experience: {breakdown['experience']}%")
 
-            if score > best_score:
-                best_score = score
-                best_job_id = job_id
-                best_breakdown = breakdown
-
         try:
-            cursor.execute(
-                "UPDATE candidates SET match_score = ?, matched_job_id = ? WHERE id = ?",
-                (best_score, best_job_id, candidate_id)
-            )
-            
-            print(f"\n  ✅ BEST MATCH: Job {best_job_id} with {best_score}% compatibility")
-            print(f"     Skills={best_breakdown['skills']}% | Keywords={best_breakdown['keywords']}% | "
-                  f"Semantic={best_breakdown['semantic']}% | Exp={best_breakdown['experience']}%")
-            
+            cursor.executemany("""
+                INSERT OR REPLACE INTO candidate_job_scores
+                (candidate_id, job_id, cv_hash, jd_hash, scorer, score, breakdown)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (candidate_id, job.job_id, cv_hashes[candidate_id], jd_hashes[job.job_id],
+                 scorer, score, json.dumps(breakdown))
+                for score, breakdown, job, _ in results
+            ])
+            conn.commit()
+            pairs_scored += len(results)
+            PAIRS_SCORED.inc(len(results))
+            if results:
+                best_score, _, best_job, _ = max(results, key=lambda r: r[0])
+                event_bus.publish("score_written", candidate_id=candidate_id, pairs=len(results),
+                                  best_score=best_score, best_job_id=best_job.job_id)
         except Exception as e:
             print(f"  ❌ Database error: {e}")
         
         print(f"{'-'*70}\n")
+        CANDIDATE_SCORING_SECONDS.observe(time.perf_counter() - candidate_start)
+        report(f"Scored candidate {candidate_id}")
+
+    pairs_copied = copy_canonical_results(cursor, duplicate_pairs, canonical_of, cv_hashes, jd_hashes)
 
+    # Best match per candidate comes from all stored scores, not just this run's
+    refresh_best_matches(cursor)
     conn.commit()
-    conn.close()
+    # candidate_job_scores may have just been created; add its indexes
+    database_setup.apply_migrations(verbose=False)
+    event_bus.publish("matching_completed", candidates=len(candidates), pairs_scored=pairs_scored)
     
+    cache_stats = embedding_cache.get_stats()
     print(f"{'='*70}")
-    print(f"🎉 MATCHING COMPLETE - {len(candidates)} candidates processed")
+    print(f"🎉 MATCHING COMPLETE - {pairs_scored} pairs scored for {len(candidates)} candidates")
+    if pairs_copied:
+        print(f"🔗 {pairs_copied} pairs copied from canonical candidates")
+    print(f"🧠 Embedding cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+          f"{cache_stats['misses']} misses (hit rate {cache_stats['hit_rate']:.0%})")
+    llm_stats = llm_cache.get_stats()
+    print(f"💾 LLM cache: {llm_stats['hits'] + llm_stats['coalesced']} hits, "
+          f"{llm_stats['misses']} misses (hit rate {llm_stats['hit_rate']:.0%})")
+    parse_stats = json_repair.get_stats()
+    print(f"🧩 LLM JSON: {parse_stats['clean']} clean, {parse_stats['repaired']} repaired locally, "
+          f"{parse_stats['llm_fallback']} LLM fallbacks")
     print(f"{'='*70}\n")
+    return {"candidates": len(candidates), "jobs": len(jobs), "pairs_scored": pairs_scored,
+            "pairs_copied": pairs_copied}
+
+# Candidates are read and rescored this many at a time when ranking a job
+RANK_BATCH_SIZE = 200
+
+def get_job_summary(job_id):
+    """Return the JD summary for `job_id`, or None if the job is missing or not summarized."""
+    conn = db.connect()
+    row = conn.execute("SELECT jd_summary FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    conn.close()
+    return row[0] if row and row[0] else None
+
+def rank_candidates_for_job(job_id, jd_summary, top=20, offset=0, after=None, rescore=True, max_rescore=None):
+    """Rank every candidate for one job, keeping only the best `offset + top` in a bounded heap.
+
+    Candidates are read in batches joined to their stored pair scores.
+    Missing or outdated scores are recomputed and persisted, unless
+    `rescore` is False, in which case stored scores are used as-is and
+    unscored candidates are skipped. At most `max_rescore` candidates are
+    recomputed (None = no limit); past that they are treated as with
+    rescore=False and counted as `pending`. `after=(score, candidate_id)` starts
+    the ranking just below that entry (keyset pagination), so deep pages
+    never hold more than `top` results.
+
+    Yields dicts as it goes:
+      {"type": "scored", ...}     each freshly computed pair score
+      {"type": "candidate", ...}  the requested page, best first
+      {"type": "done", ...}       counts and the `next` cursor (or None)
+    """
+    limit = top if after else offset + top
+    heap = []  # min-heap of (score, -candidate_id, name, email, breakdown), at most limit + 1
+    jd_hash = content_hash(jd_summary)
+    scorer = _scorer_tag()
+    job = None
+    considered = rescored = pending = 0
+
+    def push(candidate_id, name, email, score, breakdown):
+        if after and (score, -candidate_id) >= (after[0], -after[1]):
+            return
+        entry = (score, -candidate_id, name, email, breakdown)
+        if len(heap) <= limit:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    conn = db.connect()
+    cursor = conn.cursor()
+    ensure_score_table(cursor)
+    conn.commit()
+    canonical_of = dedup.canonical_map(cursor)
+    last_id = 0
+    try:
+        while True:
+            # Each batch is fully fetched so no read is open while scores are written
+            cursor.execute("""
+                SELECT c.id, c.name, c.email, c.cv_text, s.cv_hash, s.jd_hash, s.scorer, s.score, s.breakdown
+                FROM candidates c
+                LEFT JOIN candidate_job_scores s ON s.candidate_id = c.id AND s.job_id = ?
+                WHERE c.id > ?
+                ORDER BY c.id
+                LIMIT ?
+            """, (job_id, last_id, RANK_BATCH_SIZE))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            new_scores = []
+            for candidate_id, name, email, cv_text, cv_hash, pair_jd_hash, pair_scorer, score, breakdown in rows:
+                considered += 1
+                fresh = (score is not None and pair_jd_hash == jd_hash and pair_scorer == scorer
+                         and cv_hash == content_hash(cv_text))
+                can_rescore = rescore and (max_rescore is None or rescored + len(new_scores) < max_rescore)
+                if not fresh and rescore and not can_rescore:
+                    pending += 1
+                if fresh or (score is not None and not can_rescore):
+                    push(candidate_id, name, email, score, json.loads(breakdown) if breakdown else None)
+                    continue
+                if not can_rescore:
+                    continue
+
+                if job is None:
+                    job = build_job_profile(job_id, jd_summary, embedding=get_embedding(jd_summary))
+                profile_text = cv_text
+                if candidate_id in canonical_of:
+                    # A near-duplicate reuses its canonical CV's extracted profile
+                    row = cursor.execute("SELECT cv_text FROM candidates WHERE id = ?",
+                                         (canonical_of[candidate_id],)).fetchone()
+                    profile_text = row[0] if row else cv_text
+                candidate = build_candidate_profile(candidate_id, profile_text)
+                score, breakdown = score_profiles(candidate, job)
+                new_scores.append((candidate_id, job_id, content_hash(cv_text), jd_hash,
+                                   scorer, score, json.dumps(breakdown)))
+                push(candidate_id, name, email, score, breakdown)
+                yield {"type": "scored", "candidate_id": candidate_id, "score": score}
+
+            if new_scores:
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO candidate_job_scores
+                    (candidate_id, job_id, cv_hash, jd_hash, scorer, score, breakdown)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, new_scores)
+                conn.commit()
+                rescored += len(new_scores)
+
+        if rescored:
+            refresh_best_matches(cursor)
+            conn.commit()
+    finally:
+        conn.close()
+
+    ranked = sorted(heap, key=lambda e: (-e[0], -e[1]))
+    has_more = len(ranked) > limit
+    page = ranked[:limit][0 if after else offset:]
+    for position, (score, neg_id, name, email, breakdown) in enumerate(page):
+        yield {
+            "type": "candidate",
+            "rank": None if after else offset + position + 1,
+            "candidate_id": -neg_id,
+            "name": name,
+            "email": email,
+            "score": score,
+            "breakdown": breakdown,
+        }
+
+    next_cursor = None
+    if has_more and page:
+        next_cursor = {"after_score": page[-1][0], "after_id": -page[-1][1]}
+    yield {"type": "done", "job_id": job_id, "returned": len(page), "considered": considered,
+           "rescored": rescored, "pending": pending, "next": next_cursor}
+
+def evaluate_top_k_recall(k_values=(1, 3, 5, 10), kinds=("flat", "ivf")):
+    """Compare top-K retrieval with exhaustive scoring of every candidate/job pair.
+
+    For each index type and K reports:
+      - recall@K: share of each CV's K best jobs (by full score) that retrieval returns
+      - best-match recall: share of CVs whose single best job is among the K retrieved
+    Nothing is written to the database.
+    """
+    conn = db.connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, cv_text FROM candidates")
+    candidates = cursor.fetchall()
+    cursor.execute("SELECT id, jd_summary FROM jobs WHERE jd_summary IS NOT NULL")
+    jobs = cursor.fetchall()
+    conn.close()
+
+    if not candidates or not jobs:
+        print("⚠️  Need candidates and summarized jobs to measure recall.")
+        return {}
+
+    # Ground truth: full multi-factor score for every pair
+    cv_matrix = build_embedding_matrix([cv_text for _, cv_text in candidates])
+    jd_matrix = build_embedding_matrix([jd_summary for _, jd_summary in jobs])
+    similarity_matrix = compute_similarity_matrix(cv_matrix, jd_matrix)
+    job_profiles = llm_client.map_concurrent(
+        lambda i: build_job_profile(jobs[i][0], jobs[i][1], embedding=jd_matrix[i]), range(len(jobs))
+    )
+    candidate_profiles = llm_client.map_concurrent(
+        lambda i: build_candidate_profile(candidates[i][0], candidates[i][1], embedding=cv_matrix[i]),
+        range(len(candidates))
+    )
+    exhaustive = []
+    for i, candidate in enumerate(candidate_profiles):
+        scored = [(score_profiles(candidate, job, semantic_score=similarity_matrix[i, j])[0], job.job_id)
+                  for j, job in enumerate(job_profiles)]
+        exhaustive.append([job_id for _, job_id in sorted(scored, key=lambda s: (-s[0], s[1]))])
+
+    results = {}
+    max_k = max(k_values)
+    print(f"\n📏 Top-K recall vs exhaustive scoring ({len(candidates)} CVs × {len(jobs)} jobs)")
+    print(f"{'index':<6} {'K':>4} {'recall@K':>9} {'best-match':>11}")
+    for kind in kinds:
+        index = vector_index.build_index(
+            [job_id for job_id, _ in jobs], jd_matrix, kind=kind,
+            n_lists=MATCH_IVF_LISTS or None, n_probe=MATCH_IVF_PROBE
+        )
+        hits = [[job_id for job_id, _ in row] for row in index.search(cv_matrix, max_k)]
+        for k in k_values:
+            recall = np.mean([vector_index.recall_at_k(h[:k], truth[:k]) for h, truth in zip(hits, exhaustive)])
+            best = np.mean([truth[0] in h[:k] for h, truth in zip(hits, exhaustive)])
+            results[(kind, k)] = {"recall_at_k": float(recall), "best_match_recall": float(best)}
+            print(f"{kind:<6} {k:>4} {recall:>9.1%} {best:>11.1%}")
+    return results
 
 if __name__ == "__main__":
-    process_candidate_matching()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score candidates against job descriptions")
+    parser.add_argument("--recall-at", type=int, nargs="+", metavar="K",
+                        help="Measure top-K retrieval recall against exhaustive scoring instead of matching")
+    args = parser.parse_args()
+
+    if args.recall_at:
+        evaluate_top_k_recall(args.recall_at)
+    else:
+        process_candidate_matching()
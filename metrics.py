@@ -0,0 +1,190 @@
+"""
+In-process metrics in the Prometheus text exposition format.
+
+Pipeline stages, the LLM client, the mailer and the Flask app record
+counters and histograms here; /api/metrics renders them with render().
+Modules create their metrics at import time with counter() / histogram()
+(asking twice for the same name returns the same metric) and record with
+labels as keyword arguments:
+
+    LLM_SECONDS = metrics.histogram("llm_request_duration_seconds", "...", ["purpose"])
+    LLM_SECONDS.observe(0.42, purpose="cv_extraction")
+
+Values live in the process that recorded them, like event_bus: only what
+runs inside the API server (including its background tasks) shows up at
+/api/metrics.
+"""
+
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; spans a fast SQLite query to a slow local-model generation
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_registry = {}
+_collectors = []
+_lock = threading.Lock()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())]
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the `with` block takes, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+def _register(cls, name, help, labelnames, **kwargs):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, labelnames, **kwargs)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"metric {name} is already registered with a different type or labels")
+        return metric
+
+def counter(name, help, labelnames=()):
+    return _register(Counter, name, help, labelnames)
+
+def histogram(name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, help, labelnames, buckets=buckets)
+
+def register_collector(name, help, type, collect, labelnames=()):
+    """Expose values read at scrape time, e.g. a module's existing stats dict.
+
+    `collect()` returns a number, or a dict mapping label-value tuples to
+    numbers when `labelnames` is given.
+    """
+    with _lock:
+        _collectors.append((name, help, type, tuple(labelnames), collect))
+
+def _render_collector(name, help, type, labelnames, collect):
+    try:
+        values = collect()
+    except Exception:
+        # A failing source (e.g. the database is locked) must not break the scrape
+        return []
+    if not labelnames:
+        values = {(): values}
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+    for key, value in sorted(values.items()):
+        key = key if isinstance(key, tuple) else (key,)
+        lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+    return lines
+
+def track_stage(stage):
+    """Decorator recording a pipeline stage's runs and duration."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                STAGE_RUNS.inc(stage=stage, outcome=outcome)
+                STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorate
+
+def render():
+    """Every metric in the Prometheus text format (version 0.0.4)."""
+    with _lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+        collectors = list(_collectors)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    for collector in collectors:
+        lines.extend(_render_collector(*collector))
+    return "\n".join(lines) + "\n"
+
+STAGE_RUNS = counter("pipeline_stage_runs_total", "Pipeline stage runs by outcome", ["stage", "outcome"])
+STAGE_SECONDS = histogram("pipeline_stage_duration_seconds", "Wall time of a pipeline stage run", ["stage"],
+                          buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600))
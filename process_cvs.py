@@ -1,30 +1,40 @@
+import multiprocessing
 import os
 import re
-import sqlite3
-import fitz  
-from docx import Document
-from config import DB_PATH
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import database_setup
+import db
+import dedup
+import event_bus
+import metrics
+import text_extraction
+from config import CV_INGEST_WORKERS, CV_MAX_PAGES, CV_MAX_CHARS
 
 CV_FOLDER = "data/CVs1"  
 
+CV_FILES = metrics.counter("cv_files_total", "CV files ingested by outcome", ["outcome"])
+CV_EXTRACT_SECONDS = metrics.histogram("cv_text_extraction_seconds", "PDF/DOCX text extraction time per file",
+                                       ["format"])
+
+# Ingestion runs in request and task threads that hold SQLite connections and
+# locks; spawned workers start clean instead of forking a copy of that state
+_WORKER_CONTEXT = multiprocessing.get_context("spawn")
+
 def extract_text_from_pdf(pdf_path):
-    text = ""
     try:
-        with fitz.open(pdf_path) as doc:
-            for page in doc:
-                text += page.get_text("text") + "\n"
+        return text_extraction.extract_pdf_text(pdf_path, max_pages=CV_MAX_PAGES, max_chars=CV_MAX_CHARS)
     except Exception as e:
         print(f"Error reading PDF {pdf_path}: {e}")
-    return text.strip()
+        return ""
 
 def extract_text_from_docx(docx_path):
-    text = ""
     try:
-        doc = Document(docx_path)
-        text = "\n".join([para.text for para in doc.paragraphs])
+        return text_extraction.extract_docx_text(docx_path, max_chars=CV_MAX_CHARS)
     except Exception as e:
         print(f"Error reading DOCX {docx_path}: {e}")
-    return text.strip()
+        return ""
 
 def get_candidate_name(filename):
     name = os.path.splitext(filename)[0]
@@ -34,12 +44,160 @@ def extract_email(text):
     match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', text)
     return match.group(0) if match else None
 
+def extract_cv_file(file_path):
+    """Extract one CV in a worker process. Never raises; errors are reported in the result."""
+    start = time.perf_counter()
+    filename = os.path.basename(file_path)
+    text, error = "", None
+    try:
+        if filename.lower().endswith(".pdf"):
+            text = extract_text_from_pdf(file_path)
+        elif filename.lower().endswith(".docx"):
+            text = extract_text_from_docx(file_path)
+        else:
+            error = "unsupported file type"
+    except Exception as e:
+        error = str(e)
+    return {
+        "filename": filename,
+        "text": text,
+        "error": error,
+        "seconds": time.perf_counter() - start,
+    }
+
+def _extract_isolated(file_path):
+    """Extract one file in its own process so a crash only affects that file."""
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=_WORKER_CONTEXT) as executor:
+            return executor.submit(extract_cv_file, file_path).result()
+    except BrokenProcessPool:
+        return {"filename": os.path.basename(file_path), "text": "",
+                "error": "extraction worker crashed", "seconds": 0.0}
+
+def extract_files_parallel(file_paths, max_workers=None):
+    """Yield extraction results in completion order using a process pool.
+
+    If a worker dies (e.g. a PDF crashes the parser), the files that had not
+    finished are re-run one process per file, so one bad file cannot take
+    the rest of the batch down with it.
+    """
+    workers = max(1, min(max_workers or CV_INGEST_WORKERS, len(file_paths)))
+    if workers == 1:
+        for path in file_paths:
+            yield extract_cv_file(path)
+        return
+
+    finished = set()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_WORKER_CONTEXT) as executor:
+            futures = {executor.submit(extract_cv_file, path): path for path in file_paths}
+            try:
+                for future in as_completed(futures):
+                    result = future.result()
+                    finished.add(futures[future])
+                    yield result
+            except GeneratorExit:
+                # Consumer stopped early (e.g. task cancelled): drop queued files
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        return
+    except BrokenProcessPool:
+        remaining = [p for p in file_paths if p not in finished]
+        print(f" ⚠️  Extraction worker crashed; retrying {len(remaining)} file(s) in isolation")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_extract_isolated, path) for path in remaining]
+        for future in as_completed(futures):
+            yield future.result()
+
+def ingest_cv_files(cursor, cv_folder, filenames, placeholder_email, progress=None):
+    """Extract CVs in parallel and bulk-insert them; returns the number of candidates inserted.
+
+    A candidate row the database rejects is skipped; the rest are still inserted.
+
+    With `placeholder_email` False, CVs without an email address are skipped
+    instead of getting a generated one. `progress(done, total, message)` is
+    called after each file.
+    """
+    paths = [os.path.join(cv_folder, f) for f in filenames]
+    rows = []
+    failed = 0
+    batch_start = time.perf_counter()
+
+    for done, result in enumerate(extract_files_parallel(paths), 1):
+        if progress:
+            progress(done, len(paths), f"Extracted {result['filename']}")
+        filename = result["filename"]
+        CV_EXTRACT_SECONDS.observe(result["seconds"], format=os.path.splitext(filename)[1].lower().lstrip("."))
+        if result["error"]:
+            print(f" ❌ {filename}: {result['error']} ({result['seconds']:.2f}s)")
+            event_bus.publish("candidate_processed", file=filename, status="failed", error=result["error"])
+            CV_FILES.inc(outcome="failed")
+            failed += 1
+            continue
+
+        text = result["text"]
+        if not text.strip():
+            print(f" No text extracted from {filename}, skipping... ({result['seconds']:.2f}s)")
+            event_bus.publish("candidate_processed", file=filename, status="failed", error="no text")
+            CV_FILES.inc(outcome="no_text")
+            failed += 1
+            continue
+
+        candidate_name = get_candidate_name(filename)
+        email = extract_email(text)
+        if not email:
+            if not placeholder_email:
+                print(f"No email found in {candidate_name}'s CV. Skipping.")
+                event_bus.publish("candidate_processed", file=filename, status="skipped", error="no email")
+                CV_FILES.inc(outcome="skipped")
+                continue
+            email = f"{candidate_name.lower().replace(' ', '')}@example.com"
+
+        rows.append((candidate_name, email, text))
+        print(f" Extracted: {candidate_name} ({email}) in {result['seconds']:.2f}s")
+        event_bus.publish("candidate_processed", file=filename, status="extracted", name=candidate_name)
+        CV_FILES.inc(outcome="extracted")
+
+    # One statement for the whole batch; if any row is rejected, undo the
+    # partial batch and insert row by row so only that candidate is skipped
+    insert = "INSERT INTO candidates (name, email, cv_text) VALUES (?, ?, ?)"
+    if not cursor.connection.in_transaction:
+        cursor.execute("BEGIN")
+    cursor.execute("SAVEPOINT ingest_batch")
+    try:
+        cursor.executemany(insert, rows)
+        inserted = len(rows)
+    except Exception as e:
+        print(f" Batch insert failed ({e}); inserting candidates one by one")
+        cursor.execute("ROLLBACK TO ingest_batch")
+        inserted = 0
+        for row in rows:
+            try:
+                cursor.execute(insert, row)
+                inserted += 1
+            except Exception as e:
+                print(f" Error inserting candidate '{row[0]}': {e}")
+                failed += 1
+    cursor.execute("RELEASE ingest_batch")
+
+    duplicates = dedup.index_candidates(cursor)
+    if duplicates:
+        print(f" 🔗 {duplicates} near-duplicate CVs linked to an earlier candidate; "
+              f"they reuse its profile and scores")
+
+    elapsed = time.perf_counter() - batch_start
+    rate = len(paths) / elapsed if elapsed else 0
+    print(f" Inserted {inserted} candidates ({failed} failed) in {elapsed:.2f}s ({rate:.1f} files/s)")
+    return inserted
+
+@metrics.track_stage("cv_ingestion")
 def process_cvs():
     if not os.path.exists(CV_FOLDER):
         print(f"CV folder not found: {CV_FOLDER}")
         return
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = db.connect()
     cursor = conn.cursor()
 
     # Clear existing candidates data for fresh processing
@@ -48,6 +206,8 @@ def process_cvs():
     cursor.execute("DELETE FROM shortlisted_candidates")
     conn.commit()
     print(" Existing candidate data cleared.")
+    # Adds the near-duplicate columns once candidates has cv_text
+    database_setup.apply_migrations(verbose=False)
 
     # Ensure email column exists
     cursor.execute("PRAGMA table_info(candidates)")
@@ -58,56 +218,31 @@ def process_cvs():
     files = os.listdir(CV_FOLDER)
     print(f"Found {len(files)} files in '{CV_FOLDER}'")
 
+    cv_files = []
     for file in files:
-        file_path = os.path.join(CV_FOLDER, file)
-        if not os.path.isfile(file_path):
+        if not os.path.isfile(os.path.join(CV_FOLDER, file)):
             continue
-
-        ext = file.lower().split(".")[-1]
-        if ext not in ["pdf", "docx"]:
+        if file.lower().split(".")[-1] not in ["pdf", "docx"]:
             print(f"Skipping unsupported file: {file}")
             continue
+        cv_files.append(file)
 
-        if ext == "pdf":
-            text = extract_text_from_pdf(file_path)
-        elif ext == "docx":
-            text = extract_text_from_docx(file_path)
-
-        if not text:
-            print(f"No text extracted from {file}, skipping...")
-            continue
-
-        candidate_name = get_candidate_name(file)
-        email = extract_email(text)
-
-        if not email:
-            print(f"No email found in {candidate_name}'s CV. Skipping.")
-            continue
-
-        try:
-            cursor.execute(
-                "INSERT INTO candidates (name, email, cv_text) VALUES (?, ?, ?)",
-                (candidate_name, email, text)
-            )
-            print(f" Inserted: {candidate_name} ({email})")
-
-        except Exception as e:
-            print(f" Error inserting candidate '{candidate_name}': {e}")
-            continue
+    ingest_cv_files(cursor, CV_FOLDER, cv_files, placeholder_email=False)
 
     conn.commit()
     conn.close()
     print("CV processing complete.")
 
-def process_cvs_from_folder(cv_folder):
+@metrics.track_stage("cv_ingestion")
+def process_cvs_from_folder(cv_folder, progress=None):
     """Process CVs from a specific folder (for uploaded files)"""
     if not os.path.exists(cv_folder):
         print(f"CV folder not found: {cv_folder}")
-        return
+        return {"files": 0, "candidates": 0}
 
     print(f"🔍 Processing CVs from folder: {cv_folder}")
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = db.connect()
     cursor = conn.cursor()
 
     # Clear existing candidates data for fresh processing
@@ -116,45 +251,19 @@ def process_cvs_from_folder(cv_folder):
     cursor.execute("DELETE FROM shortlisted_candidates")
     conn.commit()
     print(" Existing candidate data cleared.")
+    # Adds the near-duplicate columns once candidates has cv_text
+    database_setup.apply_migrations(verbose=False)
 
     files = [f for f in os.listdir(cv_folder) if f.lower().endswith(('.pdf', '.docx'))]
     print(f" Found {len(files)} CV files to process")
 
-    for filename in files:
-        file_path = os.path.join(cv_folder, filename)
-        candidate_name = get_candidate_name(filename)
-        
-        print(f" Processing: {filename}")
-
-        if filename.lower().endswith('.pdf'):
-            text = extract_text_from_pdf(file_path)
-        elif filename.lower().endswith('.docx'):
-            text = extract_text_from_docx(file_path)
-        else:
-            continue
-
-        if not text.strip():
-            print(f"  No text extracted from {filename}")
-            continue
-
-        email = extract_email(text)
-        if not email:
-            email = f"{candidate_name.lower().replace(' ', '')}@example.com"
-
-        try:
-            cursor.execute(
-                "INSERT INTO candidates (name, email, cv_text) VALUES (?, ?, ?)",
-                (candidate_name, email, text)
-            )
-            print(f" Inserted: {candidate_name} ({email})")
-
-        except Exception as e:
-            print(f" Error inserting candidate '{candidate_name}': {e}")
-            continue
+    inserted = ingest_cv_files(cursor, cv_folder, files, placeholder_email=True, progress=progress)
 
     conn.commit()
     conn.close()
+    event_bus.publish("candidates_ingested", files=len(files), candidates=inserted)
     print(f" CV processing complete. Processed {len(files)} files from {cv_folder}")
+    return {"files": len(files), "candidates": inserted}
 
 if __name__ == "__main__":
     process_cvs()
@@ -1,12 +1,14 @@
-import sqlite3
-from config import DB_PATH
+import db
+import database_setup
+import metrics
 
+@metrics.track_stage("shortlisting")
 def shortlist_candidates(threshold=50):
     """
     Shortlists candidates with match score ≥ threshold and stores them
     in 'shortlisted_candidates' table, avoiding duplicates.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = db.connect()
     cursor = conn.cursor()
 
     # Create table if it doesn't exist
@@ -47,6 +49,8 @@ def shortlist_candidates(threshold=50):
 
     conn.commit()
     conn.close()
+    # The shortlist table may have just been created; add its indexes
+    database_setup.apply_migrations(verbose=False)
     print(f"{len(shortlisted)} candidates shortlisted with match score ≥ {threshold}%.")
 
 # Run the function
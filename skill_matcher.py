@@ -0,0 +1,418 @@
+"""
+Deterministic local skill matching.
+
+Replaces the per-pair LLM call in compute_skill_similarity_with_llm with a
+canonical skill taxonomy, an alias table and normalized token matching, so a
+candidate x job pair is scored in microseconds. Embedding-nearest-neighbour
+equivalence can be switched on for skills the taxonomy does not know.
+
+Run `python skill_matcher.py --compare data/CVs1` to compare the local
+scores with the LLM scores on a folder of CVs.
+"""
+
+import re
+import time
+from functools import lru_cache
+
+import numpy as np
+
+# Canonical skill -> aliases. Aliases are matched after normalization.
+SKILL_TAXONOMY = {
+    # Programming languages
+    "Python": ["python3", "python 3", "python programming", "python scripting"],
+    "JavaScript": ["js", "javascript es6", "es6", "ecmascript", "java script"],
+    "TypeScript": ["ts"],
+    "Java": ["java se", "java ee", "j2ee", "core java"],
+    "C#": ["c sharp", "csharp", ".net c#"],
+    "C++": ["cpp", "c plus plus"],
+    "C": ["c language", "ansi c"],
+    "Go": ["golang"],
+    "Rust": [],
+    "Ruby": [],
+    "PHP": [],
+    "Scala": [],
+    "Kotlin": [],
+    "Swift": [],
+    "R": ["r language", "r programming", "rstudio"],
+    "MATLAB": [],
+    "SQL": ["structured query language", "sql programming", "sql queries", "t-sql", "tsql", "pl/sql", "plsql", "ansi sql"],
+    "Bash": ["shell scripting", "bash scripting", "unix shell"],
+    "VBA": ["excel vba", "visual basic for applications"],
+    # Data and analytics
+    "Machine Learning": ["ml", "machine learning techniques", "machine learning algorithms", "predictive modeling", "predictive modelling"],
+    "Deep Learning": ["dl", "neural networks", "neural network"],
+    "Natural Language Processing": ["nlp", "text mining", "text analytics"],
+    "Computer Vision": ["image processing"],
+    "Data Analysis": ["data analytics", "data analyses", "analysing data", "analyzing data"],
+    "Data Science": [],
+    "Data Engineering": ["etl", "elt", "data pipelines", "data pipeline"],
+    "Data Visualization": ["data visualisation", "visualization", "visualisation", "dashboards", "dashboarding"],
+    "Statistics": ["statistical analysis", "statistical modeling", "statistical modelling", "applied statistics"],
+    "Forecasting": ["time series", "time series analysis", "time-series forecasting"],
+    "Data Modeling": ["data modelling", "data models"],
+    "Database Design": ["database modeling", "database modelling", "schema design"],
+    "Big Data": [],
+    "Pandas": [],
+    "NumPy": [],
+    "Scikit-learn": ["sklearn", "scikit learn"],
+    "TensorFlow": ["tf"],
+    "PyTorch": ["torch"],
+    "Keras": [],
+    "Spark": ["apache spark", "pyspark"],
+    "Hadoop": ["apache hadoop", "hdfs"],
+    "Kafka": ["apache kafka"],
+    "Airflow": ["apache airflow"],
+    "Power BI": ["powerbi", "microsoft power bi", "ms power bi"],
+    "Tableau": [],
+    "Excel": ["microsoft excel", "ms excel", "advanced excel", "spreadsheets"],
+    "Looker": [],
+    # Databases
+    "PostgreSQL": ["postgres", "psql"],
+    "MySQL": [],
+    "SQL Server": ["mssql", "ms sql", "microsoft sql server"],
+    "Oracle": ["oracle db", "oracle database"],
+    "SQLite": [],
+    "MongoDB": ["mongo"],
+    "Redis": [],
+    "Elasticsearch": ["elastic search", "elk"],
+    "NoSQL": [],
+    "Snowflake": [],
+    # Web and software engineering
+    "React": ["reactjs", "react.js", "react js"],
+    "Angular": ["angularjs", "angular.js"],
+    "Vue": ["vuejs", "vue.js"],
+    "Node.js": ["node", "nodejs", "node js"],
+    "Django": [],
+    "Flask": [],
+    "FastAPI": [],
+    "Spring": ["spring boot", "springboot"],
+    ".NET": ["dotnet", "dot net", "asp.net", ".net core"],
+    "HTML": ["html5"],
+    "CSS": ["css3", "scss", "sass"],
+    "REST APIs": ["rest", "restful", "rest api", "restful apis", "restful api", "api development"],
+    "GraphQL": [],
+    "Microservices": ["microservice architecture"],
+    "Git": ["github", "gitlab", "version control", "bitbucket"],
+    "Linux": ["unix"],
+    "Software Development": ["software engineering", "coding"],
+    "Web Development": ["web dev", "frontend development", "front-end development"],
+    "Object-Oriented Programming": ["oop", "object oriented programming", "object oriented design"],
+    "Testing": ["unit testing", "test automation", "automated testing"],
+    # Cloud and DevOps
+    "AWS": ["amazon web services", "aws cloud"],
+    "Azure": ["microsoft azure", "azure cloud"],
+    "GCP": ["google cloud", "google cloud platform"],
+    "Cloud Computing": ["cloud platforms", "cloud services"],
+    "Docker": ["containers", "containerization", "containerisation"],
+    "Kubernetes": ["k8s"],
+    "CI/CD": ["ci cd", "continuous integration", "continuous delivery", "continuous deployment", "jenkins"],
+    "DevOps": [],
+    "Terraform": ["infrastructure as code", "iac"],
+    # Security
+    "Cybersecurity": ["cyber security", "information security", "infosec"],
+    "Penetration Testing": ["pen testing", "pentesting", "ethical hacking"],
+    "Network Security": [],
+    # Business and domain
+    "Project Management": ["pm", "project planning", "program management"],
+    "Agile": ["scrum", "kanban", "agile methodologies", "agile methodology"],
+    "Product Management": ["product development"],
+    "Business Analysis": ["requirements gathering", "requirements analysis"],
+    "Research": ["research skills", "market research", "academic research"],
+    "Finance": ["financial analysis", "financial modeling", "financial modelling", "corporate finance"],
+    "Accounting": ["bookkeeping"],
+    "Marketing": ["digital marketing"],
+    "Sales": [],
+    "Customer Service": ["customer support", "client support"],
+    "Healthcare": [],
+    # Soft skills
+    "Communication": ["communication skills", "verbal communication", "written communication",
+                      "verbal and written communication"],
+    "Leadership": ["team leadership", "people management", "leading teams"],
+    "Teamwork": ["collaboration", "team player", "team work", "collaborative"],
+    "Problem Solving": ["problem-solving", "troubleshooting", "analytical thinking", "analytical skills"],
+    "Critical Thinking": [],
+    "Time Management": ["multitasking", "multi-tasking", "prioritization", "organizational skills", "organisational skills"],
+    "Adaptability": ["flexibility", "fast learner", "quick learner"],
+    "Creativity": ["creative", "innovation", "innovative"],
+    "Attention to Detail": ["detail oriented", "detail-oriented"],
+    "Presentation": ["presentation skills", "public speaking"],
+    "Stakeholder Management": ["client management", "client-facing", "client facing"],
+    "Negotiation": [],
+    "Mentoring": ["coaching"],
+}
+
+# Having a skill also demonstrates these broader skills.
+SKILL_IMPLIES = {
+    "Python": ["Software Development"],
+    "JavaScript": ["Software Development", "Web Development"],
+    "TypeScript": ["JavaScript", "Software Development", "Web Development"],
+    "Java": ["Software Development", "Object-Oriented Programming"],
+    "C#": ["Software Development", "Object-Oriented Programming"],
+    "C++": ["Software Development", "Object-Oriented Programming"],
+    "Go": ["Software Development"],
+    "Rust": ["Software Development"],
+    "Scala": ["Software Development"],
+    "Kotlin": ["Software Development"],
+    "PostgreSQL": ["SQL", "Database Design"],
+    "MySQL": ["SQL", "Database Design"],
+    "SQL Server": ["SQL", "Database Design"],
+    "Oracle": ["SQL"],
+    "SQLite": ["SQL"],
+    "MongoDB": ["NoSQL"],
+    "Redis": ["NoSQL"],
+    "Deep Learning": ["Machine Learning"],
+    "Natural Language Processing": ["Machine Learning"],
+    "Computer Vision": ["Machine Learning"],
+    "TensorFlow": ["Deep Learning", "Machine Learning"],
+    "PyTorch": ["Deep Learning", "Machine Learning"],
+    "Keras": ["Deep Learning", "Machine Learning"],
+    "Scikit-learn": ["Machine Learning"],
+    "Pandas": ["Data Analysis", "Python"],
+    "NumPy": ["Python"],
+    "Spark": ["Big Data", "Data Engineering"],
+    "Hadoop": ["Big Data"],
+    "Kafka": ["Data Engineering"],
+    "Airflow": ["Data Engineering"],
+    "Power BI": ["Data Visualization"],
+    "Tableau": ["Data Visualization"],
+    "Looker": ["Data Visualization"],
+    "Machine Learning": ["Data Science"],
+    "Data Science": ["Data Analysis"],
+    "React": ["JavaScript", "Web Development"],
+    "Angular": ["JavaScript", "Web Development"],
+    "Vue": ["JavaScript", "Web Development"],
+    "Node.js": ["JavaScript"],
+    "Django": ["Python", "Web Development"],
+    "Flask": ["Python", "Web Development"],
+    "FastAPI": ["Python", "REST APIs"],
+    "Spring": ["Java"],
+    "AWS": ["Cloud Computing"],
+    "Azure": ["Cloud Computing"],
+    "GCP": ["Cloud Computing"],
+    "Kubernetes": ["Docker", "DevOps"],
+    "CI/CD": ["DevOps"],
+    "Terraform": ["DevOps"],
+    "Penetration Testing": ["Cybersecurity"],
+    "Network Security": ["Cybersecurity"],
+    "Agile": ["Project Management"],
+    "Mentoring": ["Leadership"],
+}
+
+# Words that qualify a skill without changing which skill it is
+_FILLER_WORDS = {
+    "programming", "language", "languages", "skills", "skill", "knowledge", "of",
+    "proficiency", "proficient", "in", "experience", "with", "strong", "advanced",
+    "basic", "good", "excellent", "expert", "expertise", "working", "demonstrated",
+    "and/or", "framework", "frameworks", "tools", "tool",
+}
+
+# A CV skill that is a strict subset of a required skill must share at least
+# this fraction of its words ("Machine Learning" for "Applied Machine Learning",
+# but not "Data" for "Data Engineering")
+_MIN_TOKEN_COVERAGE = 2 / 3
+
+_ALIAS_INDEX = {}
+
+def _normalize(text):
+    """Lowercase, unify separators and collapse whitespace; keeps + # . / for C++, C#, .NET, CI/CD."""
+    text = text.lower().strip()
+    text = re.sub(r"[\(\)\[\]{},;:'\"!?]", " ", text)
+    text = re.sub(r"[_\-]+", " ", text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" .")
+
+def _build_alias_index():
+    for canonical, aliases in SKILL_TAXONOMY.items():
+        _ALIAS_INDEX[_normalize(canonical)] = canonical
+        for alias in aliases:
+            _ALIAS_INDEX[_normalize(alias)] = canonical
+
+_build_alias_index()
+
+@lru_cache(maxsize=16384)
+def canonicalize_skill(skill):
+    """Map a raw skill string to its canonical name, or its normalized form if unknown."""
+    normalized = _normalize(skill)
+    if normalized in _ALIAS_INDEX:
+        return _ALIAS_INDEX[normalized]
+
+    stripped = " ".join(w for w in normalized.split() if w not in _FILLER_WORDS)
+    if stripped in _ALIAS_INDEX:
+        return _ALIAS_INDEX[stripped]
+
+    return stripped or normalized
+
+def _tokens(skill):
+    return frozenset(w for w in _normalize(skill).split() if w not in _FILLER_WORDS)
+
+def _expand(canonical_skills):
+    """Add every broader skill implied by the given canonical skills."""
+    expanded = set(canonical_skills)
+    stack = list(canonical_skills)
+    while stack:
+        for parent in SKILL_IMPLIES.get(stack.pop(), []):
+            if parent not in expanded:
+                expanded.add(parent)
+                stack.append(parent)
+    return expanded
+
+def build_skill_index(skills):
+    """Precompile a candidate's skill list for repeated matching."""
+    canonical = [canonicalize_skill(s) for s in skills if isinstance(s, str) and s.strip()]
+    return {
+        "skills": list(dict.fromkeys(canonical)),
+        "canonical": _expand(canonical),
+        "tokens": [_tokens(s) for s in canonical if _tokens(s)],
+    }
+
+def _has_skill(skill_index, required):
+    canonical = canonicalize_skill(required)
+    if canonical in skill_index["canonical"]:
+        return True
+
+    # The CV skill contains the required one, e.g. "Advanced SQL" for "SQL";
+    # the other way round only when it covers most of the required skill
+    required_tokens = _tokens(canonical)
+    if not required_tokens:
+        return False
+    for tokens in skill_index["tokens"]:
+        if required_tokens <= tokens:
+            return True
+        if tokens <= required_tokens and len(tokens) >= _MIN_TOKEN_COVERAGE * len(required_tokens):
+            return True
+    return False
+
+def score_skills(skill_index, required_skills, embed=None, embedding_threshold=0.85):
+    """Fraction of `required_skills` covered by a precompiled candidate skill index.
+
+    If `embed` is given, required skills with no taxonomy or token match are
+    compared to the candidate's skills by embedding cosine similarity.
+    """
+    if not required_skills:
+        return 0.0
+    if not skill_index["canonical"]:
+        return 0.0
+
+    matches = 0
+    unmatched = []
+    for required in required_skills:
+        if _has_skill(skill_index, required):
+            matches += 1
+        else:
+            unmatched.append(required)
+
+    if unmatched and embed is not None:
+        candidate_vectors = _embedding_matrix(skill_index["skills"], embed)
+        for required in unmatched:
+            vector = _unit(np.asarray(embed(canonicalize_skill(required)), dtype=np.float32))
+            if candidate_vectors.size and vector.size == candidate_vectors.shape[1]:
+                if float(np.max(candidate_vectors @ vector)) >= embedding_threshold:
+                    matches += 1
+
+    return min(matches / len(required_skills), 1.0)
+
+def match_skills(cv_skills, required_skills, embed=None, embedding_threshold=0.85):
+    """Convenience wrapper around build_skill_index + score_skills."""
+    return score_skills(build_skill_index(cv_skills), required_skills, embed, embedding_threshold)
+
+def _unit(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def _embedding_matrix(skills, embed):
+    vectors = [_unit(np.asarray(embed(s), dtype=np.float32)) for s in skills]
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+    dim = vectors[0].size
+    return np.stack([v for v in vectors if v.size == dim])
+
+def compare_with_llm(cv_folder, max_cvs=None):
+    """Score every CV in `cv_folder` against the loaded jobs with both matchers and report agreement."""
+    import os
+    from process_cvs import extract_text_from_pdf, extract_text_from_docx
+    from match_candidates import (
+        build_candidate_profile, build_job_profile, compute_skill_similarity_with_llm
+    )
+    from backend.api.utils.db_helper import get_all_jobs
+
+    jobs = [j for j in get_all_jobs() if j.get("jd_summary")]
+    if not jobs:
+        print("⚠️  No summarized jobs in the database. Upload and summarize JDs first.")
+        return None
+
+    files = sorted(f for f in os.listdir(cv_folder) if f.lower().endswith((".pdf", ".docx")))
+    if max_cvs:
+        files = files[:max_cvs]
+
+    print(f"\n{'='*70}")
+    print(f"🔬 SKILL MATCHER COMPARISON: {len(files)} CVs x {len(jobs)} jobs")
+    print(f"{'='*70}\n")
+
+    job_profiles = [build_job_profile(j["id"], j["jd_summary"]) for j in jobs]
+
+    local_scores, llm_scores = [], []
+    local_time = llm_time = 0.0
+    top1_agree = compared = 0
+
+    for filename in files:
+        path = os.path.join(cv_folder, filename)
+        text = extract_text_from_pdf(path) if filename.lower().endswith(".pdf") else extract_text_from_docx(path)
+        if not text:
+            continue
+        candidate = build_candidate_profile(None, text)
+        index = build_skill_index(candidate.skills)
+
+        per_job_local, per_job_llm = [], []
+        for job in job_profiles:
+            if not job.required_skills:
+                continue
+            start = time.perf_counter()
+            local = score_skills(index, job.required_skills)
+            local_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            llm = compute_skill_similarity_with_llm(candidate.skills, job.required_skills) if candidate.skills else 0.0
+            llm_time += time.perf_counter() - start
+
+            per_job_local.append(local)
+            per_job_llm.append(llm)
+            print(f"  {filename} vs Job {job.job_id}: local={local*100:.1f}% llm={llm*100:.1f}%")
+
+        if per_job_local:
+            compared += 1
+            top1_agree += int(np.argmax(per_job_local) == np.argmax(per_job_llm))
+            local_scores.extend(per_job_local)
+            llm_scores.extend(per_job_llm)
+
+    if not local_scores:
+        print("⚠️  Nothing to compare.")
+        return None
+
+    local_arr = np.array(local_scores)
+    llm_arr = np.array(llm_scores)
+    correlation = float(np.corrcoef(local_arr, llm_arr)[0, 1]) if local_arr.std() and llm_arr.std() else 0.0
+    report = {
+        "pairs": len(local_scores),
+        "mean_abs_error": round(float(np.mean(np.abs(local_arr - llm_arr))) * 100, 2),
+        "pearson_r": round(correlation, 3),
+        "top1_job_agreement": round(top1_agree / compared, 3),
+        "local_us_per_pair": round(local_time / len(local_scores) * 1e6, 1),
+        "llm_ms_per_pair": round(llm_time / len(llm_scores) * 1e3, 1),
+    }
+
+    print(f"\n{'='*70}")
+    print(f"📊 COMPARISON SUMMARY")
+    print(f"{'='*70}")
+    for key, value in report.items():
+        print(f"  {key}: {value}")
+    print(f"{'='*70}\n")
+    return report
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare local skill matching with the LLM matcher")
+    parser.add_argument("--compare", metavar="CV_FOLDER", default="data/CVs1")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N CVs")
+    args = parser.parse_args()
+    compare_with_llm(args.compare, args.limit)
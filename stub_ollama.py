@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Stub Ollama server for offline development and benchmarking.
+
+Implements the subset of the Ollama HTTP API the pipeline uses (/api/chat,
+/api/embeddings, /api/embed, /api/tags) with deterministic responses and
+simulated latency, so the pipeline can run without a model.
+
+    python stub_ollama.py --port 11435 --latency 0.5 --parallel 2
+    OLLAMA_HOST=http://127.0.0.1:11435 python match_candidates.py
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from skill_matcher import SKILL_TAXONOMY
+
+EMBEDDING_DIM = 256
+
+_SKILL_PATTERNS = [
+    (name, re.compile(r"(?<![\w+#.])" + re.escape(name.lower()) + r"(?![\w+#])"))
+    for name in SKILL_TAXONOMY
+]
+_SOFT_SKILLS = ["Communication", "Teamwork", "Leadership", "Problem Solving", "Time Management"]
+
+def _seed(text):
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+
+def _skills_in(text, limit=15):
+    lowered = text.lower()
+    found = [name for name, pattern in _SKILL_PATTERNS if pattern.search(lowered)]
+    if not found:
+        rng = random.Random(_seed(text))
+        found = rng.sample(sorted(SKILL_TAXONOMY), 5)
+    return found[:limit]
+
+def _section(prompt, start_marker, end_marker):
+    start = prompt.find(start_marker)
+    if start < 0:
+        return prompt
+    start += len(start_marker)
+    end = prompt.find(end_marker, start)
+    return prompt[start:end if end > 0 else None]
+
+def _cv_profile(cv_text):
+    skills = _skills_in(cv_text)
+    soft = [s for s in _SOFT_SKILLS if s.lower() in cv_text.lower()] or _SOFT_SKILLS[:2]
+    years = re.findall(r"(\d{1,2})\+?\s*(?:years|yrs)", cv_text.lower())
+    return {
+        "technical_skills": [s for s in skills if s not in _SOFT_SKILLS][:15],
+        "soft_skills": soft[:8],
+        "domain_skills": ["Data Analysis"] if "data" in cv_text.lower() else ["Software Development"],
+        "experience_years": int(years[0]) if years else _seed(cv_text) % 10,
+        "keywords": skills[:20],
+    }
+
+_CV_BLOCK = re.compile(r"=== CV id: (.+?) ===\n(.*?)\n=== END CV \1 ===", re.S)
+
+def fake_completion(prompt):
+    """Deterministic stand-in for the model's answer to one of the pipeline's prompts."""
+    if "CVS TO ANALYZE:" in prompt:
+        return json.dumps({"cvs": [{"id": key, **_cv_profile(text)} for key, text in _CV_BLOCK.findall(prompt)]})
+    if "CV TEXT:" in prompt:
+        return json.dumps(_cv_profile(_section(prompt, "CV TEXT:", "You MUST respond")))
+    if "JOB DESCRIPTION:" in prompt and "required_skills" in prompt:
+        jd = _section(prompt, "JOB DESCRIPTION:", "You MUST respond")
+        skills = _skills_in(jd, 20)
+        return json.dumps({
+            "required_skills": skills[:8],
+            "preferred_skills": skills[8:14],
+            "min_experience": _seed(jd) % 6,
+            "keywords": skills,
+        })
+    if "skills matching expert" in prompt:
+        total = max(1, prompt.split("REQUIRED SKILLS:")[-1].count(",") + 1)
+        matches = _seed(prompt) % (total + 1)
+        return json.dumps({"matches": matches, "total_required": total,
+                           "match_percentage": round(matches / total * 100, 1)})
+    if "RESPONSE:" in prompt:
+        text = _section(prompt, "RESPONSE:", "Return ONLY")
+        skills = _skills_in(text)
+        return json.dumps({"skills": skills, "required_skills": skills, "preferred_skills": [],
+                           "experience_years": 0, "min_experience": 0, "keywords": skills})
+    skills = ", ".join(_skills_in(prompt))
+    return (
+        "**Required Skills:**\n"
+        f"Technical Skills: {skills}\n"
+        "Soft Skills: Communication, Teamwork\n\n"
+        "**Experience Requirements:**\nYears Required: 3\n\n"
+        "**Educational Qualifications:**\nRequired Degree: Bachelor's\n"
+    )
+
+def mangle_json(content, rng):
+    """Damage JSON the way unconstrained models do: fences, prose, quotes, commas, truncation."""
+    kind = rng.choice(["fence", "single_quotes", "trailing_comma", "truncate"])
+    if kind == "fence":
+        return f"Here is the extracted information:\n```json\n{content}\n```"
+    if kind == "single_quotes":
+        return content.replace('"', "'")
+    if kind == "trailing_comma":
+        return content[:-1].rstrip() + ",\n" + content[-1]
+    return content[:int(len(content) * 0.85)]
+
+def fake_embedding(text, dim=EMBEDDING_DIM):
+    """Hashed bag-of-words vector, so texts sharing vocabulary are similar."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for token in re.findall(r"[a-z0-9+#]+", text.lower()):
+        vector[_seed(token) % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+class StubState:
+    def __init__(self, latency=0.0, jitter=0.0, parallel=0, fail_rate=0.0, token_latency=0.0,
+                 malformed_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self.malformed_rate = malformed_rate
+        self.fail_rate = fail_rate
+        self.slots = threading.BoundedSemaphore(parallel) if parallel else None
+        self.lock = threading.Lock()
+        self.calls = {"chat": 0, "embeddings": 0, "failures": 0, "malformed": 0}
+
+    def count(self, kind):
+        with self.lock:
+            self.calls[kind] += 1
+
+    def work(self, output_tokens=0):
+        """Simulate a request: fixed overhead plus decode time per generated token."""
+        delay = self.latency + random.uniform(0, self.jitter) + self.token_latency * output_tokens
+        if self.slots:
+            with self.slots:
+                time.sleep(delay)
+        else:
+            time.sleep(delay)
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send(200, {"models": [{"name": "stub"}]})
+            elif self.path == "/api/version":
+                self._send(200, {"version": "stub"})
+            elif self.path == "/stub/stats":
+                with state.lock:
+                    self._send(200, dict(state.calls))
+            else:
+                self._send(200 if self.path == "/" else 404, {"status": "Ollama stub is running"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            if state.fail_rate and random.random() < state.fail_rate:
+                state.count("failures")
+                self._send(503, {"error": "stub overloaded"})
+                return
+
+            if self.path == "/api/chat":
+                state.count("chat")
+                prompt = "\n".join(m.get("content", "") for m in request.get("messages", []))
+                content = fake_completion(prompt)
+                # Constrained decoding (any `format`) always yields well-formed JSON
+                if (not request.get("format") and content.startswith(("{", "["))
+                        and state.malformed_rate and random.random() < state.malformed_rate):
+                    state.count("malformed")
+                    content = mangle_json(content, random)
+                state.work(len(content) // 4)
+                self._send(200, {
+                    "model": request.get("model", "stub"),
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "message": {"role": "assistant", "content": content},
+                    "done": True,
+                    "done_reason": "stop",
+                    "total_duration": int((state.latency + state.token_latency * (len(content) // 4)) * 1e9),
+                    "prompt_eval_count": len(prompt) // 4,
+                    "eval_count": len(content) // 4,
+                    "eval_duration": int(state.token_latency * (len(content) // 4) * 1e9),
+                })
+            elif self.path in ("/api/embeddings", "/api/embed"):
+                state.count("embeddings")
+                state.work()
+                if self.path == "/api/embeddings":
+                    self._send(200, {"embedding": fake_embedding(request.get("prompt", ""))})
+                else:
+                    inputs = request.get("input", "")
+                    inputs = [inputs] if isinstance(inputs, str) else inputs
+                    self._send(200, {"model": request.get("model", "stub"),
+                                     "embeddings": [fake_embedding(t) for t in inputs]})
+            else:
+                self._send(404, {"error": f"unknown endpoint {self.path}"})
+
+    return Handler
+
+def start_stub_server(port=0, latency=0.0, jitter=0.0, parallel=0, fail_rate=0.0, token_latency=0.0,
+                      malformed_rate=0.0):
+    """Start the stub in a background thread. Returns (server, base_url, state)."""
+    state = StubState(latency, jitter, parallel, fail_rate, token_latency, malformed_rate)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, bound_port = server.server_address
+    return server, f"http://{host}:{bound_port}", state
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a stub Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds per request")
+    parser.add_argument("--parallel", type=int, default=0, help="Max requests served at once (0 = unlimited)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Extra seconds per generated token")
+    parser.add_argument("--malformed-rate", type=float, default=0.0,
+                        help="Fraction of unconstrained JSON answers returned malformed")
+    args = parser.parse_args()
+
+    server, url, _ = start_stub_server(args.port, args.latency, args.jitter, args.parallel, args.fail_rate,
+                                       args.token_latency, args.malformed_rate)
+    print(f"🧪 Ollama stub listening on {url} (latency {args.latency}s, parallel {args.parallel or 'unlimited'})")
+    print(f"   export OLLAMA_HOST={url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
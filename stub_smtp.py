@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Stub SMTP server for offline development and benchmarking of the mailer.
+
+Accepts EHLO/HELO, AUTH (any credentials), MAIL, RCPT, DATA, RSET, NOOP and
+QUIT, keeps delivered messages in memory, and simulates the cost of a new
+session (TCP + TLS + login round trips) and of each message. It can also
+answer a fraction of messages with a temporary 451 or a permanent 550.
+
+    python stub_smtp.py --port 1025 --connect-latency 0.3 --message-latency 0.02
+    SMTP_SERVER=127.0.0.1 SMTP_PORT=1025 SMTP_USE_TLS=false python interview_scheduler.py
+"""
+
+import random
+import socketserver
+import threading
+import time
+
+class StubState:
+    def __init__(self, connect_latency=0.0, message_latency=0.0, temp_fail_rate=0.0, perm_fail_rate=0.0,
+                 max_connections=0):
+        self.connect_latency = connect_latency
+        self.message_latency = message_latency
+        self.temp_fail_rate = temp_fail_rate
+        self.perm_fail_rate = perm_fail_rate
+        self.max_connections = max_connections
+        self.lock = threading.Lock()
+        self.rng = random.Random(0)
+        self.messages = []
+        self.sessions = 0
+        self.active_sessions = 0
+        self.peak_sessions = 0
+        self.rejected = {"temporary": 0, "permanent": 0}
+
+    def _roll(self):
+        with self.lock:
+            return self.rng.random()
+
+def make_handler(state):
+    class Handler(socketserver.StreamRequestHandler):
+        def reply(self, line):
+            self.wfile.write((line + "\r\n").encode("ascii"))
+
+        def handle(self):
+            with state.lock:
+                if state.max_connections and state.active_sessions >= state.max_connections:
+                    self.reply("421 Too many connections")
+                    return
+                state.sessions += 1
+                state.active_sessions += 1
+                state.peak_sessions = max(state.peak_sessions, state.active_sessions)
+            try:
+                self._session()
+            finally:
+                with state.lock:
+                    state.active_sessions -= 1
+
+        def _session(self):
+            # Stands in for the TCP, STARTTLS and AUTH round trips of a real provider
+            time.sleep(state.connect_latency)
+            self.reply("220 stub-smtp ready")
+            sender, recipients = None, []
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    return
+                command = line.decode("utf-8", "replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb in ("EHLO", "HELO"):
+                    self.wfile.write(b"250-stub-smtp\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+                elif verb == "AUTH":
+                    parts = command.split()
+                    if len(parts) == 2 and parts[1].upper() == "LOGIN":
+                        for prompt in ("VXNlcm5hbWU6", "UGFzc3dvcmQ6"):
+                            self.reply(f"334 {prompt}")
+                            self.rfile.readline()
+                    self.reply("235 Authentication successful")
+                elif verb == "MAIL":
+                    sender, recipients = command[10:].strip(), []
+                    self.reply("250 OK")
+                elif verb == "RCPT":
+                    recipients.append(command[8:].strip())
+                    self.reply("250 OK")
+                elif verb == "DATA":
+                    self.reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while True:
+                        chunk = self.rfile.readline()
+                        if not chunk or chunk in (b".\r\n", b".\n"):
+                            break
+                        data.append(chunk)
+                    time.sleep(state.message_latency)
+                    roll = state._roll()
+                    if roll < state.perm_fail_rate:
+                        with state.lock:
+                            state.rejected["permanent"] += 1
+                        self.reply("550 Mailbox unavailable")
+                    elif roll < state.perm_fail_rate + state.temp_fail_rate:
+                        with state.lock:
+                            state.rejected["temporary"] += 1
+                        self.reply("451 Try again later")
+                    else:
+                        with state.lock:
+                            state.messages.append((sender, recipients, b"".join(data)))
+                        self.reply("250 Queued")
+                    sender, recipients = None, []
+                elif verb == "RSET":
+                    sender, recipients = None, []
+                    self.reply("250 OK")
+                elif verb == "NOOP":
+                    self.reply("250 OK")
+                elif verb == "QUIT":
+                    self.reply("221 Bye")
+                    return
+                else:
+                    self.reply("502 Command not implemented")
+
+    return Handler
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def start_stub_server(port=0, connect_latency=0.0, message_latency=0.0, temp_fail_rate=0.0,
+                      perm_fail_rate=0.0, max_connections=0):
+    """Start the stub in a background thread. Returns (server, (host, port), state)."""
+    state = StubState(connect_latency, message_latency, temp_fail_rate, perm_fail_rate, max_connections)
+    server = _Server(("127.0.0.1", port), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, server.server_address, state
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a stub SMTP server")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--connect-latency", type=float, default=0.3,
+                        help="Seconds to set up each session (TLS + login)")
+    parser.add_argument("--message-latency", type=float, default=0.02, help="Seconds per message")
+    parser.add_argument("--temp-fail-rate", type=float, default=0.0, help="Fraction of messages answered 451")
+    parser.add_argument("--perm-fail-rate", type=float, default=0.0, help="Fraction of messages answered 550")
+    parser.add_argument("--max-connections", type=int, default=0, help="Concurrent sessions allowed (0 = unlimited)")
+    args = parser.parse_args()
+
+    server, (host, port), state = start_stub_server(args.port, args.connect_latency, args.message_latency,
+                                                    args.temp_fail_rate, args.perm_fail_rate,
+                                                    args.max_connections)
+    print(f"🧪 SMTP stub listening on {host}:{port} (session setup {args.connect_latency}s, "
+          f"{args.message_latency}s per message)")
+    print(f"   export SMTP_SERVER={host} SMTP_PORT={port} SMTP_USE_TLS=false")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"   {len(state.messages)} messages, {state.sessions} sessions, rejected {state.rejected}")
+    except KeyboardInterrupt:
+        server.shutdown()
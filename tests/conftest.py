@@ -0,0 +1,38 @@
+import os
+import sys
+import tempfile
+
+# Configure before any project module reads config.py
+_tmp = tempfile.mkdtemp(prefix="screener-tests-")
+os.environ["DB_PATH"] = os.path.join(_tmp, "test.db")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["LLM_RETRY_BACKOFF"] = "0.01"
+os.environ["LLM_MAX_WORKERS"] = "4"
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ollama
+import pytest
+
+import llm_client
+from stub_ollama import start_stub_server
+
+@pytest.fixture
+def stub_ollama(monkeypatch):
+    """Start a stub Ollama server and point llm_client at it.
+
+    Call the returned function with start_stub_server() options, e.g.
+    `state = stub_ollama(latency=0.2)`; returns the stub's StubState.
+    """
+    servers = []
+
+    def start(**options):
+        server, url, state = start_stub_server(**options)
+        servers.append(server)
+        monkeypatch.setattr(llm_client, "_client", ollama.Client(host=url, timeout=10))
+        return state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,61 @@
+import pytest
+
+import json_repair
+import match_candidates
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    json_repair.reset_stats()
+    yield
+    json_repair.reset_stats()
+
+def test_clean_json_is_not_counted_as_repaired():
+    assert json_repair.loads('{"skills": ["Python"]}', expect=dict) == {"skills": ["Python"]}
+    stats = json_repair.get_stats()
+    assert stats["clean"] == 1 and stats["repaired"] == 0
+
+def test_fences_prose_and_python_literals_are_repaired():
+    text = "Here is the JSON:\n```json\n{'skills': ['Python', 'SQL',], 'remote': True, 'lead': None,}\n```"
+    assert json_repair.loads(text, expect=dict) == {"skills": ["Python", "SQL"], "remote": True, "lead": None}
+    assert json_repair.get_stats()["repaired"] == 1
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"skills": ["Python", "SQL"], "experience_years": 5, "keywords": ["etl", "air',
+     {"skills": ["Python", "SQL"], "experience_years": 5, "keywords": ["etl"]}),
+    ('{"skills": ["Python", "SQL"], "experience_years":', {"skills": ["Python", "SQL"], "experience_years": None}),
+    ('["Python", "SQL", "Dock', ["Python", "SQL"]),
+])
+def test_truncated_output_keeps_complete_elements(text, expected):
+    assert json_repair.repair(text) == expected
+
+@pytest.mark.parametrize("text", [
+    '{skills: ["Python", "SQL"], experience_years: 5}',
+    '{"skills": ["Python" "SQL"], "experience_years": 5}',
+    '{"skills": ["Python", "SQL"] "experience_years": 5}',
+])
+def test_complete_but_malformed_output_raises(text):
+    with pytest.raises(ValueError):
+        json_repair.repair(text)
+
+@pytest.mark.parametrize("text", ["not json at all {", "[", "", "no brackets here"])
+def test_junk_raises_and_counts_as_failed(text):
+    with pytest.raises(ValueError):
+        json_repair.loads(text, expect=dict)
+    assert json_repair.get_stats()["failed"] == 1
+
+def test_wrong_top_level_type_raises():
+    with pytest.raises(ValueError, match="expected dict"):
+        json_repair.loads('["Python", "SQL"]', expect=dict)
+
+def test_malformed_cv_extraction_reaches_llm_fallback(monkeypatch):
+    calls = []
+
+    def fallback(llm_response):
+        calls.append(llm_response)
+        return {"skills": ["Python"], "experience_years": 0, "keywords": [], "raw_text": llm_response}
+
+    monkeypatch.setattr(match_candidates, "parse_cv_with_llm_fallback", fallback)
+    malformed = '{technical_skills: ["Python" "SQL"], experience_years: 5}'
+    assert match_candidates.parse_cv_extraction(malformed)["skills"] == ["Python"]
+    assert calls == [malformed]
+    assert json_repair.get_stats()["llm_fallback"] == 1
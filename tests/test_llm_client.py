@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+import llm_client
+import match_candidates
+
+LATENCY = 0.2
+
+CVS = [
+    f"Candidate {i}\nEmail: candidate{i}@example.com\nSkills: Python, SQL, Docker\n"
+    f"Five years of experience as a data engineer at company {i}."
+    for i in range(8)
+]
+
+def test_map_concurrent_overlaps_calls_and_keeps_order(stub_ollama):
+    state = stub_ollama(latency=LATENCY)
+    prompts = [f"Summarize item {i}" for i in range(8)]
+
+    def ask(prompt):
+        response = llm_client.chat([{"role": "user", "content": prompt}], cache=False)
+        return prompt, response["message"]["content"]
+
+    start = time.perf_counter()
+    results = llm_client.map_concurrent(ask, prompts, max_workers=4)
+    elapsed = time.perf_counter() - start
+
+    assert [prompt for prompt, _ in results] == prompts
+    assert state.calls["chat"] == 8
+    # 8 calls on 4 workers take about 2 rounds, not 8 sequential ones
+    assert elapsed < LATENCY * 8 * 0.6
+
+def test_map_concurrent_respects_max_workers(stub_ollama):
+    stub_ollama(latency=0.05)
+    lock = threading.Lock()
+    active = peak = 0
+
+    def ask(i):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        try:
+            return llm_client.chat([{"role": "user", "content": f"item {i}"}], cache=False)
+        finally:
+            with lock:
+                active -= 1
+
+    llm_client.map_concurrent(ask, range(12), max_workers=3)
+    assert peak == 3
+
+def test_on_result_reports_every_item(stub_ollama):
+    stub_ollama(latency=0.01, jitter=0.05)
+    seen = []
+    results = llm_client.map_concurrent(lambda i: i * 2, range(10), max_workers=4,
+                                        on_result=lambda index, result: seen.append((index, result)))
+    assert results == [i * 2 for i in range(10)]
+    assert sorted(seen) == [(i, i * 2) for i in range(10)]
+
+def test_concurrent_cv_extraction_overlaps_and_keeps_order(stub_ollama):
+    state = stub_ollama(latency=LATENCY)
+
+    start = time.perf_counter()
+    outputs = llm_client.map_concurrent(match_candidates.extract_skills_from_cv, CVS, max_workers=4)
+    elapsed = time.perf_counter() - start
+
+    assert state.calls["chat"] == len(CVS)
+    assert elapsed < LATENCY * len(CVS) * 0.6
+    for output in outputs:
+        assert match_candidates.parse_cv_extraction(output)["skills"]
+
+    # Same input order as a sequential run
+    sequential = [match_candidates.extract_skills_from_cv(cv) for cv in CVS]
+    assert outputs == sequential
+
+def test_transient_server_errors_are_retried(stub_ollama, monkeypatch):
+    # Enough retries that every item gets through a 30% failure rate
+    monkeypatch.setattr(llm_client, "LLM_MAX_RETRIES", 8)
+    state = stub_ollama(latency=0.01, fail_rate=0.3)
+    results = llm_client.map_concurrent(
+        lambda i: llm_client.chat([{"role": "user", "content": f"item {i}"}], cache=False),
+        range(30), max_workers=4
+    )
+    assert len(results) == 30
+    assert all(r["message"]["content"] for r in results)
+    assert state.calls["failures"] > 0
+
+def test_failed_extraction_only_affects_its_item(stub_ollama, monkeypatch):
+    stub_ollama(latency=0.05)
+    real_chat = llm_client.chat
+
+    def flaky_chat(messages, **kwargs):
+        if "candidate3@example.com" in messages[-1]["content"]:
+            raise ConnectionError("connection reset")
+        return real_chat(messages, **kwargs)
+
+    monkeypatch.setattr(llm_client, "chat", flaky_chat)
+    outputs = llm_client.map_concurrent(match_candidates.extract_skills_from_cv, CVS, max_workers=4)
+
+    assert outputs[3] == "{}"
+    for index, output in enumerate(outputs):
+        if index != 3:
+            assert match_candidates.parse_cv_extraction(output)["skills"]
+
+def test_map_concurrent_propagates_errors(stub_ollama):
+    stub_ollama(latency=0.01)
+
+    def ask(i):
+        if i == 5:
+            raise ValueError("bad item")
+        return llm_client.chat([{"role": "user", "content": f"item {i}"}], cache=False)
+
+    with pytest.raises(ValueError, match="bad item"):
+        llm_client.map_concurrent(ask, range(10), max_workers=4)
@@ -0,0 +1,66 @@
+import pytest
+
+from skill_matcher import canonicalize_skill, match_skills
+
+@pytest.mark.parametrize("raw, canonical", [
+    ("golang", "Go"),
+    ("JS", "JavaScript"),
+    ("Python3", "Python"),
+    ("python programming", "Python"),
+    ("Proficient in PL/SQL", "SQL"),
+    ("C Sharp", "C#"),
+    ("cyber-security", "Cybersecurity"),
+])
+def test_aliases_map_to_canonical_skill(raw, canonical):
+    assert canonicalize_skill(raw) == canonical
+    assert match_skills([raw], [canonical]) == 1.0
+
+@pytest.mark.parametrize("ambiguous, skill", [
+    ("py", "Python"),
+    ("shell", "Bash"),
+    ("analytics", "Data Analysis"),
+    ("programming", "Software Development"),
+    ("qa", "Testing"),
+    ("cloud", "Cloud Computing"),
+    ("security", "Cybersecurity"),
+])
+def test_ambiguous_words_are_not_aliases(ambiguous, skill):
+    assert canonicalize_skill(ambiguous) != skill
+    assert match_skills([ambiguous], [skill]) == 0.0
+
+def test_specific_skill_implies_broader_ones():
+    assert match_skills(["PyTorch"], ["Deep Learning", "Machine Learning", "Data Science", "Data Analysis"]) == 1.0
+    assert match_skills(["Kubernetes"], ["Docker", "DevOps"]) == 1.0
+    assert match_skills(["PostgreSQL"], ["SQL"]) == 1.0
+
+def test_broader_skill_does_not_imply_specific_one():
+    assert match_skills(["Machine Learning"], ["PyTorch"]) == 0.0
+    assert match_skills(["SQL"], ["PostgreSQL"]) == 0.0
+
+@pytest.mark.parametrize("required", ["Data Engineering", "Big Data", "Data Entry", "Data Visualization"])
+def test_generic_one_word_skill_does_not_match_longer_skill(required):
+    assert match_skills(["Data"], [required]) == 0.0
+
+def test_one_word_skill_does_not_match_unrelated_two_word_skill():
+    assert match_skills(["Engineering"], ["Data Engineering"]) == 0.0
+    assert match_skills(["Management"], ["Project Management"]) == 0.0
+
+def test_cv_skill_containing_required_skill_matches():
+    assert match_skills(["Advanced SQL"], ["SQL"]) == 1.0
+    assert match_skills(["Data Engineering"], ["Engineering"]) == 1.0
+
+def test_cv_skill_covering_most_of_required_skill_matches():
+    assert match_skills(["Machine Learning"], ["Applied Machine Learning"]) == 1.0
+    assert match_skills(["Learning"], ["Applied Machine Learning"]) == 0.0
+
+def test_score_is_fraction_of_required_skills_covered():
+    assert match_skills(["golang", "Data"], ["Go", "Data Engineering", "SQL", "Docker"]) == 0.25
+    assert match_skills([], ["Go"]) == 0.0
+    assert match_skills(["Go"], []) == 0.0
+
+def test_embedding_match_only_for_unmatched_skills():
+    # Canonical CV skills and normalized unknown skills are what get embedded
+    vectors = {"Go": [1.0, 0.0], "golang microservices": [0.95, 0.1], "baking": [0.0, 1.0]}
+    embed = lambda text: vectors[text]
+    assert match_skills(["golang"], ["Golang Microservices", "Baking"]) == 0.0
+    assert match_skills(["golang"], ["Golang Microservices", "Baking"], embed=embed) == 0.5
@@ -0,0 +1,81 @@
+"""
+Text extraction for uploaded CVs and job descriptions.
+
+PDFs are read with PyMuPDF, the C-backed parser CV ingestion already
+used (benchmarks/pdf_extraction.py compares it with PyPDF2). Every
+function accepts a file path, raw `bytes` (e.g. an upload still in
+memory) or a binary file object, and takes optional budgets:
+
+    max_pages   stop after this many pages (None or 0 = all)
+    max_chars   stop once this many characters are collected and cut the
+                result to that length (None or 0 = unlimited)
+
+so a 30-page portfolio costs the same as the few pages we actually use.
+Errors propagate; callers decide whether a bad file is fatal.
+"""
+
+import io
+import os
+
+try:
+    import pymupdf
+except ImportError:  # PyMuPDF < 1.24 only ships the legacy module name
+    import fitz as pymupdf
+from docx import Document
+
+def _open_pdf(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return pymupdf.open(stream=bytes(source), filetype="pdf")
+    if hasattr(source, "read"):
+        return pymupdf.open(stream=source.read(), filetype="pdf")
+    return pymupdf.open(source)
+
+def _clip(parts, max_chars):
+    text = "\n".join(parts).strip()
+    return text[:max_chars] if max_chars else text
+
+def extract_pdf_text(source, max_pages=None, max_chars=None):
+    """Plain text of a PDF, page by page, within the given budgets."""
+    parts = []
+    collected = 0
+    with _open_pdf(source) as doc:
+        pages = min(doc.page_count, max_pages) if max_pages else doc.page_count
+        for page_number in range(pages):
+            page_text = doc.load_page(page_number).get_text("text")
+            parts.append(page_text)
+            collected += len(page_text) + 1
+            if max_chars and collected >= max_chars:
+                break
+    return _clip(parts, max_chars)
+
+def extract_docx_text(source, max_chars=None):
+    """Paragraph text of a DOCX file, one paragraph per line."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(bytes(source))
+    doc = Document(source)
+    parts = []
+    collected = 0
+    for para in doc.paragraphs:
+        parts.append(para.text)
+        collected += len(para.text) + 1
+        if max_chars and collected >= max_chars:
+            break
+    return _clip(parts, max_chars)
+
+def extract_text(source, filename=None, max_pages=None, max_chars=None):
+    """Dispatch on the file extension of `filename` (or of `source` when it is a path).
+
+    DOCX has no fixed pages, so only the character budget applies to it.
+    """
+    name = filename or (source if isinstance(source, (str, os.PathLike)) else "")
+    extension = os.path.splitext(str(name))[1].lower()
+    if extension == ".pdf":
+        return extract_pdf_text(source, max_pages=max_pages, max_chars=max_chars)
+    if extension == ".docx":
+        return extract_docx_text(source, max_chars=max_chars)
+    raise ValueError(f"unsupported file type: {extension or name!r}")
+
+def pdf_page_count(source):
+    """Number of pages, without extracting any text."""
+    with _open_pdf(source) as doc:
+        return doc.page_count
@@ -0,0 +1,131 @@
+"""
+In-process vector indexes over job-description embeddings.
+
+Used by match_candidates to shortlist the top-K jobs per CV before the full
+multi-factor scorer runs. FlatIndex is exact; IVFIndex clusters the vectors
+with k-means and only searches the `n_probe` clusters nearest each query,
+which trades a little recall for speed once there are many jobs.
+"""
+
+import numpy as np
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def _top_k(scores, k):
+    """Indices of the k largest scores per row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(scores, part, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(part, order, axis=1)
+
+class FlatIndex:
+    """Exact cosine-similarity search by brute-force matrix product."""
+
+    def __init__(self):
+        self.ids = []
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, vectors):
+        vectors = _normalize(vectors)
+        self.vectors = vectors if not len(self.ids) else np.vstack([self.vectors, vectors])
+        self.ids.extend(ids)
+
+    def search(self, queries, k):
+        """Return, per query, a list of (id, cosine similarity) best first."""
+        queries = _normalize(queries)
+        if not len(self.ids):
+            return [[] for _ in range(len(queries))]
+        scores = queries @ self.vectors.T
+        top = _top_k(scores, k)
+        return [[(self.ids[j], float(scores[row, j])) for j in top[row]] for row in range(len(queries))]
+
+class IVFIndex:
+    """Inverted-file index: k-means clusters, search the nearest `n_probe` clusters.
+
+    `n_lists` defaults to roughly sqrt(N) clusters. The index is trained on
+    the vectors given to add(); add everything once, then search.
+    """
+
+    def __init__(self, n_lists=None, n_probe=2, iterations=10, seed=42):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.iterations = iterations
+        self.seed = seed
+        self.ids = []
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.centroids = None
+        self.lists = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, vectors):
+        vectors = _normalize(vectors)
+        self.vectors = vectors if not len(self.ids) else np.vstack([self.vectors, vectors])
+        self.ids.extend(ids)
+        self._train()
+
+    def _train(self):
+        n = len(self.ids)
+        n_lists = max(1, min(self.n_lists or int(np.sqrt(n)), n))
+        rng = np.random.default_rng(self.seed)
+        centroids = self.vectors[rng.choice(n, n_lists, replace=False)]
+
+        # Spherical k-means: assign by cosine similarity, re-normalize the means
+        for _ in range(self.iterations):
+            assignment = (self.vectors @ centroids.T).argmax(axis=1)
+            for c in range(n_lists):
+                members = self.vectors[assignment == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+
+        assignment = (self.vectors @ centroids.T).argmax(axis=1)
+        self.centroids = centroids
+        self.lists = [np.flatnonzero(assignment == c) for c in range(n_lists)]
+
+    def search(self, queries, k):
+        """Return, per query, a list of (id, cosine similarity) best first."""
+        queries = _normalize(queries)
+        if not len(self.ids):
+            return [[] for _ in range(len(queries))]
+
+        n_probe = min(self.n_probe, len(self.lists))
+        nearest_lists = _top_k(queries @ self.centroids.T, n_probe)
+        results = []
+        for row, query in enumerate(queries):
+            candidates = np.concatenate([self.lists[c] for c in nearest_lists[row]])
+            scores = self.vectors[candidates] @ query
+            top = _top_k(scores[None, :], k)[0]
+            results.append([(self.ids[candidates[j]], float(scores[j])) for j in top])
+        return results
+
+def build_index(ids, vectors, kind="flat", n_lists=None, n_probe=2):
+    """Build a "flat" or "ivf" index over `vectors` labelled by `ids`."""
+    if kind == "ivf":
+        index = IVFIndex(n_lists=n_lists, n_probe=n_probe)
+    elif kind == "flat":
+        index = FlatIndex()
+    else:
+        raise ValueError(f"Unknown index type: {kind}")
+    if len(ids):
+        index.add(list(ids), vectors)
+    return index
+
+def recall_at_k(retrieved, relevant):
+    """Fraction of `relevant` ids that appear in `retrieved` (1.0 if nothing is relevant)."""
+    relevant = set(relevant)
+    if not relevant:
+        return 1.0
+    return len(relevant & set(retrieved)) / len(relevant)